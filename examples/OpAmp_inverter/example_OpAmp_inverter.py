@@ -19,6 +19,6 @@ circuit.add(Voltmeter(name='V_IN', pos='1', neg='GND'))
 circuit.add(Voltmeter(name='V_OUT', pos='4', neg='GND'))
 circuit.add(ISenseResistor(name='I2', resistor_name='R2')) 
 
-circuit.simulate(simulation_time=1000)
+circuit.simulate(simulation_time=1000, plot=True)
     
     
\ No newline at end of file
@@ -18,5 +18,5 @@ c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
 c.add(Voltmeter(name='VM3', pos='3', neg='GND'))
 c.add(ISenseResistor(name='I1', resistor_name='R1'))
 
-c.simulate(simulation_time=60)
+c.simulate(simulation_time=60, plot=True)
     
\ No newline at end of file
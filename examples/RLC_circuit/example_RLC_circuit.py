@@ -16,4 +16,4 @@ circuit.add(Voltmeter(name='VM1', pos='1', neg='GND'))
 circuit.add(Voltmeter(name='VM2', pos='2', neg='GND'))
 circuit.add(ISenseResistor(name='I1', resistor_name='R1')) 
 
-circuit.simulate(simulation_time=1000)
\ No newline at end of file
+circuit.simulate(simulation_time=1000, plot=True)
\ No newline at end of file
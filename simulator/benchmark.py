@@ -0,0 +1,354 @@
+import argparse
+import ast
+import json
+import multiprocessing
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .circuit import Circuit
+from .components import Resistor, Capacitor, Inductor, OperationalAmplifier
+from .measurement import Voltmeter
+from .sources import SquareWaveSource, GND
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# circuits of these scripts are simulated without their plots
+SCRIPTS = ['examples/RLC_circuit/example_RLC_circuit.py',
+           'examples/OpAmp_inverter/example_OpAmp_inverter.py',
+           'examples/OpAmp_switching_transient/'
+           'example_OpAmp_switching_transient.py',
+           'test/test_capacitor.py',
+           'test/test_inductor.py',
+           'test/test_dc_curr_source.py',
+           'test/test_ac_volt_source.py',
+           'test/test_v_sense_resistor.py',
+           'test/test_opamp.py']
+
+SIZES = (10, 100, 1000, 10000)
+
+# key: engine name -> value: arguments of Circuit.simulate()
+ENGINES = {'object': dict(engine='object'),
+           'numpy': dict(engine='numpy'),
+           'jit': dict(engine='jit'),
+           'mna': dict(engine='mna', time_step=0.01)}
+
+# largest synthetic circuits (number of junctions) simulated by the engines
+MAX_NODES = {'object': 100, 'numpy': 10000, 'jit': 10000, 'mna': 10000}
+
+# the reference waveforms are simulated by the MNA engine with this time
+# step in usec
+REFERENCE = dict(engine='mna', time_step=0.001)
+
+# measurements are sampled at this interval in usec
+SAMPLE_INTERVAL = 0.01
+
+
+def load_script(path):
+    """
+    Executes an example or test script without its simulate() calls
+    path : str - script path, relative to the repository root
+    Returns (Circuit, float) - circuit of the script and its simulation time
+            in usec
+    """
+    with open(os.path.join(ROOT, path)) as f:
+        module = ast.parse(f.read(), path)
+    namespace = {'__name__': 'benchmark'}
+    name, simulation_time = None, None
+    for statement in module.body:
+        if (isinstance(statement, ast.Expr) and
+                isinstance(statement.value, ast.Call) and
+                isinstance(statement.value.func, ast.Attribute) and
+                statement.value.func.attr == 'simulate'):
+            call = statement.value
+            name = call.func.value.id
+            arguments = {k.arg: ast.literal_eval(k.value)
+                         for k in call.keywords}
+            simulation_time = (ast.literal_eval(call.args[0]) if call.args
+                               else arguments['simulation_time'])
+            continue
+        exec(compile(ast.Module([statement], []), path, 'exec'), namespace)
+    if name is None:
+        raise ValueError(path + ' does not simulate a circuit')
+    return namespace[name], simulation_time
+
+
+def grounded_capacitor(c, name, cap, junction):
+    """Capacitor to its own ground junction, see the hints of the README"""
+    c.add(Capacitor(name=name, c=cap, pos=junction, neg=name + '_GND'))
+    c.add(GND(name=name + '_GND', gnd=name + '_GND'))
+
+
+def rc_ladder(nodes):
+    """RC low-pass ladder driven by a square wave"""
+    c = Circuit()
+    c.add(GND(name='GND', gnd='GND'))
+    c.add(SquareWaveSource(name='V1', v_hi=1, v_lo=0, t_period=1,
+                           duty_cycle=50, pos='N0', neg='GND'))
+    for k in range(1, nodes):
+        c.add(Resistor(name='R%d' % k, r=100, pos='N%d' % (k - 1),
+                       neg='N%d' % k))
+        grounded_capacitor(c, 'C%d' % k, 1e-9, 'N%d' % k)
+    c.add(Voltmeter(name='V_1', pos='N1', neg='GND',
+                    sample_interval=SAMPLE_INTERVAL))
+    c.add(Voltmeter(name='V_OUT', pos='N%d' % (nodes - 1), neg='GND',
+                    sample_interval=SAMPLE_INTERVAL))
+    return c
+
+
+def rlc_mesh(nodes):
+    """
+    Square mesh of resistors and inductors with a capacitor at every node,
+    driven by a square wave at a corner
+    """
+    side = max(2, int(round(np.sqrt(nodes))))
+    c = Circuit()
+    c.add(GND(name='GND', gnd='GND'))
+    c.add(SquareWaveSource(name='V1', v_hi=1, v_lo=0, t_period=1,
+                           duty_cycle=50, pos='IN', neg='GND'))
+    c.add(Resistor(name='R_IN', r=10, pos='IN', neg='N0_0'))
+    for x in range(side):
+        for y in range(side):
+            node = 'N%d_%d' % (x, y)
+            if x + 1 < side:
+                c.add(Resistor(name='R%d_%d' % (x, y), r=50, pos=node,
+                               neg='N%d_%d' % (x + 1, y)))
+            if y + 1 < side:
+                if (x + y) % 2:
+                    c.add(Inductor(name='L%d_%d' % (x, y), l=10e-6,
+                                   pos=node, neg='N%d_%d' % (x, y + 1)))
+                else:
+                    c.add(Resistor(name='RV%d_%d' % (x, y), r=50, pos=node,
+                                   neg='N%d_%d' % (x, y + 1)))
+            grounded_capacitor(c, 'C%d_%d' % (x, y), 1e-9, node)
+    c.add(Voltmeter(name='V_IN', pos='N0_0', neg='GND',
+                    sample_interval=SAMPLE_INTERVAL))
+    c.add(Voltmeter(name='V_OUT', pos='N%d_%d' % (side - 1, side - 1),
+                    neg='GND', sample_interval=SAMPLE_INTERVAL))
+    return c
+
+
+def opamp_chain(nodes):
+    """Chain of inverting amplifiers with unity gain"""
+    stages = max(1, nodes // 2)
+    c = Circuit()
+    c.add(GND(name='GND', gnd='GND'))
+    c.add(SquareWaveSource(name='V1', v_hi=1, v_lo=0, t_period=1,
+                           duty_cycle=50, pos='OUT0', neg='GND'))
+    for k in range(1, stages + 1):
+        c.add(Resistor(name='RI%d' % k, r=100, pos='OUT%d' % (k - 1),
+                       neg='INV%d' % k))
+        c.add(Resistor(name='RF%d' % k, r=100, pos='INV%d' % k,
+                       neg='OUT%d' % k))
+        c.add(OperationalAmplifier(name='OP%d' % k, amp=1000, v_max=15,
+                                   v_min=-15, non_inv='GND',
+                                   inv='INV%d' % k, out='OUT%d' % k))
+    c.add(Voltmeter(name='V_1', pos='OUT1', neg='GND',
+                    sample_interval=SAMPLE_INTERVAL))
+    c.add(Voltmeter(name='V_OUT', pos='OUT%d' % stages, neg='GND',
+                    sample_interval=SAMPLE_INTERVAL))
+    return c
+
+
+# generators of synthetic circuits, key: name -> value: function of the
+# number of nodes
+SYNTHETIC = {'rc_ladder': rc_ladder,
+             'rlc_mesh': rlc_mesh,
+             'opamp_chain': opamp_chain}
+
+
+def build(case):
+    """
+    Returns (Circuit, float) - circuit of a benchmark case and its own
+            simulation time in usec (None for synthetic circuits)
+    case : tuple - ('script', path) or (synthetic generator name, nodes)
+    """
+    kind, argument = case
+    if kind == 'script':
+        return load_script(argument)
+    return SYNTHETIC[kind](argument), None
+
+
+def case_name(case):
+    kind, argument = case
+    if kind == 'script':
+        return os.path.splitext(os.path.basename(argument))[0]
+    return '%s_%d' % (kind, argument)
+
+
+def max_rss():
+    """Returns the peak resident memory of this process in bytes or None"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if platform.system() == 'Darwin' else rss * 1024
+
+
+def run_case(case, duration, kwargs):
+    """
+    Simulates a benchmark case, intended to run in a fresh process, so the
+    peak memory belongs to this run
+    duration : float - simulation time in usec, script circuits are
+                       simulated for their own time if it is shorter
+    kwargs : dict - arguments of Circuit.simulate()
+    Returns dict - metrics and the waveforms, key: instrument name ->
+            value: (times, values)
+    """
+    circuit, simulation_time = build(case)
+    if simulation_time is not None:
+        duration = min(duration, simulation_time)
+    baseline = max_rss()
+    start = time.perf_counter()
+    result = circuit.simulate(duration, progress=False, **kwargs)
+    wall_time = time.perf_counter() - start
+    return dict(junctions=len(circuit.junctions),
+                components=len(circuit.comp_list.components),
+                simulation_time=duration,
+                steps=len(result.time),
+                wall_time=wall_time,
+                steps_per_sec=len(result.time) / wall_time,
+                baseline_memory=baseline,
+                peak_memory=max_rss(),
+                waveforms={name: (result.times[name], result[name])
+                           for name in result.measurements})
+
+
+def max_error(waveforms, reference):
+    """
+    Returns the maximum absolute deviation of the waveforms from the
+    reference waveforms, interpolated to the reference sample times
+    """
+    errors = [np.max(np.abs(np.interp(reference[name][0], *waveforms[name]) -
+                            reference[name][1]), initial=0)
+              for name in reference
+              if name in waveforms and len(waveforms[name][0])]
+    return float(max(errors)) if errors else None
+
+
+def execute(job, processes):
+    if not processes:
+        return run_case(*job)
+    # a new process for every run, so the memory peaks are independent
+    with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(run_case, *job).result()
+
+
+def default_cases(sizes=SIZES, scripts=SCRIPTS):
+    return ([('script', path) for path in scripts] +
+            [(kind, n) for kind in SYNTHETIC for n in sizes])
+
+
+def run_benchmarks(cases=None, engines=ENGINES, duration=1.,
+                   max_nodes=MAX_NODES, reference=REFERENCE, processes=True,
+                   report=print):
+    """
+    Times the simulation of the benchmark cases with every engine
+    cases : list - ('script', path) or (synthetic generator name, nodes),
+                   default: examples, test circuits and synthetic circuits
+                   of every size
+    engines : dict - key: engine name -> value: arguments of
+                     Circuit.simulate()
+    duration : float - simulation time in usec
+    max_nodes : dict - key: engine name -> value: largest synthetic circuit
+                       simulated by the engine
+    reference : dict - arguments of Circuit.simulate() of the reference
+                       waveforms, None: errors are not computed
+    processes : bool - every run in a new process (peak memory per run)
+    report : function - called with a line of text after every run, or None
+    Returns dict - 'info': environment and settings, 'results': list of
+            dicts of the metrics of every case and engine
+    """
+    cases = default_cases() if cases is None else cases
+    results = []
+    for case in cases:
+        reference_waveforms = None
+        if reference is not None:
+            reference_waveforms = execute((case, duration, reference),
+                                          processes)['waveforms']
+        for engine, kwargs in engines.items():
+            if case[0] != 'script' and case[1] > max_nodes.get(engine,
+                                                               np.inf):
+                continue
+            metrics = execute((case, duration, kwargs), processes)
+            waveforms = metrics.pop('waveforms')
+            metrics.update(case=case_name(case), engine=engine,
+                           error=None if reference_waveforms is None else
+                           max_error(waveforms, reference_waveforms))
+            results.append(metrics)
+            if report is not None:
+                report(format_result(metrics))
+    info = dict(timestamp=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                python=platform.python_version(), numpy=np.__version__,
+                platform=platform.platform(), duration=duration,
+                engines=engines, reference=reference)
+    return dict(info=info, results=results)
+
+
+def format_result(r):
+    memory = ('%8.1f' % (r['peak_memory'] / 2 ** 20)
+              if r['peak_memory'] is not None else '       -')
+    error = '%10.3g' % r['error'] if r['error'] is not None else '         -'
+    return '%-36s %-7s %6d %9d %9.3f %12.0f %s MB %s' % (
+        r['case'], r['engine'], r['junctions'], r['steps'], r['wall_time'],
+        r['steps_per_sec'], memory, error)
+
+
+def compare(old, new):
+    """
+    Returns the lines of a comparison of two saved benchmark results:
+    steps/sec of both and their ratio for every case and engine
+    old, new : dict - results of run_benchmarks()
+    """
+    previous = {(r['case'], r['engine']): r for r in old['results']}
+    lines = []
+    for r in new['results']:
+        key = (r['case'], r['engine'])
+        if key in previous:
+            rate = previous[key]['steps_per_sec']
+            lines.append('%-36s %-7s %12.0f -> %12.0f steps/sec  x%.2f' % (
+                key + (rate, r['steps_per_sec'], r['steps_per_sec'] / rate)))
+    return lines
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        description='Times the simulation engines on the examples, the test '
+                    'circuits and synthetic netlists')
+    parser.add_argument('--output', default='benchmark.json',
+                        help='JSON file of the results')
+    parser.add_argument('--compare', help='JSON file of former results')
+    parser.add_argument('--duration', type=float, default=1.,
+                        help='simulation time in usec')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='number of nodes of the synthetic circuits')
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES),
+                        choices=list(ENGINES))
+    parser.add_argument('--no-scripts', action='store_true',
+                        help='only the synthetic circuits')
+    args = parser.parse_args(args)
+
+    print('%-36s %-7s %6s %9s %9s %12s %11s %10s' % (
+        'case', 'engine', 'junct.', 'steps', 'wall [s]', 'steps/sec',
+        'peak mem', 'error'))
+    benchmark = run_benchmarks(
+        default_cases(args.sizes, [] if args.no_scripts else SCRIPTS),
+        {name: ENGINES[name] for name in args.engines}, args.duration)
+    with open(args.output, 'w') as f:
+        json.dump(benchmark, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print('\n'.join(compare(json.load(f), benchmark)))
+
+
+if __name__ == '__main__':
+    main()
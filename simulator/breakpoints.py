@@ -0,0 +1,24 @@
+import numpy as np
+
+
+class BreakpointScheduler:
+    """
+    Collects the discontinuity times (breakpoints) of the sources, e.g. 
+    square wave edges, so time steps can land exactly on them
+    """
+    
+    def __init__(self, sources, t_stop):
+        """
+        sources : list - sources of the circuit
+        t_stop : float - end of the simulation in sec
+        """
+        breakpoints = [s.get_breakpoints(0, t_stop) for s in sources]
+        self.times = np.unique(np.concatenate([np.zeros(0)] + breakpoints))
+        
+    def next_after(self, time, tolerance=0):
+        """
+        Returns the first breakpoint after time + tolerance in sec, or 
+        infinity if there is none
+        """
+        k = np.searchsorted(self.times, time + tolerance, side='right')
+        return self.times[k] if k < len(self.times) else np.inf
@@ -0,0 +1,178 @@
+import json
+import os
+import time
+import numpy as np
+from .waveform_file import DTYPE
+
+
+class Checkpoint:
+    """
+    State of a transient simulation after a number of time steps: junction 
+    voltages and currents, internal state of the components and of the 
+    models of devices (see Component.STATE and Component.models()) and the 
+    measurement offsets of the instruments
+    """
+    
+    def __init__(self, step, time, junctions, components, instruments):
+        """
+        step : int - number of simulated time steps
+        time : float - time of the last simulated step in sec
+        junctions : numpy array - voltage and current of every junction, 
+                                  shape (2, junctions)
+        components : list - tuple of state values of every component
+        instruments : list - (step count, last interval, number of samples) 
+                             of every measuring instrument
+        """
+        self.step = step
+        self.time = time
+        self.junctions = junctions
+        self.components = components
+        self.instruments = instruments
+        
+    @classmethod
+    def capture(cls, step, time, circuit):
+        """Returns the checkpoint of the current state of a circuit"""
+        junctions = np.array([[j.v for j in circuit.junctions.values()],
+                              [j.i for j in circuit.junctions.values()]], 
+                             dtype=float).reshape(2, -1)
+        components = [tuple(getattr(c, name, 0) for name in c.STATE)
+                      for c in circuit.comp_list.components + 
+                      circuit.comp_list.submodels]
+        instruments = [(mi.step_count, mi.last_interval, len(mi.buffer))
+                       for mi in circuit.comp_list.measuring_instruments]
+        return cls(step, time, junctions, components, instruments)
+    
+    def restore(self, circuit):
+        """
+        Sets the state of a connected circuit (with the same topology) to the 
+        checkpoint and drops the measurements recorded after it
+        """
+        for j, v, i in zip(circuit.junctions.values(), *self.junctions):
+            j.v = float(v)
+            j.i = float(i)
+        comp_list = circuit.comp_list
+        for c, values in zip(comp_list.components + comp_list.submodels, 
+                             self.components):
+            for name, value in zip(c.STATE, values):
+                setattr(c, name, value)
+        for mi, (step_count, last_interval, length) in zip(
+                circuit.comp_list.measuring_instruments, self.instruments):
+            mi.step_count = step_count
+            mi.last_interval = last_interval
+            mi.buffer.truncate(length)
+    
+    def save(self, path, **info):
+        """
+        Writes the checkpoint into a binary NumPy .npz file, atomically
+        path : str - file path
+        **info : dict - JSON serializable data stored with the checkpoint
+        """
+        components = [np.asarray(values, dtype=float) 
+                      for values in self.components]
+        state = np.concatenate([np.zeros(0)] + components)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, step=self.step, time=self.time, 
+                     junctions=self.junctions, state=state,
+                     state_lengths=[len(values) for values in components],
+                     instruments=np.array(self.instruments, 
+                                          dtype=float).reshape(-1, 3),
+                     info=json.dumps(info))
+        os.replace(tmp, path)
+        
+    @classmethod
+    def load(cls, path):
+        """Returns (checkpoint, info) of a file written by save()"""
+        with np.load(path) as data:
+            offsets = np.cumsum(np.append(0, data['state_lengths']))
+            state = data['state']
+            components = [tuple(float(value) for value in state[a:b]) 
+                          for a, b in zip(offsets[:-1], offsets[1:])]
+            instruments = [(int(step_count), float(last_interval), 
+                            int(length)) 
+                           for step_count, last_interval, length 
+                           in data['instruments']]
+            checkpoint = cls(int(data['step']), float(data['time']), 
+                             data['junctions'], components, instruments)
+            return checkpoint, json.loads(str(data['info']))
+    
+    
+class Snapshot:
+    """
+    Periodic snapshots of a running transient in a directory, a simulation 
+    can be restarted from the latest one after it was interrupted, see 
+    Circuit.restart()
+    The state is a small .npz file replaced atomically, the measurements are
+    appended to raw float64 files, only the samples recorded since the 
+    previous snapshot are written. Snapshots are taken at most once in 
+    interval seconds of wall time.
+    """
+    
+    STATE_FILE = 'state.npz'
+    
+    def __init__(self, directory, interval, info, lengths=None):
+        """
+        directory : str - snapshot directory, created if it does not exist
+        interval : float - minimum wall time between snapshots in sec
+        info : dict - JSON serializable description of the run
+        lengths : list - number of samples of every instrument already in 
+                         the directory
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.interval = interval
+        self.info = info
+        self.lengths = lengths
+        self.last = time.perf_counter()
+        
+    def due(self):
+        """Returns whether interval sec elapsed since the last snapshot"""
+        return time.perf_counter() - self.last >= self.interval
+        
+    def sample_files(self, index):
+        return [os.path.join(self.directory, 'samples_%d_%s.bin' % (index, 
+                                                                    name))
+                for name in ('time', 'values')]
+        
+    def save(self, checkpoint, circuit):
+        """
+        Writes the checkpoint of the circuit and the new measurements
+        """
+        instruments = circuit.comp_list.measuring_instruments
+        if self.lengths is None:
+            self.lengths = [0] * len(instruments)
+        for k, mi in enumerate(instruments):
+            if mi.buffer.sink is not None:
+                # streamed measurements are already in the output files
+                mi.buffer.flush()
+                mi.buffer.sink.flush()
+                continue
+            samples = mi.buffer.get_samples(self.lengths[k])
+            for path, values in zip(self.sample_files(k), samples):
+                with open(path, 'r+b' if self.lengths[k] else 'wb') as f:
+                    # samples after a failed snapshot are overwritten
+                    f.seek(self.lengths[k] * np.dtype(DTYPE).itemsize)
+                    f.truncate()
+                    np.asarray(values, dtype=DTYPE).tofile(f)
+            self.lengths[k] += len(samples[0])
+        # the state is replaced last, so it never refers to missing samples
+        checkpoint.save(os.path.join(self.directory, self.STATE_FILE), 
+                        **self.info)
+        self.last = time.perf_counter()
+        
+    def load(self):
+        """
+        Returns (checkpoint, info, samples) of the latest snapshot, samples 
+        is the list of (times, values) of every instrument
+        """
+        checkpoint, info = Checkpoint.load(
+            os.path.join(self.directory, self.STATE_FILE))
+        samples = []
+        for k, (_, _, length) in enumerate(checkpoint.instruments):
+            paths = self.sample_files(k)
+            if info['output'] is not None or not os.path.exists(paths[0]):
+                samples.append((np.zeros(0), np.zeros(0)))
+                continue
+            samples.append(tuple(np.fromfile(path, dtype=DTYPE, count=length)
+                                 for path in paths))
+        return checkpoint, info, samples
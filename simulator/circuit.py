@@ -1,9 +1,20 @@
-import matplotlib.pyplot as plt
 import numpy as np
-from .component_list import ComponentList
+from .breakpoints import BreakpointScheduler
+from .checkpoint import Checkpoint, Snapshot
+from .component_list import ComponentList, DEVICE_PHASES
+from .jit_engine import JITEngine, jit_available
 from .junction import Junction
-from .misc import LoadingBar
-from .simulation_settings import DELTA_TIME
+from .misc import Progress, progress_callback
+from .mna import MNASolver
+from .netlist_cache import CompiledNetlist, netlist_cache, topology_key
+from .profiler import Profiler
+from .results import ACResult, SimulationResult
+from .simulation_settings import DELTA_TIME, MNA_TIME_STEP, RELTOL, ABSTOL
+from .simulation_settings import SNAPSHOT_INTERVAL, SNAPSHOT_CHECK_INTERVAL
+from .simulation_settings import STEP_CHUNK_SIZE, NUMPY_ENGINE_MIN_NODES
+from .stepping import TimeGrid, step_count
+from .vector_engine import VectorEngine
+from .waveform_file import WaveformWriter
 
 
 class Circuit:
@@ -11,6 +22,21 @@ class Circuit:
     
     def __init__(self):
         self.comp_list = ComponentList()
+        self.writer = None
+        self.netlist = None
+        self.checkpoints = []
+        self.last_run = None
+        self.snapshot = None
+        self.profiler = None
+        self.progress = progress_callback(True)
+    
+    def __getstate__(self):
+        # the open output files of a run are not pickled
+        state = self.__dict__.copy()
+        state['writer'] = None
+        # the step functions are built again when the circuit is connected
+        state.pop('step_functions', None)
+        return state
     
     def add(self, component):
         """
@@ -20,109 +46,491 @@ class Circuit:
         """
         self.comp_list.add(component)
      
-    def simulate(self, simulation_time):
+    def simulate(self, simulation_time, engine='object', plot=False, 
+                 profile=False, **kwargs):
+        """
+        Starts simlation and returns the measurement results
+        simulation_time : float - simulation time length in usec
+        engine : str - 'object', 'numpy', 'jit', 'mna' or 'auto', see run()
+        plot : bool - plots the measurement results
+        profile : bool - measures the wall time of the simulation phases and 
+                         component classes, prints the summary table and 
+                         stores its dict in the profile of the result
+        **kwargs : dict - engine specific arguments, see run()
+        Returns SimulationResult
+        """
+        time = self.run(simulation_time, engine, profile=profile, **kwargs)
+        result = SimulationResult(time, self.comp_list.measuring_instruments)
+        if profile:
+            result.profile = self.profiler.summary()
+            print(self.profiler.table())
+        if plot:
+            result.plot()
+        return result
+        
+    def run(self, simulation_time, engine='object', time_step=None,
+            method='trapezoidal', adaptive=False, max_step=None,
+            reltol=RELTOL, abstol=ABSTOL, backend='auto', output=None, 
+            operating_point=False, checkpoint_interval=None, snapshot=None,
+            snapshot_interval=SNAPSHOT_INTERVAL, profile=False, 
+            progress=True):
         """
-        Starts simlation and plots measuremnt results
+        Runs the simulation and records the measurements without plotting
         simulation_time : float - simulation time length in usec
+        engine : str - 'object': every component steps itself (reference), 
+                                 the fastest explicit engine without numba 
+                                 for circuits below NUMPY_ENGINE_MIN_NODES 
+                                 junctions
+                       'numpy': vectorized engine compiled from the netlist, 
+                                faster than 'object' only for large circuits 
+                                (about 1000 junctions and more), about 15x 
+                                slower for small ones
+                       'auto': 'numpy' from NUMPY_ENGINE_MIN_NODES junctions, 
+                               else 'object'
+                       'jit': the steps of the 'numpy' engine compiled by 
+                              numba into one loop, falls back to 'numpy' if 
+                              numba is not installed
+                       'mna': modified nodal analysis with implicit 
+                              integration, allows much larger time steps
+        time_step : float - time step of the 'mna' engine in usec
+        method : str - integration method of the 'mna' engine, 
+                       'trapezoidal' or 'backward_euler'
+        adaptive : bool - adaptive time step control of the 'mna' engine, 
+                          time_step is the minimum time step then
+        max_step : float - maximum adaptive time step in usec, 
+                           default is 1/50 of the simulation time
+        reltol : float - relative tolerance of the adaptive time step
+        abstol : float - absolute tolerance (V) of the adaptive time step
+        backend : str - system matrix of the 'mna' engine, 'dense', 'sparse' 
+                        (requires SciPy) or 'auto': sparse for large circuits
+        output : str - optional directory, measurements are streamed into 
+                       it in chunks instead of kept in memory, see 
+                       waveform_file.load_waveforms()
+        operating_point : bool - the simulation starts from the DC operating 
+                                 point instead of zero voltages and currents
+        checkpoint_interval : float - the state of the explicit ('object', 
+                                      'numpy', 'jit') engines is saved in checkpoints at this 
+                                      interval in usec, see resimulate()
+        snapshot : str - optional directory, the state of the explicit 
+                         engines and the measurements are saved in 
+                         it periodically, see restart()
+        snapshot_interval : float - minimum wall time between snapshots in 
+                                    sec
+        profile : bool - the wall time of the phases of the run and the 
+                         solver statistics are collected in the profiler
+        progress : bool or function - True: progress bar on stdout, False: 
+                                      no progress reports, function: called 
+                                      with the progress dict (steps/sec, 
+                                      ETA), see misc.Progress
+        Returns numpy array - time points of the simulation steps in sec
         """
+        if engine not in ('object', 'numpy', 'jit', 'mna', 'auto'):
+            raise ValueError('unknown simulation engine: ' + str(engine))
+        if engine == 'auto':
+            engine = self.select_engine()
+        if engine == 'mna' and (checkpoint_interval is not None or 
+                                snapshot is not None):
+            raise ValueError('checkpoints are not supported by the mna engine')
+            
+        self.profiler = Profiler(engine) if profile else None
+        self.progress = progress_callback(progress)
         self.connect_circuit()
-        self.init_measuring_instruments()
+        if operating_point:
+            self.set_operating_point()
+        self.writer = None
+        if output is not None:
+            self.writer = WaveformWriter(output, 
+                                         self.comp_list.measuring_instruments)
+        self.checkpoints = []
+        self.last_run = dict(simulation_time=simulation_time, engine=engine, 
+                             checkpoint_interval=checkpoint_interval, 
+                             output=output, snapshot_interval=snapshot_interval)
+        self.snapshot = None
+        if snapshot is not None:
+            self.snapshot = Snapshot(snapshot, snapshot_interval, 
+                                     dict(self.last_run, 
+                                          topology=self.netlist.key))
+        try:
+            if engine == 'mna':
+                time = self.run_mna(simulation_time, time_step, method, 
+                                    adaptive, max_step, reltol, abstol, 
+                                    backend)
+            else:
+                time = self.run_explicit(simulation_time, engine, 
+                                         checkpoint_interval)
+        finally:
+            self.close_run()
+        if self.profiler is not None:
+            self.profiler.stop()
+        return time
+            
+    def select_engine(self):
+        """
+        Returns str - the faster explicit engine for the size of the circuit, 
+        'numpy' from NUMPY_ENGINE_MIN_NODES junctions, else 'object'
+        """
+        if len(self.comp_list.junction_index) >= NUMPY_ENGINE_MIN_NODES:
+            return 'numpy'
+        return 'object'
+            
+    def close_run(self):
+        # stores the compiled engine arrays
+        netlist_cache.put(self.netlist)
+        if self.writer is not None:
+            for mi in self.comp_list.measuring_instruments:
+                mi.buffer.flush()
+            self.writer.close()
+    
+    def run_explicit(self, simulation_time, engine, checkpoint_interval=None,
+                     start=0):
+        """
+        Transient analysis with DELTA_TIME steps and explicit updates
+        start : int - index of the first simulated step, the former steps 
+                      are restored from a checkpoint
+        """
+        time = TimeGrid.of_duration(simulation_time)
+        if start == 0:
+            self.init_measuring_instruments(len(time), DELTA_TIME)
+        progress = Progress(len(time) - start, 'Simulation', self.progress)
         
-        time = np.arange(simulation_time * 1e-6, step=DELTA_TIME) 
-        lb = LoadingBar(len(time), 'Simulation')
-        for t in time:
-            self.simulation_step(t)
-            lb()
+        steps = None
+        interval = checkpoint_interval
+        if interval is None and self.snapshot is not None:
+            interval = SNAPSHOT_CHECK_INTERVAL
+        if interval is not None:
+            steps = max(1, int(round(interval * 1e-6 / DELTA_TIME)))
+            
+        def checkpoint(k):
+            state = Checkpoint.capture(start + k, time[start + k - 1], self)
+            if checkpoint_interval is not None:
+                self.checkpoints.append(state)
+            if self.snapshot is not None and self.snapshot.due():
+                self.snapshot.save(state, self)
             
-        self.plot_measurements(time)
+        if engine in ('numpy', 'jit'):
+            if engine == 'jit' and jit_available():
+                vector_engine = JITEngine(self.comp_list, self.junctions, 
+                                          netlist=self.netlist)
+            else:
+                vector_engine = VectorEngine(self.comp_list, self.junctions, 
+                                             netlist=self.netlist)
+            if self.profiler is not None:
+                vector_engine.profile(self.profiler)
+            vector_engine.run(time.steps(start), progress, 
+                              checkpoint if steps else None, steps)
+        else:
+            simulation_step = (self.simulation_step if self.profiler is None 
+                               else self.profiled_simulation_step)
+            waveform_sources = [s for s in self.comp_list.sources 
+                                if s.TIME_DEPENDENT]
+            try:
+                for _, stop, times in time.steps(start).chunks(
+                        STEP_CHUNK_SIZE, steps):
+                    # source outputs of the chunk are computed at once
+                    for s in waveform_sources:
+                        s.prepare(times)
+                    # python floats are faster to step with than numpy scalars
+                    for t in times.tolist():
+                        simulation_step(t)
+                    progress(stop)
+                    if steps and stop % steps == 0:
+                        checkpoint(stop)
+            finally:
+                for s in waveform_sources:
+                    s.release()
+        progress.finish()
+        if self.profiler is not None:
+            self.profiler.solver['steps'] += len(time) - start
+        return time
+    
+    def resimulate(self, from_time, plot=False):
+        """
+        Repeats the last explicit engine simulation from its latest 
+        checkpoint at or before from_time, with the current component values. 
+        The measurements before the checkpoint are kept, so the cost is 
+        proportional to the re-simulated window. The topology must be 
+        unchanged, component values changed since the run take effect at 
+        the checkpoint.
+        from_time : float - time in usec from which the changes are simulated
+        plot : bool - plots the measurement results
+        Returns SimulationResult
+        """
+        if self.last_run is None or not self.checkpoints:
+            raise ValueError('the last simulation has no checkpoints')
+        if self.last_run['output'] is not None:
+            raise ValueError('measurements streamed to an output can not be '
+                             'resimulated')
+        if topology_key(self.comp_list) != self.netlist.key:
+            raise ValueError('the topology changed since the last simulation')
+            
+        valid = [c for c in self.checkpoints if c.time <= from_time * 1e-6]
+        if not valid:
+            raise ValueError('no checkpoint before ' + str(from_time) + 
+                             ' usec')
+        # the later checkpoints are simulated again
+        self.checkpoints = valid
+        self.snapshot = None
+        self.profiler = None
+        self.connect_circuit()
+        valid[-1].restore(self)
+        time = self.run_explicit(self.last_run['simulation_time'], 
+                                 self.last_run['engine'], 
+                                 self.last_run['checkpoint_interval'], 
+                                 valid[-1].step)
+        result = SimulationResult(time, self.comp_list.measuring_instruments)
+        if plot:
+            result.plot()
+        return result
+    
+    def restart(self, snapshot, plot=False):
+        """
+        Continues an interrupted explicit engine simulation from the 
+        latest snapshot in a directory written by run(..., snapshot=...). 
+        The circuit must have the same topology and component values, the 
+        results are identical to an uninterrupted run.
+        snapshot : str - snapshot directory
+        plot : bool - plots the measurement results
+        Returns SimulationResult
+        """
+        self.profiler = None
+        self.snapshot = Snapshot(snapshot, None, None)
+        checkpoint, info, samples = self.snapshot.load()
+        if info.pop('topology') != topology_key(self.comp_list):
+            raise ValueError('the topology differs from the snapshot')
+        self.snapshot.interval = info['snapshot_interval']
+        self.snapshot.info = dict(info, topology=topology_key(self.comp_list))
+        self.snapshot.lengths = [length for _, _, length 
+                                 in checkpoint.instruments]
+        
+        self.connect_circuit()
+        self.writer = None
+        if info['output'] is not None:
+            self.writer = WaveformWriter(info['output'], 
+                                         self.comp_list.measuring_instruments,
+                                         self.snapshot.lengths)
+        self.checkpoints = []
+        self.last_run = info
+        try:
+            self.init_measuring_instruments(
+                step_count(info['simulation_time']), DELTA_TIME)
+            for mi, (times, values) in zip(
+                    self.comp_list.measuring_instruments, samples):
+                mi.buffer.extend(times, values)
+            checkpoint.restore(self)
+            time = self.run_explicit(info['simulation_time'], info['engine'],
+                                     info['checkpoint_interval'], 
+                                     checkpoint.step)
+        finally:
+            self.close_run()
+        result = SimulationResult(time, self.comp_list.measuring_instruments)
+        if plot:
+            result.plot()
+        return result
+    
+    def run_mna(self, simulation_time, time_step, method, adaptive, max_step,
+                reltol, abstol, backend):
+        """Fixed or adaptive step transient analysis with the MNA solver"""
+        h = MNA_TIME_STEP if time_step is None else time_step * 1e-6
+        self.init_measuring_instruments(
+            None if adaptive else int(round(simulation_time * 1e-6 / h)))
+        self.breakpoints = BreakpointScheduler(self.comp_list.sources, 
+                                               simulation_time * 1e-6)
+        solver = MNASolver(self.comp_list, self.junctions, method, backend,
+                           netlist=self.netlist)
+        if self.profiler is not None:
+            solver.profile(self.profiler)
+        progress = Progress(simulation_time, 'Simulation', self.progress, 
+                            unit='usec')
+        if adaptive:
+            h_max = (simulation_time / 50 if max_step is None else max_step)
+            time = solver.run_adaptive(simulation_time * 1e-6, h, 
+                                       h_max * 1e-6, reltol, abstol,
+                                       self.breakpoints, progress)
+        else:
+            time = solver.run(simulation_time * 1e-6, h, self.breakpoints, 
+                              progress)
+        progress.finish()
+        if self.profiler is not None:
+            self.profiler.solver.update(
+                steps=solver.steps, rejected_steps=solver.rejected_steps,
+                factorizations=solver.factorization_count,
+                clamp_iterations=solver.clamp_iterations)
+        return time
+        
+    def op(self):
+        """
+        DC operating point analysis: capacitors are open, inductors are 
+        shorts and sources have their values at t = 0. The capacitor voltages, 
+        inductor currents, op-amp outputs and junction voltages are set to 
+        the operating point.
+        Returns dict - key: junction name -> value: voltage
+        """
+        self.connect_circuit()
+        self.set_operating_point()
+        return {name: float(j.v) for name, j in self.junctions.items()}
+    
+    def ac(self, f_start, f_stop, points, scale='log', plot=False):
+        """
+        AC small-signal analysis around the DC operating point
+        Every ACVoltageSource is an excitation with its v_rms amplitude, other 
+        sources are bias only. Op-amps are linear gain blocks (or fixed 
+        outputs, if saturated at the operating point). The frequencies are 
+        solved in vectorized blocks of AC_BLOCK_SIZE frequencies.
+        f_start : float - start frequency in Hz, positive (at 0 Hz the 
+                          inductor admittances are infinite)
+        f_stop : float - stop frequency in Hz, not lower than f_start
+        points : int - number of frequencies
+        scale : str - 'log' or 'linear' spacing of the frequencies
+        plot : bool - Bode plot of the results
+        Returns ACResult
+        """
+        if not 0 < f_start <= f_stop:
+            raise ValueError('frequencies must satisfy 0 < f_start <= f_stop')
+        if scale == 'log':
+            frequencies = np.logspace(np.log10(f_start), np.log10(f_stop), 
+                                      points)
+        elif scale == 'linear':
+            frequencies = np.linspace(f_start, f_stop, points)
+        else:
+            raise ValueError('unknown frequency scale: ' + str(scale))
+            
+        self.connect_circuit()
+        solver = MNASolver(self.comp_list, self.junctions, 
+                           netlist=self.netlist)
+        netlist_cache.put(self.netlist)
+        x = solver.small_signal(frequencies)
+        voltages = {name: x[:, solver.index[name]] for name in self.junctions}
+        
+        measurements = {}
+        measurement_types = {}
+        for mi in self.comp_list.measuring_instruments:
+            mi.set_measured_component(self.comp_list)
+            measurements[mi.name] = mi.measure_ac(voltages, frequencies)
+            measurement_types[mi.name] = mi.measurement_type
+        result = ACResult(frequencies, measurements, measurement_types)
+        if plot:
+            result.plot()
+        return result
+    
+    def set_operating_point(self):
+        """Sets the state of the connected circuit to the operating point"""
+        solver = MNASolver(self.comp_list, self.junctions, 
+                           netlist=self.netlist)
+        netlist_cache.put(self.netlist)
+        solver.operating_point()
+        solver.update_components()
         
     def connect_circuit(self):
-        """Initialize junctions and connects components to junctions"""
+        """
+        Initialize junctions and connects components to junctions
+        The compiled netlist of the topology is taken from the netlist cache. 
+        If the topology is unchanged since the last connection, only the 
+        junctions are reset.
+        """
+        key = topology_key(self.comp_list)
+        if self.netlist is not None and self.netlist.key == key:
+            for junction in self.junctions.values():
+                junction.v = 0
+                junction.i = 0
+            self.build_steps()
+            return
         
-        self.junctions = {}        
-        for component in self.comp_list.components:
-            for junction_name in component.get_junction_names():
-                if not junction_name in self.junctions:
-                    self.junctions[junction_name] = Junction(junction_name)                    
+        self.netlist = netlist_cache.get(key)
+        if self.netlist is not None:
+            self.junctions = {name: Junction(name) 
+                              for name in self.netlist.junction_names}
+        else:
+            self.junctions = {name: Junction(name) 
+                              for name in self.comp_list.junction_index}
+            self.netlist = CompiledNetlist(key, list(self.junctions))
+            netlist_cache.put(self.netlist)
         
         for component in self.comp_list.components:
             component.connect(self.junctions)
+        self.build_steps()
             
-    def init_measuring_instruments(self):                
-        for mi in self.comp_list.measuring_instruments:
-            mi.set_measured_component(self.comp_list.components)                
+    def init_measuring_instruments(self, steps=None, time_step=None):                
+        """
+        Binds instruments to the measured components and clears their 
+        measurements
+        steps : int - number of simulation steps, if it is known
+        time_step : float - DELTA_TIME for the uniform steps of the explicit 
+                            engines, the sample times are computed instead 
+                            of stored
+        """
+        for k, mi in enumerate(self.comp_list.measuring_instruments):
+            mi.set_measured_component(self.comp_list)                
+            sink = None if self.writer is None else self.writer.channels[k]
+            mi.init_measurements(steps, sink, time_step)
                     
+    def build_steps(self):
+        """
+        Prebuilds the step functions of the connected components in the 
+        order of simulation_step(), their pins are bound at connect time
+        """
+        comp_list = self.comp_list
+        self.step_functions = (
+            list(self.junctions.values()),
+            [s.make_step() for s in comp_list.sources],
+            [c.make_step() for phase in DEVICE_PHASES 
+             for c in comp_list.phases[phase]],
+            [mi.simulation_step for mi in comp_list.measuring_instruments],
+            [c.reset_current for c in comp_list.sources + comp_list.amplifiers],
+            [j.simulation_step for j in self.junctions.values()])
+    
     def simulation_step(self, time):
         """
         Single step of simulation. All components modify its' internal 
         values and effect their connected junctions
         """
+        (junctions, sources, components, instruments, resets, 
+         junction_steps) = self.step_functions
+        
         # reset junction currents to zero
-        for j in self.junctions.values():
-            j.reset_current()
+        for j in junctions:
+            j.i = 0
         
         # voltage sources set voltages, current sources set currents
-        for s in self.comp_list.sources:
-            s.simulation_step(time)
+        for step in sources:
+            step(time)
          
-        # amplifier sources set voltages
-        for a in self.comp_list.amplifiers:
-            a.simulation_step()
-          
-        # resistors set junction currents
-        for r in self.comp_list.resistors:
-            r.simulation_step() 
-            
-        # set inductor currents according to junction voltages
-        for i in self.comp_list.inductors:
-            i.simulation_step()  
-            
-        # set capacitor voltages according to junction currents
-        for c in self.comp_list.capacitors:
-            c.simulation_step()  
+        # amplifier sources set voltages, resistors set junction currents, 
+        # inductors set their currents according to junction voltages, then 
+        # capacitors set their voltages according to junction currents
+        for step in components:
+            step()
         
         # measurements recorded
-        for mi in self.comp_list.measuring_instruments:
-            mi.simulation_step()
+        for step in instruments:
+            step(time)
          
-        # voltage sources provide the current difference of junctions
-        for s in self.comp_list.sources:
-            s.reset_current()
-          
-        # amplifiers' output provide the current difference of junctions
-        for a in self.comp_list.amplifiers:
-            a.reset_current()
+        # voltage sources and amplifiers' output provide the current 
+        # difference of junctions
+        for reset in resets:
+            reset()
             
         # set junction voltages according to current
-        for junction in self.junctions.values():
-            junction.simulation_step()
+        for step in junction_steps:
+            step()
         
-    def plot_measurements(self, time):
-        """Plots voltage and current measurement results"""
-        
-        time = np.divide(time, 1e-6)
-        # plt.figure(dpi=300) # for high resolution graphs
-        
-        plt.subplot(2, 1, 1)
-        plt.title('Measurements')
-        plt.xlabel('time [usec]')
-        plt.ylabel('voltage [V]')
-        for mi in self.comp_list.measuring_instruments:
-            if mi.measurement_type == 'V':        
-                plt.plot(time, mi.get_measurements(), label=mi.name)
-        plt.legend()
-        
-        plt.subplot(2, 1, 2)
-        plt.xlabel('time [usec]')
-        plt.ylabel('current [A]')
-        for mi in self.comp_list.measuring_instruments:
-            if mi.measurement_type == 'I':
-                plt.plot(time, mi.get_measurements(), label=mi.name)
-        plt.legend()
-        plt.gcf().align_ylabels()               
-        
-        plt.show()   
-
+    def profiled_simulation_step(self, time):
+        """
+        simulation_step() which adds the wall time of every phase and 
+        component class to the profiler
+        """
+        profiler = self.profiler
+        junctions = self.junctions.values()
+        comp_list = self.comp_list
+        profiler.call('junctions', junctions, 'reset_current')
+        profiler.call('sources', comp_list.sources, 'simulation_step', time)
+        for phase in DEVICE_PHASES:
+            profiler.call(phase, comp_list.phases[phase], 'simulation_step')
+        profiler.call('measurements', comp_list.measuring_instruments, 
+                      'simulation_step', time)
+        profiler.call('sources', comp_list.sources, 'reset_current')
+        profiler.call('amplifiers', comp_list.amplifiers, 'reset_current')
+        profiler.call('junctions', junctions, 'simulation_step')
         
-                
-            
\ No newline at end of file
+    def plot_measurements(self):
+        """Plots voltage and current measurement results"""
+        SimulationResult(None, self.comp_list.measuring_instruments).plot()
@@ -1,45 +1,127 @@
-from .components import (Component, Resistor, Capacitor, Inductor, 
+from .components import (Component, Resistor, Capacitor, Inductor,
                         OperationalAmplifier)
-from .measurement import MeasuringInstrument
-from .sources import Source
+
+
+# stepping phases in the order of a simulation step, every component class
+# declares its phase in the PHASE class attribute, subclasses inherit it
+PHASES = ('sources', 'amplifiers', 'resistors', 'inductors', 'capacitors',
+          'measuring_instruments')
+
+# phases whose components are stepped without arguments, between the sources
+# and the measuring instruments
+DEVICE_PHASES = ('amplifiers', 'resistors', 'inductors', 'capacitors')
+
+# models of the device phases which the compiled engines ('numpy', 'jit',
+# 'mna') implement as vectorized operations or MNA stamps
+PHASE_MODELS = {'amplifiers': OperationalAmplifier, 'resistors': Resistor,
+                'inductors': Inductor, 'capacitors': Capacitor}
+
+
+def check_models(comp_list, engine):
+    """
+    Raises ValueError if a component of a device phase is not an instance of
+    the model of its phase, which the compiled engines implement, new device 
+    types are supported by building them from models, see Component.models()
+    comp_list : ComponentList - components of the circuit
+    engine : str - name of the engine, used in the error message
+    """
+    for phase, model in PHASE_MODELS.items():
+        for component in comp_list.phases[phase]:
+            if not isinstance(component, model):
+                raise ValueError(type(component).__name__ + ' ' +
+                                 component.name + ' is not supported by ' +
+                                 engine)
 
 
 class ComponentList:
     """Sorting and handling different types of component"""
-    
+
     def __init__(self):
         self.components = []
-        self.sources = []
-        self.measuring_instruments = []
-        self.resistors = []
-        self.capacitors = []
-        self.inductors = []
-        self.amplifiers = []
-        
+        # key: name -> value: component, of the components with pins
+        self.names = {}
+        # key: name -> value: measuring instrument
+        self.instrument_names = {}
+        # key: junction name -> value: list of the components connected to it
+        self.junction_index = {}
+        # models of the devices made of models, see Component.models()
+        self.submodels = []
+        # key: phase -> value: list of the components stepped in the phase
+        self.phases = {phase: [] for phase in PHASES}
+        self.sources = self.phases['sources']
+        self.measuring_instruments = self.phases['measuring_instruments']
+        self.resistors = self.phases['resistors']
+        self.capacitors = self.phases['capacitors']
+        self.inductors = self.phases['inductors']
+        self.amplifiers = self.phases['amplifiers']
+
     def add(self, component):
         """
-        Adds the component, source or measuring instrument into the 
-        appropriate list
+        Adds the component, source or measuring instrument into the
+        appropriate list, selected by the PHASE of its class
+        A device made of models (see Component.models()) is indexed by its 
+        name and junctions, and its models are added to their phases.
         component : child class of Component, Source or MeasuringInstrument
         """
-        if Component in component.__class__.__bases__:
+        is_component = isinstance(component, Component)
+        models = component.models() if is_component else [component]
+        for model in models:
+            if getattr(model, 'PHASE', None) not in self.phases:
+                raise ValueError(type(model).__name__ +
+                                 ' has no stepping phase (PHASE)')
+
+        # components and measuring instruments have separate name spaces, a
+        # voltmeter is in both
+        is_instrument = (getattr(component, 'PHASE', None) == 
+                         'measuring_instruments')
+        if ((is_component and component.name in self.names) or
+                (is_instrument and component.name in self.instrument_names)):
+            raise ValueError('duplicate name: ' + str(component.name))
+
+        # every component with pins, also voltmeters
+        if is_component:
             self.components.append(component)
-            
-        if Source in component.__class__.__bases__:
-            self.sources.append(component)
-            
-        if MeasuringInstrument in component.__class__.__bases__:
-            self.measuring_instruments.append(component)
-            
-        if Resistor is component.__class__:
-            self.resistors.append(component)
-        
-        if Capacitor is component.__class__:
-            self.capacitors.append(component)
-            
-        if Inductor is component.__class__:
-            self.inductors.append(component)
-            
-        if OperationalAmplifier is component.__class__:
-            self.amplifiers.append(component)
-            
\ No newline at end of file
+            self.names[component.name] = component
+            # internal junctions of a device are attached to the device
+            parts = [component] + [m for m in models if m is not component]
+            junction_names = [name for part in parts
+                              for name in part.get_junction_names()]
+            for junction_name in junction_names:
+                attached = self.junction_index.setdefault(junction_name, [])
+                # the junctions of a component are indexed one after the other
+                if not attached or attached[-1] is not component:
+                    attached.append(component)
+        if is_instrument:
+            self.instrument_names[component.name] = component
+        for model in models:
+            self.phases[model.PHASE].append(model)
+            if model is not component:
+                self.submodels.append(model)
+
+    def get(self, name):
+        """
+        Returns the component (with pins) of the given name
+        name : str - name of the component
+        """
+        try:
+            return self.names[name]
+        except KeyError:
+            raise ValueError('unknown component: ' + str(name)) from None
+
+    def attached(self, junction_name):
+        """
+        Returns list - components connected to the junction, in the order 
+        they were added
+        junction_name : str - name of the junction
+        """
+        return list(self.junction_index.get(junction_name, ()))
+
+    def between(self, junction_a, junction_b):
+        """
+        Returns list - components connected to both junctions, the branches 
+        between them
+        junction_a : str - name of a junction
+        junction_b : str - name of the other junction
+        """
+        return [c for c in self.junction_index.get(junction_a, ())
+                if junction_b in c.get_junction_names()]
@@ -1,8 +1,31 @@
-from .simulation_settings import DELTA_TIME, AMP_MAX_DELTA_V
+import numpy as np
+from .simulation_settings import DELTA_TIME, AMP_SLEW_RATE
+
+
+def slot_state(obj):
+    """Returns dict - values of the assigned __slots__ attributes of obj"""
+    state = {}
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(obj, name):
+                state[name] = getattr(obj, name)
+    return state
 
 
 class Component:
-    """General model of an electrical component"""    
+    """
+    General model of an electrical component
+    Components store their parameters, state and pins (the connected 
+    Junction classes, named after the pins) in __slots__, which are faster to 
+    access and smaller than a __dict__.
+    Child classes declare their stepping phase in the PHASE class attribute, 
+    see component_list.PHASES.
+    """    
+    
+    __slots__ = ('name', 'junction_names')
+    
+    # attributes of the internal state, saved in checkpoints
+    STATE = ()
     
     def __init__(self, name, **junction_names):
         """
@@ -23,11 +46,40 @@ class Component:
         junctions: dict - key: junction name -> value: Junction class
         """
         for pin, junction_name in self.junction_names.items():
-            self.__dict__[pin] = junctions[junction_name]
+            setattr(self, pin, junctions[junction_name])
+        for model in self.models():
+            if model is not self:
+                model.connect(junctions)
+            
+    def models(self):
+        """
+        Returns list - the phase models (Resistor, Capacitor, Inductor, 
+        OperationalAmplifier or source instances) which simulate the 
+        component on every engine, by default the component itself
+        A device made of models creates them once, with the junctions of the 
+        device or internal junctions, and returns the same objects in every 
+        call. The engines step, compile and stamp the models in place of the 
+        device, its state is the state of its models.
+        """
+        return [self]
+            
+    def make_step(self):
+        """
+        Returns the function of a simulation step, built when the component 
+        is connected. Child classes bind their pins to closure variables, so 
+        the steps don't look them up.
+        """
+        return self.simulation_step
     
 
 class Resistor(Component):
     
+    __slots__ = ('r', 'i', 'pos', 'neg')
+    
+    PHASE = 'resistors'
+    
+    STATE = ('i',)
+    
     def __init__(self, name, r, pos, neg):
         """
         name : str - name of resistor
@@ -42,10 +94,30 @@ class Resistor(Component):
         self.i = (self.pos.v - self.neg.v) / self.r
         self.pos.add_current(self.i)
         self.neg.add_current(-self.i) 
+        
+    def make_step(self):
+        pos, neg = self.pos, self.neg
+        
+        def step():
+            i = (pos.v - neg.v) / self.r
+            self.i = i
+            pos.i += i
+            neg.i += -i
+        return step
+        
+    def get_admittance(self, frequencies):
+        """Returns the complex admittance at the frequencies in Hz"""
+        return np.full(np.shape(frequencies), 1 / self.r, dtype=complex)
 
         
 class Capacitor(Component):
     
+    __slots__ = ('c', 'v', 'pos', 'neg')
+    
+    PHASE = 'capacitors'
+    
+    STATE = ('v',)
+    
     def __init__(self, name, c, pos, neg):
         """
         name : str - name of capacitor
@@ -71,10 +143,31 @@ class Capacitor(Component):
         # reset junction currents to zero
         self.pos.reset_current()
         self.neg.reset_current()        
+        
+    def make_step(self):
+        pos, neg = self.pos, self.neg
+        
+        def step():
+            self.v += -(pos.i - neg.i) * DELTA_TIME / self.c
+            pos.v = neg.v + self.v
+            # reset junction currents to zero
+            pos.i = 0
+            neg.i = 0
+        return step
+        
+    def get_admittance(self, frequencies):
+        """Returns the complex admittance at the frequencies in Hz"""
+        return 2j * np.pi * np.asarray(frequencies) * self.c
 
 
 class Inductor(Component):
 
+    __slots__ = ('l', 'i', 'pos', 'neg')
+    
+    PHASE = 'inductors'
+    
+    STATE = ('i',)
+    
     def __init__(self, name, l, pos, neg):
         """
         name : str - name of inductor
@@ -99,10 +192,31 @@ class Inductor(Component):
         self.pos.add_current(self.i)
         self.neg.add_current(-self.i) 
         
+    def make_step(self):
+        pos, neg = self.pos, self.neg
+        
+        def step():
+            self.i += (pos.v - neg.v) * DELTA_TIME / self.l
+            pos.i += self.i
+            neg.i += -self.i
+        return step
+        
+    def get_admittance(self, frequencies):
+        """Returns the complex admittance at the frequencies in Hz"""
+        return 1 / (2j * np.pi * np.asarray(frequencies) * self.l)
+        
 
 class OperationalAmplifier(Component):
+    
+    __slots__ = ('amp', 'v_max', 'v_min', 'slew_rate', 'v_out', 'non_inv', 
+                 'inv', 'out')
+    
+    PHASE = 'amplifiers'
+    
+    STATE = ('v_out',)
         
-    def __init__(self, name, amp, v_max, v_min, non_inv, inv, out):
+    def __init__(self, name, amp, v_max, v_min, non_inv, inv, out, 
+                 slew_rate=AMP_SLEW_RATE):
         """
         name : str - name of operational amplifier
         amp : float - amplification factor
@@ -111,37 +225,44 @@ class OperationalAmplifier(Component):
         non_inv : str - junction connected to non-inverting input pin
         inv : str - junction connected to inverting input pin
         out : str - junction connected to output
+        slew_rate : float - max output voltage change speed in V/usec
         """
         Component.__init__(self, name, inv=inv, non_inv=non_inv, out=out)
         self.amp = amp
         self.v_max = v_max
         self.v_min = v_min
+        self.slew_rate = slew_rate
         self.v_out = 0
         
     def simulation_step(self):
         """
         Amplifier outputs voltage according to the following equatation:
         V_out = A * (V+ - V-)
+        The output is piecewise: linear, slewing with slew_rate or saturated
+        at v_max or v_min
         """  
         v_out_next = (self.amp * (self.non_inv.v - self.inv.v))
         
-        # limit output voltage change speed
-        if abs(v_out_next - self.v_out) > AMP_MAX_DELTA_V:
-            if v_out_next > self.v_out:
-                self.v_out += AMP_MAX_DELTA_V
-            else:
-                self.v_out -= AMP_MAX_DELTA_V
-        else:
-            self.v_out = v_out_next
-        
-        # limit output voltage between v_max and v_min
-        if self.v_out > self.v_max:
-            self.v_out = self.v_max
-        if self.v_out < self.v_min:
-            self.v_out = self.v_min
+        # limit output voltage change speed, then between v_max and v_min
+        max_delta_v = self.slew_rate * 1e6 * DELTA_TIME
+        v_out = min(max(v_out_next, self.v_out - max_delta_v), 
+                    self.v_out + max_delta_v)
+        self.v_out = min(max(v_out, self.v_min), self.v_max)
             
         self.out.set_voltage(self.v_out)
         
+    def make_step(self):
+        non_inv, inv, out = self.non_inv, self.inv, self.out
+        
+        def step():
+            v_out_next = self.amp * (non_inv.v - inv.v)
+            max_delta_v = self.slew_rate * 1e6 * DELTA_TIME
+            v_out = min(max(v_out_next, self.v_out - max_delta_v), 
+                        self.v_out + max_delta_v)
+            self.v_out = min(max(v_out, self.v_min), self.v_max)
+            out.v = self.v_out
+        return step
+        
     def reset_current(self):
         self.out.reset_current()
         
@@ -0,0 +1,137 @@
+import numpy as np
+from .simulation_settings import DELTA_TIME, C_JUNCTION
+from .vector_engine import VectorEngine
+
+
+def jit_available():
+    """Returns whether numba (optional dependency) can be imported"""
+    try:
+        import numba  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def step_chunk(emf, records, v, i, vs_pos, vs_neg, is_nodes, is_currents,
+               amp_non_inv, amp_inv, amp_out, amp_amp, amp_v_max, amp_v_min,
+               amp_max_delta_v, amp_v_out, r_pos, r_neg, r_r, r_i, l_pos,
+               l_neg, l_l, l_i, c_pos, c_neg, c_c, c_v, vs_reset, vm_index,
+               vm_pos, vm_neg, ir_index, ir, il_index, il):
+    """
+    Simulates the steps of a chunk with scalar loops in the order of
+    Circuit.simulation_step, compiled by numba into one fused loop
+    The arrays are the ones of the first variant of the VectorEngine, the
+    state arrays (v, i, amp_v_out, r_i, l_i, c_v) are updated in place.
+    emf : numpy array - output voltages of the voltage sources in every step 
+                        of the chunk, shape (steps, voltage sources)
+    """
+    for k in range(len(emf)):
+        # reset junction currents to zero
+        i[:] = 0.
+
+        # voltage sources set voltages, current sources set currents
+        for n in range(len(vs_pos)):
+            v[vs_pos[n]] = v[vs_neg[n]] + emf[k, n]
+        for n in range(len(is_nodes)):
+            i[is_nodes[n]] += is_currents[n]
+
+        # amplifier sources set voltages
+        for n in range(len(amp_out)):
+            v_out_next = amp_amp[n] * (v[amp_non_inv[n]] - v[amp_inv[n]])
+            v_out = min(max(v_out_next, amp_v_out[n] - amp_max_delta_v[n]),
+                        amp_v_out[n] + amp_max_delta_v[n])
+            amp_v_out[n] = min(max(v_out, amp_v_min[n]), amp_v_max[n])
+            v[amp_out[n]] = amp_v_out[n]
+
+        # resistors set junction currents
+        for n in range(len(r_pos)):
+            r_i[n] = (v[r_pos[n]] - v[r_neg[n]]) / r_r[n]
+            i[r_pos[n]] += r_i[n]
+            i[r_neg[n]] += -r_i[n]
+
+        # set inductor currents according to junction voltages
+        for n in range(len(l_pos)):
+            l_i[n] += (v[l_pos[n]] - v[l_neg[n]]) * DELTA_TIME / l_l[n]
+            i[l_pos[n]] += l_i[n]
+            i[l_neg[n]] += -l_i[n]
+
+        # set capacitor voltages according to junction currents
+        for n in range(len(c_pos)):
+            c_v[n] += -(i[c_pos[n]] - i[c_neg[n]]) * DELTA_TIME / c_c[n]
+            v[c_pos[n]] = v[c_neg[n]] + c_v[n]
+            i[c_pos[n]] = 0.
+            i[c_neg[n]] = 0.
+
+        # measurements recorded
+        for n in range(len(vm_index)):
+            records[k, 0, vm_index[n]] = v[vm_pos[n]] - v[vm_neg[n]]
+        for n in range(len(ir_index)):
+            records[k, 0, ir_index[n]] = r_i[ir[n]]
+        for n in range(len(il_index)):
+            records[k, 0, il_index[n]] = l_i[il[n]]
+
+        # voltage sources and amplifiers provide the current difference of
+        # junctions, then junction voltages are set according to current
+        for n in range(len(vs_reset)):
+            i[vs_reset[n]] = 0.
+        for n in range(len(amp_out)):
+            i[amp_out[n]] = 0.
+        for n in range(len(v)):
+            v[n] -= i[n] * DELTA_TIME / C_JUNCTION
+
+
+# step_chunk compiled by numba, see compiled_step_chunk()
+_compiled_step_chunk = None
+
+
+def compiled_step_chunk():
+    """Returns step_chunk compiled by numba, compiled once per process"""
+    global _compiled_step_chunk
+    if _compiled_step_chunk is None:
+        # imported only when needed, it is an optional dependency
+        import numba
+        _compiled_step_chunk = numba.njit(cache=True)(step_chunk)
+    return _compiled_step_chunk
+
+
+class JITEngine(VectorEngine):
+    """
+    Vector engine whose steps are executed by a kernel compiled by numba
+    The netlist is compiled into the arrays of the VectorEngine, then every
+    chunk of steps runs in one compiled loop over scalars, without the
+    overhead of NumPy operations on small arrays. The results are the same
+    as the results of the object model. Variants are not supported.
+    """
+
+    # phases of a simulation, see profile()
+    PHASES = ('chunk',)
+
+    def __init__(self, comp_list, junctions, netlist=None):
+        """
+        comp_list : ComponentList - components of the circuit
+        junctions : dict - key: junction name -> value: Junction class
+        netlist : CompiledNetlist - optional, the topology arrays are taken
+                                    from it, or stored in it once compiled
+        """
+        super().__init__(comp_list, junctions, netlist=netlist)
+        self.kernel = compiled_step_chunk()
+
+    def step_chunk(self, times, records):
+        """
+        Simulates the steps of a chunk with the compiled kernel
+        times : numpy array - time points of the steps in sec
+        records : numpy array - measurement values are written into it,
+                                shape (steps, 1, instruments)
+        """
+        emf = np.ascontiguousarray(self.source_voltages(times)[:, 0])
+        # the state arrays of the only variant are updated in place
+        self.kernel(
+            emf, records, self.v[0], self.i[0], self.vs_pos, self.vs_neg,
+            self.is_nodes, self.is_currents[0], self.amp_non_inv,
+            self.amp_inv, self.amp_out, self.amp_amp[0], self.amp_v_max[0],
+            self.amp_v_min[0], self.amp_max_delta_v[0], self.amp_v_out[0],
+            self.r_pos, self.r_neg, self.r_r[0], self.r_i[0], self.l_pos,
+            self.l_neg, self.l_l[0], self.l_i[0], self.c_pos, self.c_neg,
+            self.c_c[0], self.c_v[0], self.vs_reset, self.vm_index,
+            self.vm_pos, self.vm_neg, self.ir_index, self.ir, self.il_index,
+            self.il)
@@ -8,6 +8,8 @@ class Junction:
     with parasitic capacitance
     """    
     
+    __slots__ = ('name', 'v', 'i')
+    
     def __init__(self, name):
         self.name = name
         self.v = 0
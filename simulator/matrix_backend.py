@@ -0,0 +1,164 @@
+import warnings
+import numpy as np
+from .simulation_settings import SPARSE_THRESHOLD
+
+
+# system matrix storage of the MNA solver
+AUTO = 'auto'
+DENSE = 'dense'
+SPARSE = 'sparse'
+
+
+def sparse_available():
+    """Returns whether SciPy (optional dependency) can be imported"""
+    try:
+        import scipy.sparse.linalg  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def select_backend(backend, size):
+    """
+    Returns 'dense' or 'sparse'
+    backend : str - 'auto': sparse from SPARSE_THRESHOLD unknowns, if SciPy is
+                    installed, else dense
+                    'dense' or 'sparse': forced
+    size : int - number of unknowns
+    """
+    if backend == AUTO:
+        if size >= SPARSE_THRESHOLD and sparse_available():
+            return SPARSE
+        return DENSE
+    if backend not in (DENSE, SPARSE):
+        raise ValueError('unknown matrix backend: ' + str(backend))
+    return backend
+
+
+def system_matrix(backend, rows, cols, size):
+    """
+    Returns the DenseSystem or SparseSystem of the stamp positions
+    rows, cols : numpy array - row and column of every stamp value
+    size : int - number of unknowns, stamps out of range (ground) are dropped
+    """
+    if backend == SPARSE:
+        return SparseSystem(rows, cols, size)
+    return DenseSystem(rows, cols, size)
+
+
+class DenseFactorization:
+    """
+    LU factorization of a dense matrix with partial pivoting (SciPy), 
+    without SciPy the matrix is kept and every solve factorizes it again
+    """
+
+    def __init__(self, m):
+        try:
+            # imported only when needed, it is an optional dependency
+            from scipy.linalg import LinAlgWarning, lu_factor
+        except ImportError:
+            self.lu = None
+            self.m = m
+            return
+        with warnings.catch_warnings():
+            # singular matrices raise, as np.linalg.solve does
+            warnings.simplefilter('ignore', LinAlgWarning)
+            self.lu = lu_factor(m, check_finite=False)
+        if not np.all(np.diagonal(self.lu[0])):
+            raise np.linalg.LinAlgError('Singular matrix')
+
+    def solve(self, b):
+        if self.lu is None:
+            return np.linalg.solve(self.m, b)
+        from scipy.linalg import lu_solve
+
+        return lu_solve(self.lu, b, check_finite=False)
+
+
+class DenseSystem:
+    """
+    Dense matrix assembled from stamps at fixed positions, only the stamp
+    values change between assemblies
+    """
+
+    def __init__(self, rows, cols, size):
+        self.size = size
+        self.keep = (rows < size) & (cols < size)
+        self.rows = rows[self.keep]
+        self.cols = cols[self.keep]
+
+    def assemble(self, values):
+        values = np.asarray(values)[self.keep]
+        m = np.zeros((self.size, self.size), dtype=values.dtype)
+        np.add.at(m, (self.rows, self.cols), values)
+        return m
+
+    def factorize(self, values):
+        return DenseFactorization(self.assemble(values))
+
+
+class SparseFactorization:
+    """
+    LU factorization of a sparse matrix whose unknowns are reordered by the
+    ordering of its SparseSystem
+    """
+
+    def __init__(self, lu, order, position):
+        self.lu = lu
+        self.order = order
+        self.position = position
+
+    def solve(self, b):
+        return self.lu.solve(np.asarray(b)[self.order])[self.position]
+
+
+class SparseSystem:
+    """
+    Sparse CSC matrix assembled from stamps at fixed positions
+    The symbolic part is computed once: the CSC structure, the index of every
+    stamp in the CSC data array (duplicates are summed) and a bandwidth
+    reducing ordering (reverse Cuthill-McKee) of the unknowns. Assembly only
+    sums the stamp values into the data array, so its cost and the memory
+    grow with the number of stamps, not with the square of the unknowns.
+    """
+
+    def __init__(self, rows, cols, size):
+        from scipy.sparse import csc_matrix
+        from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+        self.size = size
+        self.keep = (rows < size) & (cols < size)
+        rows, cols = rows[self.keep], cols[self.keep]
+
+        pattern = csc_matrix((np.ones(len(rows)), (rows, cols)),
+                             shape=(size, size))
+        self.order = np.asarray(
+            reverse_cuthill_mckee(pattern + pattern.T, symmetric_mode=True),
+            dtype=int)
+        self.position = np.empty(size, dtype=int)
+        self.position[self.order] = np.arange(size)
+
+        # CSC structure of the reordered matrix
+        rows, cols = self.position[rows], self.position[cols]
+        keys, self.data_index = np.unique(cols * size + rows,
+                                          return_inverse=True)
+        self.indices = keys % size
+        self.indptr = np.searchsorted(keys // size, np.arange(size + 1))
+
+    def assemble(self, values):
+        from scipy.sparse import csc_matrix
+
+        values = np.asarray(values)[self.keep]
+        n = len(self.indices)
+        data = np.bincount(self.data_index, values.real, n)
+        if np.iscomplexobj(values):
+            data = data + 1j * np.bincount(self.data_index, values.imag, n)
+        return csc_matrix((data, self.indices, self.indptr),
+                          shape=(self.size, self.size))
+
+    def factorize(self, values):
+        from scipy.sparse.linalg import splu
+
+        # the ordering of the structure is kept, pivoting is still partial
+        lu = splu(self.assemble(values), permc_spec='NATURAL')
+        return SparseFactorization(lu, self.order, self.position)
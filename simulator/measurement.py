@@ -1,69 +1,343 @@
-from .components import Component
+import numpy as np
+from .components import Component, slot_state
+from .simulation_settings import MEASUREMENT_CHUNK_SIZE
+
+
+class SampleBuffer:
+    """
+    Growable storage of (time, value) samples in float64 NumPy arrays
+    Samples are written into a preallocated array, when it is full a new
+    chunk is allocated, so long runs never copy the stored samples.
+    With a sink, full chunks are written to it instead of kept in memory.
+    Samples of uniform steps (time_step) store only their values, the time 
+    of sample k is (first + k * stride) * time_step, computed when needed.
+    """
+
+    def __init__(self, size=None, sink=None, time_step=None, stride=1):
+        """
+        size : int - number of expected samples, preallocated at once if given
+        sink : ChannelWriter - optional, stores full chunks on disk
+        time_step : float - optional, the samples are taken at the steps 
+                            k * time_step (sec) of a uniform time grid
+        stride : int - number of time steps between consecutive samples
+        """
+        self.chunks = []
+        self.sink = sink
+        self.time_step = time_step
+        self.stride = stride
+        # index of the time step of the first sample, uniform steps only
+        self.first = None
+        if sink is not None:
+            size = None
+        self.new_chunk(MEASUREMENT_CHUNK_SIZE if size is None else size)
+
+    def new_chunk(self, size):
+        self.times = None
+        if self.time_step is None:
+            self.times = np.empty(max(size, 1))
+        self.values = np.empty(max(size, 1))
+        self.length = 0
+
+    def store_chunk(self):
+        """Stores the full current chunk and allocates the next one"""
+        if self.sink is None:
+            self.chunks.append((self.times, self.values))
+            self.new_chunk(MEASUREMENT_CHUNK_SIZE)
+        else:
+            self.flush()
+
+    def flush(self):
+        """Writes the samples in memory to the sink"""
+        if self.sink is not None and self.length:
+            self.sink.write(self.chunk_times(self.times, self.sink.length, 
+                                             self.length),
+                            self.values[:self.length])
+            self.length = 0
+
+    def __len__(self):
+        if self.sink is not None:
+            return self.sink.length + self.length
+        return sum(len(v) for _, v in self.chunks) + self.length
+
+    def sample_times(self, start, count):
+        """
+        Returns numpy array - time of the samples start ... start + count - 1
+        of uniform steps
+        """
+        if self.first is None:
+            return np.zeros(0)
+        steps = self.first + (start + np.arange(count)) * self.stride
+        return steps * self.time_step
+
+    def chunk_times(self, times, start, count):
+        """
+        Returns numpy array - times of the first count samples of a chunk, 
+        stored or of uniform steps
+        times : numpy array - stored times of the chunk, None if uniform
+        start : int - index of the first sample of the chunk
+        """
+        if times is None:
+            return self.sample_times(start, count)
+        return times[:count]
+
+    def set_first(self, time):
+        """Saves the time step index of the first sample of uniform steps"""
+        if self.first is None:
+            self.first = int(round(time / self.time_step))
+
+    def append(self, time, value):
+        if self.length == len(self.values):
+            self.store_chunk()
+        if self.times is not None:
+            self.times[self.length] = time
+        elif self.first is None:
+            self.set_first(time)
+        self.values[self.length] = value
+        self.length += 1
+
+    def extend(self, times, values):
+        """Appends arrays of samples"""
+        if len(times) and self.time_step is not None:
+            self.set_first(times[0])
+        while len(times):
+            if self.length == len(self.values):
+                self.store_chunk()
+            n = min(len(times), len(self.values) - self.length)
+            if self.times is not None:
+                self.times[self.length:self.length + n] = times[:n]
+            self.values[self.length:self.length + n] = values[:n]
+            self.length += n
+            times, values = times[n:], values[n:]
+
+    def truncate(self, length):
+        """Drops the samples after the first length samples"""
+        if length == len(self):
+            return
+        if self.sink is not None:
+            raise ValueError('samples written to disk can not be dropped')
+        kept = 0
+        for k, (times, values) in enumerate(self.chunks):
+            if kept + len(values) > length:
+                self.chunks = self.chunks[:k]
+                self.times, self.values = times, values
+                break
+            kept += len(values)
+        self.length = length - kept
+        if length == 0:
+            self.first = None
+
+    def get_samples(self, start=0):
+        """
+        Returns (times, values) of the samples in memory from the index start,
+        only the chunks after start are copied
+        """
+        times, values = [np.zeros(0)], [np.zeros(0)]
+        offset = 0
+        for t, v in self.chunks + [(self.times, self.values[:self.length])]:
+            if offset + len(v) > start:
+                first = max(start - offset, 0)
+                times.append(self.chunk_times(t, offset, len(v))[first:])
+                values.append(v[first:])
+            offset += len(v)
+        return np.concatenate(times), np.concatenate(values)
+
+    def get_times(self):
+        if self.sink is not None:
+            self.flush()
+            return self.sink.get_times()
+        if self.time_step is not None:
+            return self.sample_times(0, len(self))
+        return np.concatenate([t for t, _ in self.chunks] +
+                              [self.times[:self.length]])
+
+    def get_values(self):
+        if self.sink is not None:
+            self.flush()
+            return self.sink.get_values()
+        return np.concatenate([v for _, v in self.chunks] +
+                              [self.values[:self.length]])
 
 
 class MeasuringInstrument:
-    
-    def __init__(self, measurement_type):
+
+    # stepping phase, see component_list.PHASES
+    PHASE = 'measuring_instruments'
+
+    def __init__(self, measurement_type, decimation=1, sample_interval=None):
         """
-        Initializes an empty list of measurements
+        Initializes an empty buffer of measurements
         measurement_type : str - 'V' for voltage, 'I' for current
+        decimation : int - only every n-th simulation step is recorded
+        sample_interval : float - output sample interval in usec, the first
+                                  step in every interval is recorded
         """
-        self.measurements = []
-        self.measurement_type = measurement_type 
-        
-    def set_measured_component(self, components):
+        self.measurement_type = measurement_type
+        self.decimation = decimation
+        self.sample_interval = (None if sample_interval is None else
+                                sample_interval * 1e-6)
+        self.init_measurements()
+
+    def init_measurements(self, steps=None, sink=None, time_step=None):
+        """
+        Clears the measurements and preallocates their storage
+        steps : int - number of simulation steps, if it is known
+        sink : ChannelWriter - optional, measurements are streamed into it
+        time_step : float - optional, the simulation steps are k * time_step 
+                            (sec), then the sample times are not stored
+        """
+        self.step_count = 0
+        self.last_interval = -1
+        size = None
+        if steps is not None:
+            size = -(-steps // self.decimation)
+            if self.sample_interval is not None:
+                size = None
+        # sample intervals select irregular steps, their times are stored
+        if self.sample_interval is not None:
+            time_step = None
+        self.buffer = SampleBuffer(size, sink, time_step, self.decimation)
+
+    def __getstate__(self):
+        # recorded samples and their output files are not pickled
+        state = self.__dict__.copy()
+        state['buffer'] = SampleBuffer(0)
+        # instruments with pins have the __slots__ of Component as well
+        slots = slot_state(self)
+        return (state, slots) if slots else state
+
+    def set_measured_component(self, comp_list):
         # left empty on purpose, child class must overwrite
         pass
-        
+
+    def measure(self):
+        # left empty on purpose, child class must overwrite
+        pass
+    
+    def measure_ac(self, voltages, frequencies):
+        """
+        Returns the complex small-signal measurement of the AC analysis
+        voltages : dict - key: junction name -> value: complex numpy array of 
+                          the junction voltage at every frequency
+        frequencies : numpy array - frequencies in Hz
+        """
+        # child class must overwrite
+        raise ValueError('measuring instrument ' + self.name + 
+                         ' is not supported by the AC analysis')
+
+    def is_sample(self, time):
+        """Decides whether the simulation step at time is recorded"""
+        self.step_count += 1
+        if (self.step_count - 1) % self.decimation:
+            return False
+        if self.sample_interval is not None:
+            interval = time // self.sample_interval
+            if interval <= self.last_interval:
+                return False
+            self.last_interval = interval
+        return True
+
+    def select_samples(self, times):
+        """
+        Vectorized is_sample() of consecutive simulation steps
+        times : numpy array - time of the simulation steps in sec
+        Returns numpy array - boolean mask of the recorded steps
+        """
+        steps = self.step_count + np.arange(len(times))
+        self.step_count += len(times)
+        mask = steps % self.decimation == 0
+        if self.sample_interval is not None and len(times):
+            intervals = np.where(mask, times // self.sample_interval, -1)
+            intervals = np.maximum.accumulate(
+                np.concatenate(([self.last_interval], intervals)))
+            mask &= intervals[1:] > intervals[:-1]
+            self.last_interval = intervals[-1]
+        return mask
+
+    def simulation_step(self, time):
+        """Single measurement at time in sec, if the step is recorded"""
+        if self.is_sample(time):
+            self.buffer.append(time, self.measure())
+
+    def record(self, times, values):
+        """
+        Records the measurement values of consecutive simulation steps
+        times : numpy array - time of the simulation steps in sec
+        values : numpy array - measured value in every step
+        """
+        mask = self.select_samples(times)
+        self.buffer.extend(times[mask], values[mask])
+
     def get_measurements(self):
-        return self.measurements
+        return self.buffer.get_values()
+
+    def get_times(self):
+        """Returns the time of the recorded measurements in sec"""
+        return self.buffer.get_times()
+
+    @property
+    def measurements(self):
+        return self.get_measurements()
 
 
 class Voltmeter(Component, MeasuringInstrument):
     
-    def __init__(self, name, pos, neg):
+    def __init__(self, name, pos, neg, decimation=1, sample_interval=None):
         """
         name : str - name of component, this name will be used on the legend 
                     of the measurement result chart
-        resistor_name : str - name of measured resistor
         pos : str - junction name connected to positive pin
         neg : str - junction name connected to negative pin
+        decimation : int - only every n-th simulation step is recorded
+        sample_interval : float - output sample interval in usec
         """
         Component.__init__(self, name, pos=pos, neg=neg)
-        MeasuringInstrument.__init__(self, measurement_type='V')        
+        MeasuringInstrument.__init__(self, measurement_type='V', 
+                                     decimation=decimation,
+                                     sample_interval=sample_interval)
         
-    def simulation_step(self):        
-        """Single measurement"""        
-        self.measurements.append(self.pos.v - self.neg.v) 
+    def measure(self):        
+        return self.pos.v - self.neg.v 
+    
+    #override
+    def measure_ac(self, voltages, frequencies):
+        return (voltages[self.junction_names['pos']] - 
+                voltages[self.junction_names['neg']])
         
         
 class VSenseResistor(MeasuringInstrument):
     """Measures voltage on a resistor"""  
     
-    def __init__(self, name, resistor_name):
+    def __init__(self, name, resistor_name, decimation=1, 
+                 sample_interval=None):
         """
         name : str - name of component, this name will be used on the legend 
                     of the measurement result chart
         resistor_name : str - name of measured resistor
+        decimation : int - only every n-th simulation step is recorded
+        sample_interval : float - output sample interval in usec
         """
-        MeasuringInstrument.__init__(self, measurement_type='V')
+        MeasuringInstrument.__init__(self, measurement_type='V', 
+                                     decimation=decimation,
+                                     sample_interval=sample_interval)
         self.name = name
         self.resistor_name = resistor_name 
         
     #override 
-    def set_measured_component(self, components):
+    def set_measured_component(self, comp_list):
         """
         Chooses and saves the appropriate component from the component list to 
         measure
-        components : list - list of components
+        comp_list : ComponentList - components of the circuit
         """
-        for component in components:
-            if component.name == self.resistor_name:
-                self.resistor = component
+        self.resistor = comp_list.get(self.resistor_name)
         
-    def simulation_step(self): 
-        """Single measurement"""
-        self.measurements.append(self.resistor.pos.v - self.resistor.neg.v)
+    def measure(self): 
+        return self.resistor.pos.v - self.resistor.neg.v
+    
+    #override
+    def measure_ac(self, voltages, frequencies):
+        return (voltages[self.resistor.junction_names['pos']] - 
+                voltages[self.resistor.junction_names['neg']])
                 
 class _Ammeter(Component, MeasuringInstrument):
     """IMPLEMENTATION IS NOT READY!"""
@@ -73,37 +347,45 @@ class _Ammeter(Component, MeasuringInstrument):
         Component.__init__(self, name, pos=pos, neg=neg)
         MeasuringInstrument.__init__(self, measurement_type='I')
         
-    def simulation_step(self):
+    def simulation_step(self, time):
         """NOT READY"""
         pass
         
 class ISenseResistor(MeasuringInstrument):
     """Measures current through a resistor"""
     
-    def __init__(self, name, resistor_name):
+    def __init__(self, name, resistor_name, decimation=1, 
+                 sample_interval=None):
         """
         name : str - name of component, this name will be used on the legend 
                     of the measurement result chart
         resistor_name : str - name of measured resistor
+        decimation : int - only every n-th simulation step is recorded
+        sample_interval : float - output sample interval in usec
         """
-        MeasuringInstrument.__init__(self, measurement_type='I')
+        MeasuringInstrument.__init__(self, measurement_type='I', 
+                                     decimation=decimation,
+                                     sample_interval=sample_interval)
         self.name = name
         self.resistor_name = resistor_name
         
     #override 
-    def set_measured_component(self, components):
+    def set_measured_component(self, comp_list):
         """
         Chooses and saves the appropriate component from the component list to 
         measure
-        components : list - list of components
+        comp_list : ComponentList - components of the circuit
         """
-        for component in components:
-            if component.name == self.resistor_name:
-                self.resistor = component
+        self.resistor = comp_list.get(self.resistor_name)
         
-    def simulation_step(self): 
-        """Single measurement"""
-        self.measurements.append(self.resistor.i)
+    def measure(self): 
+        return self.resistor.i
+    
+    #override
+    def measure_ac(self, voltages, frequencies):
+        v = (voltages[self.resistor.junction_names['pos']] - 
+             voltages[self.resistor.junction_names['neg']])
+        return v * self.resistor.get_admittance(frequencies)
         
 
         
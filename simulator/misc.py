@@ -1,4 +1,6 @@
 import sys
+import time
+from .simulation_settings import PROGRESS_INTERVAL
 
 
 class LoadingBar:
@@ -8,11 +10,15 @@ class LoadingBar:
         self.message = message
         self.bar_length = 30
         self.index = 0
+        self.percent = 0
         
     def __call__(self):
         self.index += 1 
-        if self.index % (self.size / 100) != 0:
+        # printed when the percentage changes, for any size
+        percent = self.index * 100 // self.size
+        if percent == self.percent and self.index != self.size:
             return
+        self.percent = percent
         i = self.index
         line = (str(int(i * 100 / self.size)) + '%' + ' ' + self.message +
                 ' |' + '|' * int(self.bar_length * i / self.size) + 
@@ -23,4 +29,91 @@ class LoadingBar:
             print('')
 
   
-    
\ No newline at end of file
+    
+
+
+def print_progress(info):
+    """Default progress callback, writes a progress bar line to stdout"""
+    bar_length = 30
+    fraction = info['fraction']
+    line = ('%d%% %s |%s%s| %.0f %s/sec, ETA %.0f s   ' % (
+        int(fraction * 100), info['message'], 
+        '|' * int(bar_length * fraction), 
+        '.' * (bar_length - int(bar_length * fraction)),
+        info['rate'], info['unit'], info['eta']))
+    sys.stdout.write('\r' + line)
+    if info['finished']:
+        print('')
+
+
+class Progress:
+    """
+    Progress reporter of long simulations
+    The simulation loops update it only every few steps (or per chunk), and 
+    the callback is called at most once in interval seconds of wall time, 
+    and once when the simulation is finished.
+    """
+    
+    def __init__(self, total, message, callback=print_progress, 
+                 interval=PROGRESS_INTERVAL, unit='steps'):
+        """
+        total : float - amount of work, e.g. number of steps or simulation 
+                        time
+        message : str - name of the work
+        callback : function - called with a dict of the progress: 'message', 
+                              'unit', 'done', 'total', 'fraction', 'elapsed' 
+                              (sec), 'rate' (done per sec), 'eta' (sec), 
+                              'finished', None: no reports
+        interval : float - minimum wall time between callbacks in sec
+        unit : str - unit of the work, e.g. 'steps' or 'usec'
+        """
+        self.total = total
+        self.message = message
+        self.unit = unit
+        self.callback = callback
+        self.interval = interval
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.done = 0
+        
+    def __call__(self, done):
+        """
+        Updates the progress, the callback is called if interval elapsed
+        done : float - amount of work done so far
+        """
+        self.done = done
+        now = time.perf_counter()
+        if now - self.last >= self.interval:
+            self.last = now
+            self.report(now, False)
+            
+    def finish(self):
+        """Reports the completed work"""
+        self.done = self.total
+        self.report(time.perf_counter(), True)
+        
+    def info(self, now, finished):
+        elapsed = now - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.
+        remaining = self.total - self.done
+        return dict(message=self.message, unit=self.unit, done=self.done, 
+                    total=self.total,
+                    fraction=self.done / self.total if self.total else 1., 
+                    elapsed=elapsed, rate=rate, 
+                    eta=remaining / rate if rate > 0 else 0.,
+                    finished=finished)
+        
+    def report(self, now, finished):
+        if self.callback is not None:
+            self.callback(self.info(now, finished))
+
+
+def progress_callback(progress):
+    """
+    Returns the callback of a progress argument
+    progress : bool or function - True: print_progress, False or None: no 
+                                  reports, function: the callback itself
+    """
+    if progress is True:
+        return print_progress
+    return progress or None
@@ -0,0 +1,653 @@
+import hashlib
+import numpy as np
+from .component_list import check_models
+from .matrix_backend import AUTO, SPARSE, select_backend, system_matrix
+from .simulation_settings import (GMIN, MAX_CLAMP_ITERATIONS, 
+                                  MAX_FACTORIZATIONS, BREAKPOINT_TOLERANCE, 
+                                  AC_BLOCK_SIZE)
+from .sources import DCCurrentSource, GND
+
+
+# integration methods of the transient analysis
+BACKWARD_EULER = 'backward_euler'
+TRAPEZOIDAL = 'trapezoidal'
+
+# operational amplifier output regions
+LINEAR = 0
+SATURATED_HIGH = 1
+SATURATED_LOW = -1
+SLEWING_UP = 2
+SLEWING_DOWN = -2
+
+
+def find_ground(comp_list, junctions):
+    """
+    Returns the set of junction names which are at zero potential:
+    junctions of GND components, else the junction named 'GND', else the
+    negative junction of the first voltage source
+    """
+    ground = {s.junction_names['gnd'] for s in comp_list.sources
+              if isinstance(s, GND)}
+    if ground:
+        return ground
+    if 'GND' in junctions:
+        return {'GND'}
+    for s in comp_list.sources:
+        if not isinstance(s, DCCurrentSource):
+            return {s.junction_names['neg']}
+    raise ValueError('circuit has no ground reference')
+
+
+def conductance_stamp(pos, neg, g):
+    """
+    Returns (rows, cols, values) of conductances g connected between the
+    junctions pos and neg
+    """
+    rows = np.concatenate((pos, neg, pos, neg))
+    cols = np.concatenate((pos, neg, neg, pos))
+    values = np.concatenate((g, g, -g, -g))
+    return rows, cols, values
+
+
+def extrapolate(history, time):
+    """
+    Quadratic extrapolation (predictor) of the solution
+    history : list - (time, solution vector) of the last three time points
+    time : float - time of the predicted solution
+    """
+    (t_2, v_2), (t_1, v_1), (t_0, v_0) = history
+    return (v_0 * (time - t_1) * (time - t_2) / ((t_0 - t_1) * (t_0 - t_2)) +
+            v_1 * (time - t_0) * (time - t_2) / ((t_1 - t_0) * (t_1 - t_2)) +
+            v_2 * (time - t_0) * (time - t_1) / ((t_2 - t_0) * (t_2 - t_1)))
+
+
+class MNASolver:
+    """
+    Modified nodal analysis of a connected circuit
+    Unknowns are the junction voltages (except ground) and the currents of
+    voltage sources and amplifier outputs. Capacitors and inductors are
+    replaced by their backward Euler or trapezoidal companion models
+    (conductance and current source), so arbitrary large time steps remain
+    numerically stable. Junctions have no parasitic capacitance.
+    The system matrix depends only on the step size, the integration method
+    and the op-amp regions, therefore it is factorized once and reused.
+    Large circuits use a sparse system matrix, see matrix_backend.
+    """
+
+    # compiled arrays which depend only on the topology of the circuit
+    TOPOLOGY = ('n', 'size', 'ground', 'index', 'vs_branch', 'amp_branch', 
+                'r_pos', 'r_neg', 'c_pos', 'c_neg', 'l_pos', 'l_neg', 
+                'vs_pos', 'vs_neg', 'is_pos', 'is_neg', 'amp_non_inv', 
+                'amp_inv', 'amp_out', 'static_rows', 'static_cols', 'system')
+
+    def __init__(self, comp_list, junctions, method=TRAPEZOIDAL, 
+                 backend=AUTO, netlist=None):
+        """
+        comp_list : ComponentList - components of the circuit
+        junctions : dict - key: junction name -> value: Junction class
+        method : str - 'trapezoidal' or 'backward_euler'
+        backend : str - system matrix storage, 'auto', 'dense' or 'sparse'
+        netlist : CompiledNetlist - optional, the topology arrays and the 
+                                    factorizations are taken from it, or 
+                                    stored in it once computed
+        """
+        if method not in (BACKWARD_EULER, TRAPEZOIDAL):
+            raise ValueError('unknown integration method: ' + str(method))
+        self.method = method
+        check_models(comp_list, type(self).__name__)
+        self.comp_list = comp_list
+        self.junctions = junctions
+        self.v_sources = [s for s in comp_list.sources
+                          if not isinstance(s, (DCCurrentSource, GND))]
+        self.i_sources = [s for s in comp_list.sources
+                          if isinstance(s, DCCurrentSource)]
+        self.amplifiers = comp_list.amplifiers
+        # branch current unknowns follow the junction voltages
+        size = len(junctions) + len(self.v_sources) + len(self.amplifiers)
+        self.backend = select_backend(backend, size)
+
+        topology = None
+        if netlist is not None:
+            topology = netlist.engines.get(('mna', self.backend))
+        if topology is None:
+            self.compile()
+        else:
+            self.__dict__.update(topology)
+        self.junction_list = [j for j in junctions.values()
+                              if self.index[j.name] != self.ground]
+        self.load_parameters()
+        if topology is None:
+            # the stamp positions do not depend on the step and the regions
+            rows, cols, _ = self.transient_stamp(1., 1, self.regions)
+            self.system = system_matrix(self.backend, rows, cols, self.size)
+            if netlist is not None:
+                netlist.add_engine(('mna', self.backend), 
+                                   {name: getattr(self, name) 
+                                    for name in self.TOPOLOGY})
+        
+        self.factorizations = {}
+        if netlist is not None:
+            self.factorizations = netlist.get_factorizations(
+                (self.backend, self.parameter_key()))
+        self.factorization_count = 0
+        self.steps = 0
+        self.rejected_steps = 0
+        self.clamp_iterations = 0
+
+    def nodes(self, components, pin):
+        """Returns unknown indices of the given pin of the components"""
+        return np.array([self.index[c.junction_names[pin]]
+                         for c in components], dtype=int)
+
+    def compile(self):
+        """Builds the unknown indices and incidence arrays"""
+        comp_list = self.comp_list
+        
+        ground = find_ground(comp_list, self.junctions)
+        names = [name for name in self.junctions if name not in ground]
+        self.n = len(names)
+        self.index = {name: k for k, name in enumerate(names)}
+        self.vs_branch = self.n + np.arange(len(self.v_sources))
+        self.amp_branch = (self.n + len(self.v_sources) +
+                           np.arange(len(self.amplifiers)))
+        self.size = self.n + len(self.v_sources) + len(self.amplifiers)
+        # ground is an extra index, it is dropped from the system
+        self.ground = self.size
+        for name in ground:
+            self.index[name] = self.ground
+
+        self.r_pos = self.nodes(comp_list.resistors, 'pos')
+        self.r_neg = self.nodes(comp_list.resistors, 'neg')
+        self.c_pos = self.nodes(comp_list.capacitors, 'pos')
+        self.c_neg = self.nodes(comp_list.capacitors, 'neg')
+        self.l_pos = self.nodes(comp_list.inductors, 'pos')
+        self.l_neg = self.nodes(comp_list.inductors, 'neg')
+        self.vs_pos = self.nodes(self.v_sources, 'pos')
+        self.vs_neg = self.nodes(self.v_sources, 'neg')
+        self.is_pos = self.nodes(self.i_sources, 'pos')
+        self.is_neg = self.nodes(self.i_sources, 'neg')
+        self.amp_non_inv = self.nodes(self.amplifiers, 'non_inv')
+        self.amp_inv = self.nodes(self.amplifiers, 'inv')
+        self.amp_out = self.nodes(self.amplifiers, 'out')
+
+        # time step independent part of the matrix
+        nodes = np.arange(self.n)
+        rows, cols, _ = conductance_stamp(self.r_pos, self.r_neg, 
+                                          np.zeros(len(self.r_pos)))
+        self.static_rows = np.concatenate(
+            (rows, nodes, self.vs_pos, self.vs_neg, self.vs_branch, 
+             self.vs_branch, self.amp_out))
+        self.static_cols = np.concatenate(
+            (cols, nodes, self.vs_branch, self.vs_branch, self.vs_pos, 
+             self.vs_neg, self.amp_branch))
+
+    def load_parameters(self):
+        """Loads the component values and the initial state"""
+        comp_list = self.comp_list
+
+        self.r_g = 1 / np.array([r.r for r in comp_list.resistors],
+                                dtype=float)
+        self.c_c = np.array([c.c for c in comp_list.capacitors], dtype=float)
+        self.c_v = np.array([c.v for c in comp_list.capacitors], dtype=float)
+        self.c_i = np.zeros(len(self.c_c))
+        self.l_l = np.array([i.l for i in comp_list.inductors], dtype=float)
+        self.l_i = np.array([i.i for i in comp_list.inductors], dtype=float)
+        self.l_v = np.zeros(len(self.l_l))
+        self.is_i = np.array([s.i for s in self.i_sources], dtype=float)
+
+        amplifiers = self.amplifiers
+        self.amp_amp = np.array([a.amp for a in amplifiers], dtype=float)
+        self.amp_v_max = np.array([a.v_max for a in amplifiers], dtype=float)
+        self.amp_v_min = np.array([a.v_min for a in amplifiers], dtype=float)
+        self.amp_v_out = np.array([a.v_out for a in amplifiers], dtype=float)
+        # V/sec
+        self.amp_slew = np.array([a.slew_rate * 1e6 for a in amplifiers], 
+                                 dtype=float)
+        self.regions = self.amp_regions(self.amp_v_out)
+
+        ones = np.ones(len(self.v_sources))
+        _, _, values = conductance_stamp(self.r_pos, self.r_neg, self.r_g)
+        self.static_stamp = (
+            self.static_rows, self.static_cols,
+            np.concatenate((values, np.full(self.n, GMIN), ones, -ones,
+                            ones, -ones, np.ones(len(amplifiers)))))
+
+    def profile(self, profiler):
+        """
+        Adds the wall time of solving the steps, of the factorizations 
+        (part of solving) and of recording the measurements to the profiler
+        """
+        self.solve = profiler.timed(self.solve, 'solve')
+        self.factorize = profiler.timed(self.factorize, 'factorization')
+        self.record = profiler.timed(self.record, 'measurements')
+
+    def parameter_key(self):
+        """Returns the hash of the values the system matrix depends on"""
+        values = (self.r_g, self.c_c, self.l_l, self.amp_amp)
+        return hashlib.sha1(b''.join(v.tobytes() for v in values)).hexdigest()
+
+    def amp_regions(self, v_ctrl):
+        """
+        Returns the op-amp regions according to the unlimited output voltages
+        v_ctrl : numpy array - A * (V+ - V-) of every amplifier
+        """
+        return np.where(v_ctrl > self.amp_v_max, SATURATED_HIGH,
+                        np.where(v_ctrl < self.amp_v_min, SATURATED_LOW,
+                                 LINEAR))
+    
+    def amp_step_regions(self, v_ctrl, regions, h):
+        """
+        Returns the op-amp regions consistent with a solution of a time step
+        Linear op-amps slew if their output change is above the slew rate
+        during the step, or saturate. Saturated and slewing op-amps stay in
+        their region while A * (V+ - V-) is beyond their fixed output, else 
+        they become linear (a slewing output reaching v_max or v_min 
+        saturates).
+        v_ctrl : numpy array - A * (V+ - V-) of every amplifier
+        regions : numpy array - regions of the solution
+        h : float - time step in sec
+        """
+        ramp = self.amp_slew * h
+        dv = np.clip(v_ctrl, self.amp_v_min, self.amp_v_max) - self.amp_v_out
+        linear = np.where(dv > ramp, SLEWING_UP,
+                          np.where(dv < -ramp, SLEWING_DOWN, 
+                                   self.amp_regions(v_ctrl)))
+        
+        v_out = self.amp_output(regions, h)
+        beyond = np.where(regions > 0, v_ctrl > v_out, v_ctrl < v_out)
+        fixed = np.where(beyond, regions, LINEAR)
+        fixed = np.where((fixed == SLEWING_UP) & (v_out >= self.amp_v_max),
+                         SATURATED_HIGH, fixed)
+        fixed = np.where((fixed == SLEWING_DOWN) & (v_out <= self.amp_v_min),
+                         SATURATED_LOW, fixed)
+        return np.where(regions == LINEAR, linear, fixed)
+    
+    def amp_output(self, regions, h=0.):
+        """
+        Returns the fixed output voltages of saturated and slewing op-amps,
+        slewing outputs change linearly from their former value
+        h : float - time step in sec
+        """
+        ramp = self.amp_slew * h
+        return np.select([regions == SATURATED_HIGH, regions == SATURATED_LOW,
+                          regions == SLEWING_UP, regions == SLEWING_DOWN],
+                         [self.amp_v_max, self.amp_v_min, 
+                          self.amp_v_out + ramp, self.amp_v_out - ramp], 0.)
+
+    def companion_conductances(self, h, order):
+        """
+        Returns the companion model conductances of capacitors and inductors
+        h : float - time step in sec
+        order : int - 1 for backward Euler, 2 for trapezoidal
+        """
+        if order == 1:
+            return self.c_c / h, h / self.l_l
+        return 2 * self.c_c / h, h / (2 * self.l_l)
+
+    def amp_stamp(self, regions):
+        """
+        Returns (rows, cols, values) of the op-amp output equations:
+        v_out = A * (V+ - V-) in the linear region, else v_out is fixed
+        The gain of saturated and slewing amplifiers is stamped as 0, so the 
+        positions 
+        do not depend on the regions.
+        """
+        a = self.amp_amp * (regions == LINEAR)
+        return (np.concatenate((self.amp_branch, self.amp_branch, 
+                                self.amp_branch)),
+                np.concatenate((self.amp_out, self.amp_non_inv, 
+                                self.amp_inv)),
+                np.concatenate((np.ones(len(self.amplifiers)), -a, a)))
+    
+    def transient_stamp(self, h, order, regions):
+        """Returns (rows, cols, values) of the system matrix of a step"""
+        c_g, l_g = self.companion_conductances(h, order)
+        stamps = [self.static_stamp,
+                  conductance_stamp(self.c_pos, self.c_neg, c_g),
+                  conductance_stamp(self.l_pos, self.l_neg, l_g),
+                  self.amp_stamp(regions)]
+        return tuple(np.concatenate([s[k] for s in stamps]) 
+                     for k in range(3))
+
+    def factorize(self, h, order, regions):
+        """
+        Returns the factorization of the system matrix, computed only once 
+        for every step size, integration order and combination of linear 
+        op-amps
+        """
+        key = (h, order, tuple(regions == LINEAR))
+        if key not in self.factorizations:
+            if len(self.factorizations) >= MAX_FACTORIZATIONS:
+                # drop the oldest one, e.g. of a step shortened by a breakpoint
+                del self.factorizations[next(iter(self.factorizations))]
+            self.factorizations[key] = self.system.factorize(
+                self.transient_stamp(h, order, regions)[2])
+            self.factorization_count += 1
+        return self.factorizations[key]
+
+    def source_vector(self, time, regions, size, h=0.):
+        """
+        Returns the right hand side of the independent sources and the
+        saturated or slewing op-amp outputs, with ground as its last element
+        """
+        b = np.zeros(size + 1)
+        b[self.vs_branch] = [s.get_voltage(time) for s in self.v_sources]
+        b[self.amp_branch] = self.amp_output(regions, h)
+        np.add.at(b, self.is_pos, self.is_i)
+        np.add.at(b, self.is_neg, -self.is_i)
+        return b
+
+    def rhs(self, time, h, order, regions):
+        """Assembles the right hand side vector of the system"""
+        c_g, l_g = self.companion_conductances(h, order)
+        c_i = c_g * self.c_v
+        l_i = self.l_i.copy()
+        if order == 2:
+            c_i += self.c_i
+            l_i += l_g * self.l_v
+
+        b = self.source_vector(time, regions, self.size, h)
+        np.add.at(b, self.c_pos, c_i)
+        np.add.at(b, self.c_neg, -c_i)
+        np.add.at(b, self.l_pos, -l_i)
+        np.add.at(b, self.l_neg, l_i)
+        return b[:self.size]
+
+    def solve(self, time, h, order):
+        """
+        Solves the system at the end of a time step, op-amp regions are
+        updated until they are consistent with the solution
+        Returns (numpy array, numpy array) - solution vector with ground (0)
+                as last element and the op-amp regions of the solution
+        """
+        regions = self.regions
+        for _ in range(MAX_CLAMP_ITERATIONS):
+            self.clamp_iterations += 1
+            x = self.factorize(h, order, regions).solve(
+                self.rhs(time, h, order, regions))
+            v = np.append(x, 0)
+            new_regions = self.amp_step_regions(
+                self.amp_amp * (v[self.amp_non_inv] - v[self.amp_inv]), 
+                regions, h)
+            if np.array_equal(new_regions, regions):
+                break
+            regions = new_regions
+        return v, regions
+
+    def operating_point(self, time=0.):
+        """
+        DC operating point: capacitors are open, inductors are shorts and the
+        sources are evaluated at time. Inductor currents are extra unknowns
+        after the branch currents, ground is moved after them and dropped 
+        from the system. The states of the reactive components and op-amps 
+        are set to the solution.
+        time : float - time of the source values in sec
+        """
+        n_l = len(self.l_pos)
+        size = self.size + n_l
+        
+        def unknown(index):
+            return np.where(index == self.ground, size, index)
+            
+        # inductors are 0 V voltage sources
+        l_pos, l_neg = unknown(self.l_pos), unknown(self.l_neg)
+        l_branch = self.size + np.arange(n_l)
+        ones = np.ones(n_l)
+        stamps = [self.static_stamp, self.amp_stamp(self.regions)]
+        rows = np.concatenate([unknown(s[0]) for s in stamps] + 
+                              [l_pos, l_neg, l_branch, l_branch])
+        cols = np.concatenate([unknown(s[1]) for s in stamps] + 
+                              [l_branch, l_branch, l_pos, l_neg])
+        system = system_matrix(self.backend, rows, cols, size)
+        
+        regions = self.regions
+        for _ in range(MAX_CLAMP_ITERATIONS):
+            values = np.concatenate((self.static_stamp[2], 
+                                     self.amp_stamp(regions)[2], 
+                                     ones, -ones, ones, -ones))
+            b = self.source_vector(time, regions, self.size)
+            x = system.factorize(values).solve(
+                np.concatenate((b[:self.size], np.zeros(n_l))))
+            v = np.append(x[:self.size], 0)
+            new_regions = self.amp_regions(
+                self.amp_amp * (v[self.amp_non_inv] - v[self.amp_inv]))
+            if np.array_equal(new_regions, regions):
+                break
+            regions = new_regions
+            
+        self.c_v = v[self.c_pos] - v[self.c_neg]
+        self.c_i = np.zeros(len(self.c_c))
+        self.l_i = x[self.size:]
+        self.l_v = np.zeros(n_l)
+        self.amp_v_out = v[self.amp_out]
+        self.regions = regions
+        self.v = v
+        return v
+
+    def small_signal(self, frequencies):
+        """
+        AC analysis linearized around the operating point: op-amps are gain 
+        blocks in their operating point region, the admittance matrix 
+        Y = G + jwC + L^-1 / jw is solved in vectorized blocks of 
+        AC_BLOCK_SIZE frequencies (dense) or one frequency after the other 
+        (sparse)
+        frequencies : numpy array - frequencies in Hz
+        Returns numpy array - complex solution vectors with ground (0) as last 
+                element, shape (frequencies, unknowns + 1)
+        """
+        if not any(s.get_ac_voltage() for s in self.v_sources):
+            raise ValueError('circuit has no AC source')
+        self.operating_point()
+        
+        stamps = [self.static_stamp, self.amp_stamp(self.regions),
+                  conductance_stamp(self.c_pos, self.c_neg, self.c_c),
+                  conductance_stamp(self.l_pos, self.l_neg, 1 / self.l_l)]
+        system = system_matrix(self.backend, 
+                               np.concatenate([s[0] for s in stamps]),
+                               np.concatenate([s[1] for s in stamps]), 
+                               self.size)
+        # masks of the conductance, capacitance and inverse inductance values
+        kind = np.concatenate([np.full(len(s[2]), k) 
+                               for k, s in zip((0, 0, 1, 2), stamps)])
+        values = np.concatenate([s[2] for s in stamps])
+        g, c, l = [np.where(kind == k, values, 0) for k in range(3)]
+        
+        b = np.zeros(self.size, dtype=complex)
+        b[self.vs_branch] = [s.get_ac_voltage() for s in self.v_sources]
+        w = 2j * np.pi * np.asarray(frequencies, dtype=float)
+        if self.backend == SPARSE:
+            x = np.array([system.factorize(g + w_k * c + l / w_k).solve(b)
+                          for w_k in w]).reshape(len(w), self.size)
+        else:
+            g_m, c_m, l_m = (system.assemble(m) for m in (g, c, l))
+            # the matrices of a block take (block, size, size) values, the 
+            # memory use does not grow with the number of frequencies
+            x = np.empty((len(w), self.size), dtype=complex)
+            for first in range(0, len(w), AC_BLOCK_SIZE):
+                w_b = w[first:first + AC_BLOCK_SIZE, np.newaxis, np.newaxis]
+                y = g_m + w_b * c_m + l_m / w_b
+                b_b = np.broadcast_to(b, y.shape[:2])[..., np.newaxis]
+                x[first:first + len(w_b)] = np.linalg.solve(y, b_b)[..., 0]
+        return np.concatenate((x, np.zeros((len(x), 1))), axis=1)
+
+    def accept(self, v, regions, h, order):
+        """
+        Accepts the solution of a time step and updates the states of
+        reactive components
+        """
+        c_g, l_g = self.companion_conductances(h, order)
+
+        c_v = v[self.c_pos] - v[self.c_neg]
+        c_i = c_g * (c_v - self.c_v)
+        if order == 2:
+            c_i -= self.c_i
+        self.c_v, self.c_i = c_v, c_i
+
+        l_v = v[self.l_pos] - v[self.l_neg]
+        l_i = self.l_i + l_g * l_v
+        if order == 2:
+            l_i += l_g * self.l_v
+        self.l_v, self.l_i = l_v, l_i
+
+        self.amp_v_out = v[self.amp_out]
+        self.regions = regions
+        self.v = v
+        self.steps += 1
+
+    def order(self, after_breakpoint):
+        """
+        Returns the integration order of a step: the first step and the steps
+        after breakpoints are backward Euler, since the capacitor current
+        history of the trapezoidal rule is not valid across a discontinuity
+        """
+        if after_breakpoint or self.method == BACKWARD_EULER:
+            return 1
+        return 2
+
+    def source_time(self, time, h, at_breakpoint):
+        """
+        Returns the time when sources are evaluated at the end of a step,
+        a step which ends on a breakpoint uses the values before it
+        """
+        if at_breakpoint:
+            return time - BREAKPOINT_TOLERANCE * h
+        return time
+
+    def step(self, time, h, after_breakpoint=False, at_breakpoint=False):
+        """
+        Single time step, updates the states of reactive components
+        time : float - time at the end of the step in sec
+        h : float - time step in sec
+        after_breakpoint : bool - the step starts at a breakpoint
+        at_breakpoint : bool - the step ends at a breakpoint
+        """
+        order = self.order(after_breakpoint)
+        v, regions = self.solve(self.source_time(time, h, at_breakpoint),
+                                h, order)
+        self.accept(v, regions, h, order)
+
+    def record(self, time):
+        """Writes back the solution and records the measurements"""
+        self.update_components()
+        for mi in self.comp_list.measuring_instruments:
+            mi.simulation_step(time)
+
+    def run(self, simulation_time, h, breakpoints, progress=None):
+        """
+        Simulates with fixed time steps and records the measurements
+        Breakpoints are inserted into the time grid k * h
+        simulation_time : float - simulation time length in sec
+        h : float - time step in sec
+        breakpoints : BreakpointScheduler - discontinuities of the sources
+        progress : Progress - optional, updated with the simulated time in 
+                              usec after every step
+        Returns numpy array - end time of every step in sec
+        """
+        time = []
+        t = 0.
+        k = 1
+        steps = int(round(simulation_time / h))
+        # the first step has no capacitor current history
+        after_breakpoint = True
+        on_grid = True
+        while k <= steps:
+            t_next = k * h
+            h_step = h if on_grid else t_next - t
+            breakpoint = breakpoints.next_after(t, BREAKPOINT_TOLERANCE * h)
+            on_grid = breakpoint >= t_next - BREAKPOINT_TOLERANCE * h
+            if on_grid:
+                k += 1
+            else:
+                t_next = breakpoint
+                h_step = t_next - t
+            at_breakpoint = abs(t_next - breakpoint) <= BREAKPOINT_TOLERANCE * h
+            self.step(t_next, h_step, after_breakpoint, at_breakpoint)
+            after_breakpoint = at_breakpoint
+            t = t_next
+            time.append(t)
+            self.record(t)
+            if progress is not None:
+                progress(t * 1e6)
+        return np.array(time)
+
+    def run_adaptive(self, simulation_time, h_min, h_max, reltol, abstol,
+                     breakpoints, progress=None):
+        """
+        Simulates with adaptive time steps and records the measurements
+        The local truncation error is estimated by the difference of the
+        solution and its quadratic extrapolation (predictor) from the former
+        three time points. Steps with error above reltol * |v| + abstol, or with
+        op-amp region transitions are rejected and repeated with half step,
+        steps with small error are doubled. Steps are h_min * 2^k, so the
+        factorizations are reused. Steps land exactly on breakpoints and
+        restart from h_min after them.
+        simulation_time : float - simulation time length in sec
+        h_min : float - minimum time step in sec
+        h_max : float - maximum time step in sec
+        reltol : float - relative tolerance of junction voltages
+        abstol : float - absolute tolerance of junction voltages in V
+        breakpoints : BreakpointScheduler - discontinuities of the sources
+        progress : Progress - optional, updated with the simulated time in 
+                              usec after every accepted step
+        Returns numpy array - end time of every accepted step in sec
+        """
+        time = []
+        t = 0.
+        h = h_min
+        history = []
+        while t < simulation_time * (1 - 1e-12):
+            breakpoint = breakpoints.next_after(t, BREAKPOINT_TOLERANCE * h)
+            t_stop = min(breakpoint, simulation_time)
+            h_step = h
+            at_breakpoint = False
+            if t + h * (1 + BREAKPOINT_TOLERANCE) >= t_stop:
+                h_step = t_stop - t
+                at_breakpoint = t_stop == breakpoint
+            v, regions = self.solve(self.source_time(t + h_step, h_step,
+                                                     at_breakpoint),
+                                    h_step, self.order(not history))
+            ratio = 1
+            if len(history) == 3:
+                v_0 = history[-1][1]
+                predicted = extrapolate(history, t + h_step)
+                error = np.abs(v[:self.n] - predicted[:self.n])
+                tolerance = reltol * np.maximum(np.abs(v[:self.n]),
+                                                np.abs(v_0[:self.n])) + abstol
+                ratio = np.max(error / tolerance, initial=0)
+            event = not np.array_equal(regions, self.regions)
+            if (ratio > 1 or event) and h > h_min:
+                self.rejected_steps += 1
+                h = max(h / 2, h_min)
+                continue
+
+            self.accept(v, regions, h_step, self.order(not history))
+            t += h_step
+            time.append(t)
+            self.record(t)
+            if progress is not None:
+                progress(t * 1e6)
+            if at_breakpoint:
+                # the waveforms are not smooth across the breakpoint
+                history = []
+                h = h_min
+                continue
+            history = history[-2:] + [(t, v)]
+            if ratio < 0.125 and h * 2 <= h_max:
+                h *= 2
+        return np.array(time)
+
+    def update_components(self):
+        """Writes the solution back into the junction and component objects"""
+        v = self.v
+        # Python floats, the object engine steps slower with numpy scalars
+        for k, j in enumerate(self.junction_list):
+            j.v = float(v[k])
+        r_i = (v[self.r_pos] - v[self.r_neg]) * self.r_g
+        for r, i in zip(self.comp_list.resistors, r_i):
+            r.i = float(i)
+        for c, c_v in zip(self.comp_list.capacitors, self.c_v):
+            c.v = float(c_v)
+        for l, l_i in zip(self.comp_list.inductors, self.l_i):
+            l.i = float(l_i)
+        for a, v_out in zip(self.amplifiers, self.amp_v_out):
+            a.v_out = float(v_out)
@@ -0,0 +1,118 @@
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from .simulation_settings import NETLIST_CACHE_SIZE
+
+
+def topology_key(comp_list):
+    """
+    Returns the hash of the circuit topology: the type, name and junctions of 
+    every component and the measured component of every instrument, in the 
+    order they were added
+    comp_list : ComponentList - components of the circuit
+    """
+    items = [(type(c).__module__, type(c).__qualname__, c.name, 
+              tuple(getattr(c, 'junction_names', {}).items()),
+              getattr(c, 'resistor_name', None))
+             for c in comp_list.components + comp_list.measuring_instruments]
+    return hashlib.sha1(repr(items).encode()).hexdigest()
+
+
+class CompiledNetlist:
+    """
+    Compilation results of a circuit topology, shared by every circuit with 
+    the same topology
+    key : str - topology hash, see topology_key()
+    junction_names : list - junction names in the order of connect_circuit
+    engines : dict - key: engine -> value: dict of the compiled topology 
+                     arrays of the engine
+    factorizations : tuple - (key, dict) the system matrix factorizations of 
+                     the last MNA parameter values, they are not saved on disk
+    """
+    
+    def __init__(self, key, junction_names):
+        self.key = key
+        self.junction_names = junction_names
+        self.engines = {}
+        self.factorizations = (None, {})
+        self.modified = True
+        
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['factorizations'] = (None, {})
+        return state
+        
+    def add_engine(self, engine, topology):
+        self.engines[engine] = topology
+        self.modified = True
+        
+    def get_factorizations(self, key):
+        """
+        Returns the factorization cache of the given parameter values, the 
+        factorizations of former parameter values are dropped
+        """
+        if self.factorizations[0] != key:
+            self.factorizations = (key, {})
+        return self.factorizations[1]
+        
+
+class NetlistCache:
+    """
+    Least recently used cache of compiled netlists, optionally also saved 
+    into a directory, so later processes can load them
+    """
+    
+    def __init__(self, size=NETLIST_CACHE_SIZE, directory=None):
+        """
+        size : int - maximum number of netlists in memory
+        directory : str - optional directory of the netlist files
+        """
+        self.size = size
+        self.directory = directory
+        self.netlists = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+    def path(self, key):
+        return os.path.join(self.directory, key + '.netlist')
+        
+    def get(self, key):
+        """Returns the netlist of the topology hash, or None"""
+        if key in self.netlists:
+            self.netlists.move_to_end(key)
+            self.hits += 1
+            return self.netlists[key]
+        if self.directory is not None and os.path.exists(self.path(key)):
+            with open(self.path(key), 'rb') as f:
+                netlist = pickle.load(f)
+            netlist.modified = False
+            self.put(netlist)
+            self.hits += 1
+            return netlist
+        self.misses += 1
+        return None
+    
+    def put(self, netlist):
+        """Stores the netlist, and saves it if it was modified"""
+        self.netlists[netlist.key] = netlist
+        self.netlists.move_to_end(netlist.key)
+        while len(self.netlists) > self.size:
+            self.netlists.popitem(last=False)
+        if self.directory is not None and (
+                netlist.modified or not os.path.exists(self.path(netlist.key))):
+            os.makedirs(self.directory, exist_ok=True)
+            # written under a temporary name, so readers never see a part
+            temporary = self.path(netlist.key) + '.' + str(os.getpid())
+            with open(temporary, 'wb') as f:
+                pickle.dump(netlist, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self.path(netlist.key))
+        netlist.modified = False
+        
+    def clear(self):
+        """Clears the memory cache, saved netlists are kept"""
+        self.netlists.clear()
+        
+
+# cache of every circuit
+netlist_cache = NetlistCache()
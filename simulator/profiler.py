@@ -0,0 +1,99 @@
+from time import perf_counter
+
+
+class Profiler:
+    """
+    Accumulates the wall time and the number of calls of the phases of a
+    simulation (e.g. sources, resistors, junctions) and of the component
+    classes, see Circuit.simulate(..., profile=True)
+    Only profiled runs use it, so it costs nothing when it is disabled.
+    """
+
+    def __init__(self, engine):
+        """
+        engine : str - simulation engine
+        """
+        self.engine = engine
+        # key: phase or class name -> value: [time in sec, number of calls]
+        self.phases = {}
+        self.classes = {}
+        self.solver = dict(steps=0, rejected_steps=0, factorizations=0,
+                           clamp_iterations=0)
+        self.start = perf_counter()
+        self.wall_time = None
+
+    @staticmethod
+    def add(table, name, seconds, calls=1):
+        entry = table.setdefault(name, [0., 0])
+        entry[0] += seconds
+        entry[1] += calls
+
+    def call(self, phase, objects, method, *args):
+        """
+        Calls a method of every object, the time is added to the phase and
+        to the class of the objects
+        """
+        total = 0.
+        for o in objects:
+            start = perf_counter()
+            getattr(o, method)(*args)
+            seconds = perf_counter() - start
+            total += seconds
+            self.add(self.classes, type(o).__name__, seconds)
+        self.add(self.phases, phase, total)
+
+    def timed(self, function, phase):
+        """Returns the function which adds its wall time to the phase"""
+        def timed_function(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(self.phases, phase, perf_counter() - start)
+        return timed_function
+
+    def stop(self, **solver):
+        """
+        Ends the profiled run
+        **solver : dict - solver statistics, e.g. steps=1000
+        """
+        self.wall_time = perf_counter() - self.start
+        self.solver.update(solver)
+
+    def summary(self):
+        """
+        Returns dict - 'engine', 'wall_time' (sec), 'phases' and 'classes':
+                key: name -> value: dict of 'time' (sec), 'calls' and
+                'fraction' of the wall time, 'solver': statistics
+        """
+        wall_time = (perf_counter() - self.start if self.wall_time is None
+                     else self.wall_time)
+
+        def entries(table):
+            return {name: dict(time=seconds, calls=calls,
+                               fraction=seconds / wall_time if wall_time else 0.)
+                    for name, (seconds, calls) in table.items()}
+
+        return dict(engine=self.engine, wall_time=wall_time,
+                    phases=entries(self.phases),
+                    classes=entries(self.classes),
+                    solver=dict(self.solver))
+
+    def table(self):
+        """Returns the summary as a text table"""
+        summary = self.summary()
+        lines = ['%s engine, wall time %.3f s' % (summary['engine'],
+                                                  summary['wall_time'])]
+        for title in ('phases', 'classes'):
+            if not summary[title]:
+                continue
+            lines.append('%-24s %10s %7s %12s' % (title, 'time [s]', '%',
+                                                  'calls'))
+            for name, entry in sorted(summary[title].items(),
+                                      key=lambda item: -item[1]['time']):
+                lines.append('%-24s %10.4f %7.1f %12d' % (
+                    name, entry['time'], 100 * entry['fraction'],
+                    entry['calls']))
+        lines.append(', '.join('%s: %d' % item
+                               for item in summary['solver'].items()))
+        return '\n'.join(lines)
@@ -0,0 +1,123 @@
+import numpy as np
+
+
+class SimulationResult:
+    """
+    Measurement results of a transient simulation
+    time : TimeGrid or numpy array - time points of the simulation steps in 
+           sec, explicit engines compute them on demand from the step index
+    measurements : dict - key: instrument name -> value: numpy array
+    times : dict - key: instrument name -> value: numpy array of the sample 
+                   times in sec (differs from time with decimation)
+    measurement_types : dict - key: instrument name -> value: 'V' or 'I'
+    voltages, currents : dict - measurements of 'V' and 'I' instruments
+    profile : dict - summary of a profiled run, see 
+                     Circuit.simulate(..., profile=True), else None
+    """
+    
+    def __init__(self, time, instruments):
+        """
+        time : TimeGrid or numpy array - time points of the simulation steps
+        instruments : list - measuring instruments of the simulated circuit
+        """
+        self.time = time
+        self.measurements = {}
+        self.times = {}
+        self.measurement_types = {}
+        for mi in instruments:
+            self.measurements[mi.name] = mi.get_measurements()
+            self.times[mi.name] = mi.get_times()
+            self.measurement_types[mi.name] = mi.measurement_type
+        self.voltages = self.of_type('V')
+        self.currents = self.of_type('I')
+        self.profile = None
+        
+    def of_type(self, measurement_type):
+        return {name: values for name, values in self.measurements.items()
+                if self.measurement_types[name] == measurement_type}
+        
+    def __getitem__(self, name):
+        return self.measurements[name]
+    
+    def __contains__(self, name):
+        return name in self.measurements
+        
+    def plot(self):
+        """Plots voltage and current measurement results"""
+        # imported only when needed, it is slow and requires a display
+        import matplotlib.pyplot as plt
+        
+        # plt.figure(dpi=300) # for high resolution graphs
+        
+        plt.subplot(2, 1, 1)
+        plt.title('Measurements')
+        plt.xlabel('time [usec]')
+        plt.ylabel('voltage [V]')
+        for name, values in self.voltages.items():
+            plt.plot(np.divide(self.times[name], 1e-6), values, label=name)
+        plt.legend()
+        
+        plt.subplot(2, 1, 2)
+        plt.xlabel('time [usec]')
+        plt.ylabel('current [A]')
+        for name, values in self.currents.items():
+            plt.plot(np.divide(self.times[name], 1e-6), values, label=name)
+        plt.legend()
+        plt.gcf().align_ylabels()               
+        
+        plt.show()   
+
+
+class ACResult:
+    """
+    Results of an AC small-signal analysis
+    frequencies : numpy array - frequencies in Hz
+    measurements : dict - key: instrument name -> value: complex numpy array
+    magnitude : dict - key: instrument name -> value: numpy array of the 
+                       magnitude per AC source amplitude
+    phase : dict - key: instrument name -> value: numpy array of the phase 
+                   in degrees
+    measurement_types : dict - key: instrument name -> value: 'V' or 'I'
+    """
+    
+    def __init__(self, frequencies, measurements, measurement_types):
+        self.frequencies = frequencies
+        self.measurements = measurements
+        self.measurement_types = measurement_types
+        self.magnitude = {name: np.abs(values) 
+                          for name, values in measurements.items()}
+        self.phase = {name: np.angle(values, deg=True) 
+                      for name, values in measurements.items()}
+        
+    def magnitude_db(self, name):
+        """Returns the magnitude of the measurement in dB"""
+        return 20 * np.log10(self.magnitude[name])
+        
+    def __getitem__(self, name):
+        return self.measurements[name]
+    
+    def __contains__(self, name):
+        return name in self.measurements
+    
+    def plot(self):
+        """Bode plot of the measurements"""
+        # imported only when needed, it is slow and requires a display
+        import matplotlib.pyplot as plt
+        
+        plt.subplot(2, 1, 1)
+        plt.title('AC analysis')
+        plt.ylabel('magnitude [dB]')
+        for name in self.measurements:
+            plt.semilogx(self.frequencies, self.magnitude_db(name), 
+                         label=name)
+        plt.legend()
+        
+        plt.subplot(2, 1, 2)
+        plt.xlabel('frequency [Hz]')
+        plt.ylabel('phase [deg]')
+        for name in self.measurements:
+            plt.semilogx(self.frequencies, self.phase[name], label=name)
+        plt.legend()
+        plt.gcf().align_ylabels()
+        
+        plt.show()
@@ -5,8 +5,60 @@ DELTA_TIME = 1e-10
 # Junction parasitic capacitance in farad
 C_JUNCTION = 1e-9
 
-# Maximum output voltage change of operational amplifiers during one time step
-AMP_MAX_DELTA_V = 1e-3 
+# Default slew rate (maximum output voltage change speed) of operational 
+# amplifiers in V/usec
+AMP_SLEW_RATE = 10.
 
-  
+# Default time step of the modified nodal analysis (MNA) transient in sec
+MNA_TIME_STEP = 1e-8
 
+# Relative and absolute (V) junction voltage tolerances of the adaptive time 
+# step control of the MNA transient
+RELTOL = 1e-3
+ABSTOL = 1e-6
+
+# Conductance in siemens connected from every junction to ground in the MNA
+# solver, keeps the matrix regular when a junction has no DC path to ground
+GMIN = 1e-12
+
+# Maximum number of op-amp region updates (clamping iterations) in one step
+MAX_CLAMP_ITERATIONS = 20
+
+# Maximum number of system matrix factorizations cached by the MNA solver
+MAX_FACTORIZATIONS = 32
+
+# Number of junctions from which engine='auto' selects the 'numpy' engine, 
+# below it the per-step overhead of the array operations makes the 'object' 
+# engine faster
+NUMPY_ENGINE_MIN_NODES = 1000
+
+# Number of MNA unknowns from which the sparse matrix backend is used, if 
+# SciPy is installed
+SPARSE_THRESHOLD = 200
+
+# Number of frequencies solved together in one vectorized block by the dense 
+# AC analysis, bounds the memory of the stacked admittance matrices
+AC_BLOCK_SIZE = 64
+
+# Time steps closer to a source breakpoint than this fraction of the time step
+# land on the breakpoint
+BREAKPOINT_TOLERANCE = 1e-6
+
+# Number of compiled netlists kept in the memory cache
+NETLIST_CACHE_SIZE = 16
+
+# Minimum wall time between the snapshots of a transient on disk in sec
+SNAPSHOT_INTERVAL = 5.
+
+# Simulated time between the checks whether a snapshot is due in usec
+SNAPSHOT_CHECK_INTERVAL = 1.
+
+# Minimum wall time between progress reports in sec
+PROGRESS_INTERVAL = 0.5
+
+# Number of explicit simulation steps advanced in one chunk, the progress is 
+# updated and the measurements are recorded after every chunk
+STEP_CHUNK_SIZE = 4096
+
+# Number of samples in one chunk of measurement storage
+MEASUREMENT_CHUNK_SIZE = 65536
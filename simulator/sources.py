@@ -1,10 +1,80 @@
 import math
-from .components import Component
+import os
+import numpy as np
+from .components import Component, slot_state
 
 
 class Source():
     """Base model of voltage and current sources"""
     
+    __slots__ = ()
+    
+    # stepping phase, see component_list.PHASES
+    PHASE = 'sources'
+    
+    # the output depends on time, the explicit engines compute it for a 
+    # chunk of steps at once, see prepare()
+    TIME_DEPENDENT = False
+    
+    # iterator of the precomputed output voltages of the current chunk
+    waveform = None
+    
+    def prepare(self, times):
+        """
+        Computes the output voltages of a chunk of steps in one vectorized 
+        call, simulation_step() then reads them step by step
+        times : numpy array - time points of the steps in sec
+        """
+        self.waveform = iter(self.get_voltages(times).tolist())
+        
+    def release(self):
+        """Drops the precomputed output voltages"""
+        self.waveform = None
+        
+    def next_voltage(self, time):
+        """
+        Returns the output voltage of the current step, precomputed or at the 
+        given time in sec
+        """
+        if self.waveform is None:
+            return self.get_voltage(time)
+        return next(self.waveform)
+    
+    def make_voltage_step(self):
+        """
+        Returns the step function of a voltage source whose output is read 
+        with next_voltage(), the pins are bound to closure variables
+        """
+        pos, neg = self.pos, self.neg
+        next_voltage = self.next_voltage
+        
+        def step(time):
+            pos.v = neg.v + next_voltage(time)
+        return step
+    
+    def get_voltages(self, times):
+        """
+        Returns the output voltages at the time points in sec, child classes 
+        overwrite it with a vectorized computation
+        """
+        times = np.asarray(times, dtype=float).tolist()
+        return np.array([self.get_voltage(t) for t in times], dtype=float)
+    
+    def get_breakpoints(self, t_start, t_stop):
+        """
+        Returns the times of output discontinuities in (t_start, t_stop]
+        t_start : float - start time in sec
+        t_stop : float - stop time in sec
+        """
+        return np.zeros(0)
+    
+    def get_ac_voltage(self):
+        """
+        Returns the amplitude of the small-signal excitation in the AC 
+        analysis, 0 for sources which are only a bias
+        """
+        return 0.
+    
     def reset_current(self):
         self.pos.reset_current()
         self.neg.reset_current()
@@ -13,6 +83,8 @@ class Source():
 class DCVoltageSource(Component, Source):
     """Constant voltage source"""
     
+    __slots__ = ('v', 'pos', 'neg')
+    
     def __init__(self, name, v, pos, neg):
         """
         name : str - name of source
@@ -23,14 +95,33 @@ class DCVoltageSource(Component, Source):
         Component.__init__(self, name, pos=pos, neg=neg)
         self.v = v
         
+    def get_voltage(self, *args):
+        return self.v
+    
+    def get_voltages(self, times):
+        """Returns the output voltages at the time points in sec"""
+        return np.full(np.shape(times), self.v, dtype=float)
+        
     def simulation_step(self, *args):
         """Outputs constant voltage"""
         self.pos.set_voltage(self.neg.v + self.v)    
+        
+    def make_step(self):
+        pos, neg = self.pos, self.neg
+        
+        def step(time):
+            pos.v = neg.v + self.v
+        return step
 
 
 class SquareWaveSource(Component, Source):
     "Square wave source with configurable duty cycle"
     
+    __slots__ = ('v_hi', 'v_lo', 't_period', 'duty_cycle', 'waveform', 'pos', 
+                 'neg')
+    
+    TIME_DEPENDENT = True
+    
     def __init__(self, name, v_hi, v_lo, t_period, duty_cycle, pos, neg):
         """
         name : str - name of source
@@ -47,18 +138,45 @@ class SquareWaveSource(Component, Source):
         self.v_lo = v_lo
         self.t_period = t_period * 1e-6
         self.duty_cycle = duty_cycle / 100
+        self.waveform = None
         
-    def simulation_step(self, time):
+    # overwrite
+    def get_breakpoints(self, t_start, t_stop):
+        """Returns the times of rising and falling edges in (t_start, t_stop]"""
+        cycles = np.arange(np.floor(t_start / self.t_period), 
+                           np.floor(t_stop / self.t_period) + 1)
+        rising = cycles * self.t_period
+        falling = rising + self.t_period * self.duty_cycle
+        edges = np.unique(np.concatenate((rising, falling)))
+        return edges[(edges > t_start) & (edges <= t_stop)]
+        
+    def get_voltage(self, time):
+        """Returns output voltage at the given time in sec"""
         if time % self.t_period <= self.t_period * self.duty_cycle:
-            v = self.v_hi  
+            return self.v_hi  
         else:
-            v = self.v_lo
-        self.pos.set_voltage(self.neg.v + v)
+            return self.v_lo
+        
+    def get_voltages(self, times):
+        """Returns the output voltages at the time points in sec"""
+        times = np.asarray(times)
+        return np.where(times % self.t_period <= self.t_period * self.duty_cycle,
+                        float(self.v_hi), float(self.v_lo))
+        
+    def simulation_step(self, time):
+        self.pos.set_voltage(self.neg.v + self.next_voltage(time))
+        
+    def make_step(self):
+        return self.make_voltage_step()
         
         
 class ACVoltageSource(Component, Source):
     """Sinusoidal voltage source with DC bias"""
     
+    __slots__ = ('v_rms', 't_period', 'dc', 'waveform', 'pos', 'neg')
+    
+    TIME_DEPENDENT = True
+    
     def __init__(self, name, v_rms, t_period, dc, pos, neg):
         """
         name : str - name of source
@@ -72,17 +190,221 @@ class ACVoltageSource(Component, Source):
         self.v_rms = v_rms
         self.t_period = t_period * 1e-6
         self.dc = dc
+        self.waveform = None
     
-    def simulation_step(self, time):
+    def get_voltage(self, time):
+        """Returns output voltage at the given time in sec"""
         v = math.sin((time % self.t_period) * 2 * math.pi / self.t_period)
         v *= self.v_rms
         v += self.dc
-        self.pos.set_voltage(self.neg.v + v)
+        return v
+    
+    def get_voltages(self, times):
+        """Returns the output voltages at the time points in sec"""
+        phase = (np.asarray(times) % self.t_period) * 2 * np.pi / self.t_period
+        return np.sin(phase) * self.v_rms + self.dc
+    
+    #override
+    def get_ac_voltage(self):
+        return self.v_rms
+    
+    def simulation_step(self, time):
+        self.pos.set_voltage(self.neg.v + self.next_voltage(time))
+        
+    def make_step(self):
+        return self.make_voltage_step()
+        
+        
+def pwl_points(points, name):
+    """
+    Returns (times in sec, voltages) - numpy arrays of PWL corner points
+    points : array like - (time in usec, voltage) rows
+    name : str - name of the source, used in error messages
+    """
+    points = np.array(points, dtype=float).reshape(-1, 2)
+    if len(points) == 0:
+        raise ValueError('PWL source ' + name + ' has no points')
+    if np.any(np.diff(points[:, 0]) < 0):
+        raise ValueError('the points of PWL source ' + name + 
+                         ' are not in time order')
+    return points[:, 0] * 1e-6, points[:, 1]
+
+
+def pwl_voltages(times, point_times, point_values):
+    """
+    Returns numpy array - piecewise linear voltages at the time points, 
+                          constant before the first and after the last point
+    times : numpy array - time points in sec
+    point_times, point_values : numpy array - corner points, see pwl_points()
+    """
+    times = np.asarray(times, dtype=float)
+    # np.interp would take the first of the points at the same time, the 
+    # voltage after a step is the one of the last point
+    k = np.searchsorted(point_times, times, side='right')
+    before = np.maximum(k - 1, 0)
+    after = np.minimum(k, len(point_times) - 1)
+    t0, t1 = point_times[before], point_times[after]
+    v0, v1 = point_values[before], point_values[after]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = np.where(t1 > t0, (times - t0) / (t1 - t0), 0.)
+    return v0 + fraction * (v1 - v0)
+
+
+def pwl_breakpoints(point_times, t_start, t_stop):
+    """Returns the times of the corner points in (t_start, t_stop]"""
+    times = np.unique(point_times)
+    return times[(times > t_start) & (times <= t_stop)]
+        
+        
+class PWLVoltageSource(Component, Source):
+    """Piecewise linear voltage source"""
+    
+    __slots__ = ('times', 'values', 'waveform', 'pos', 'neg')
+    
+    TIME_DEPENDENT = True
+    
+    def __init__(self, name, points, pos, neg):
+        """
+        name : str - name of source
+        points : list - (time in usec, voltage) corner points in increasing 
+                        time order, the voltage is linearly interpolated 
+                        between them and constant before the first and after 
+                        the last point. Two points at the same time are a 
+                        step.
+        pos : str - junction name connected to positive pin
+        neg : str - junction name connected to negative pin
+        """
+        Component.__init__(self, name, pos=pos, neg=neg)
+        self.times, self.values = pwl_points(points, name)
+        self.waveform = None
+        
+    # overwrite
+    def get_breakpoints(self, t_start, t_stop):
+        """Returns the times of the corner points in (t_start, t_stop]"""
+        return pwl_breakpoints(self.times, t_start, t_stop)
+    
+    def get_voltage(self, time):
+        """Returns output voltage at the given time in sec"""
+        return float(self.get_voltages([time])[0])
+    
+    def get_voltages(self, times):
+        """Returns the output voltages at the time points in sec"""
+        return pwl_voltages(times, self.times, self.values)
+    
+    def simulation_step(self, time):
+        self.pos.set_voltage(self.neg.v + self.next_voltage(time))
+        
+    def make_step(self):
+        return self.make_voltage_step()
+        
+        
+def load_stimulus(path):
+    """
+    Returns numpy array - samples of a '.npy' file (memory-mapped) or of a 
+                          comma separated '.csv' file
+    """
+    if os.path.splitext(path)[1].lower() == '.npy':
+        return np.load(path, mmap_mode='r')
+    return np.loadtxt(path, delimiter=',', dtype=float, ndmin=1)
+        
+        
+class FileVoltageSource(Component, Source):
+    """
+    Voltage source driven by a stimulus file
+    A file of uniformly sampled voltages stays memory-mapped and only the 
+    samples around the simulated steps are read, so stimuli larger than the 
+    memory can be used.
+    """
+    
+    __slots__ = ('path', 'sample_time', 'samples', 'times', 'values', 
+                 'waveform', 'pos', 'neg')
+    
+    TIME_DEPENDENT = True
+    
+    def __init__(self, name, path, pos, neg, sample_time=None):
+        """
+        name : str - name of source
+        path : str - '.npy' or '.csv' file: one column of voltage samples 
+                     with sample_time, else (time in usec, voltage) rows of 
+                     PWL corner points, see PWLVoltageSource
+        pos : str - junction name connected to positive pin
+        neg : str - junction name connected to negative pin
+        sample_time : float - time between the voltage samples in usec, the 
+                              first sample is at t = 0, the voltage is 
+                              linearly interpolated between the samples and 
+                              constant after the last one
+        """
+        Component.__init__(self, name, pos=pos, neg=neg)
+        self.path = path
+        self.sample_time = sample_time
+        self.waveform = None
+        self.load()
+        
+    def load(self):
+        """Opens the stimulus file"""
+        samples = load_stimulus(self.path)
+        self.samples, self.times, self.values = None, None, None
+        if self.sample_time is None:
+            if samples.ndim != 2 or samples.shape[1] != 2:
+                raise ValueError(self.path + ' must have (time, voltage) rows '
+                                 'without sample_time')
+            self.times, self.values = pwl_points(samples, self.name)
+        else:
+            if samples.ndim != 1 or len(samples) == 0:
+                raise ValueError(self.path + ' must have one column of '
+                                 'voltage samples with sample_time')
+            self.samples = samples
+            
+    def __getstate__(self):
+        # the stimulus is opened again instead of pickled
+        state = slot_state(self)
+        for name in ('samples', 'times', 'values', 'waveform'):
+            del state[name]
+        return state
+    
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self.waveform = None
+        self.load()
+        
+    # overwrite
+    def get_breakpoints(self, t_start, t_stop):
+        """Returns the times of the PWL corner points in (t_start, t_stop]"""
+        if self.times is None:
+            return np.zeros(0)
+        return pwl_breakpoints(self.times, t_start, t_stop)
+    
+    def get_voltage(self, time):
+        """Returns output voltage at the given time in sec"""
+        return float(self.get_voltages([time])[0])
+    
+    def get_voltages(self, times):
+        """Returns the output voltages at the time points in sec"""
+        if self.samples is None:
+            return pwl_voltages(times, self.times, self.values)
+        times = np.asarray(times, dtype=float)
+        if len(times) == 0:
+            return np.zeros(0)
+        # only the window of the samples around the time points is read
+        position = np.maximum(times / (self.sample_time * 1e-6), 0)
+        first = min(int(position.min()), len(self.samples) - 1)
+        stop = min(int(position.max()) + 2, len(self.samples))
+        window = np.asarray(self.samples[first:stop], dtype=float)
+        return np.interp(position - first, np.arange(len(window)), window)
+    
+    def simulation_step(self, time):
+        self.pos.set_voltage(self.neg.v + self.next_voltage(time))
+        
+    def make_step(self):
+        return self.make_voltage_step()
         
         
 class DCCurrentSource(Component, Source):
     """Constant current source"""
     
+    __slots__ = ('i', 'pos', 'neg')
+    
     def __init__(self, name, i, pos, neg):
         """
         name : str - name of source
@@ -97,6 +419,14 @@ class DCCurrentSource(Component, Source):
         """Outputs constant current"""
         self.pos.add_current(-self.i)
         self.neg.add_current(self.i)
+        
+    def make_step(self):
+        pos, neg = self.pos, self.neg
+        
+        def step(time):
+            pos.i += -self.i
+            neg.i += self.i
+        return step
     
     # overwrite
     def reset_current(self):
@@ -110,12 +440,28 @@ class DCCurrentSource(Component, Source):
 class GND(Component, Source):
     """Ground"""
     
+    __slots__ = ('gnd',)
+    
     def __init__(self, name, gnd):
         Component.__init__(self, name, gnd=gnd)
         
+    def get_voltage(self, *args):
+        return 0.
+    
+    def get_voltages(self, times):
+        """Returns the output voltages at the time points in sec"""
+        return np.zeros(np.shape(times))
+        
     def simulation_step(self, *args):
         self.gnd.set_voltage(0)  
         
+    def make_step(self):
+        gnd = self.gnd
+        
+        def step(time):
+            gnd.v = 0
+        return step
+        
     def reset_current(self):
         self.gnd.reset_current()
     
\ No newline at end of file
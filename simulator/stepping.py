@@ -0,0 +1,97 @@
+import numpy as np
+from .simulation_settings import DELTA_TIME
+
+
+def step_count(simulation_time):
+    """
+    Returns int - number of DELTA_TIME steps of a simulation
+    simulation_time : float - simulation time length in usec
+    """
+    # same count as np.arange(simulation_time * 1e-6, step=DELTA_TIME)
+    return max(0, int(np.ceil(simulation_time * 1e-6 / DELTA_TIME)))
+
+
+def step_chunks(count, size, boundary=None):
+    """
+    Splits the steps 0 ... count - 1 into consecutive chunks
+    count : int - number of steps
+    size : int - maximum number of steps in a chunk
+    boundary : int - optional, chunks also end after every boundary steps
+    Yields (first, stop) - step indices of the chunks, stop is exclusive
+    """
+    first = 0
+    while first < count:
+        stop = min(first + size, count)
+        if boundary:
+            stop = min(stop, (first // boundary + 1) * boundary)
+        yield first, stop
+        first = stop
+
+
+class TimeGrid(np.lib.mixins.NDArrayOperatorsMixin):
+    """
+    Time points k * DELTA_TIME of the explicit simulation steps
+    The time points are computed from the integer step index when they are
+    needed, so the grid takes no memory and has no accumulated float error.
+    Indexing returns the time of a step, slicing, np.asarray(), arithmetic 
+    operators and NumPy functions return numpy arrays.
+    """
+
+    def __init__(self, count, first=0):
+        """
+        count : int - number of steps
+        first : int - index of the first step
+        """
+        self.count = count
+        self.first = first
+
+    @classmethod
+    def of_duration(cls, simulation_time):
+        """simulation_time : float - simulation time length in usec"""
+        return cls(step_count(simulation_time))
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return (np.arange(*index.indices(self.count)) + self.first) * \
+                DELTA_TIME
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('step index out of range')
+        return (self.first + index) * DELTA_TIME
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:].astype(dtype or float, copy=False)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        # ufuncs and operators are computed on the array of the time points
+        inputs = tuple(np.asarray(x) if isinstance(x, TimeGrid) else x 
+                       for x in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    @property
+    def shape(self):
+        return (self.count,)
+
+    @property
+    def ndim(self):
+        return 1
+
+    def __repr__(self):
+        return 'TimeGrid(%d, first=%d)' % (self.count, self.first)
+
+    def steps(self, first):
+        """Returns TimeGrid - the steps from index first"""
+        first = min(max(first, 0), self.count)
+        return TimeGrid(self.count - first, self.first + first)
+
+    def chunks(self, size, boundary=None):
+        """
+        Yields (first, stop, times) - step index range of every chunk (see
+               step_chunks()) and numpy array of its time points in sec
+        """
+        for first, stop in step_chunks(self.count, size, boundary):
+            yield first, stop, self[first:stop]
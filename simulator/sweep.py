@@ -0,0 +1,252 @@
+import itertools
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .misc import Progress, progress_callback
+from .stepping import TimeGrid
+from .vector_engine import VectorEngine
+
+
+def grid_variants(grid):
+    """
+    Returns every combination of the parameter values
+    grid : dict - key: parameter name 'component.attribute' (e.g. 'R1.r')
+                  -> value: list of values
+    Returns list of dicts - key: parameter name -> value: parameter value
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) 
+            for values in itertools.product(*grid.values())]
+
+
+def monte_carlo_variants(circuit, tolerances, samples, seed=None,
+                         distribution='uniform', base_variants=None):
+    """
+    Returns random parameter variants around the nominal values
+    circuit : Circuit - circuit with the nominal component values
+    tolerances : dict - key: parameter name 'component.attribute' 
+                        -> value: tolerance in percentage
+    samples : int - number of variants (per base variant)
+    seed : int - seed of the random generator
+    distribution : str - 'uniform': values within +/- tolerance
+                         'normal': tolerance is 3 standard deviations
+    base_variants : list - optional variants (e.g. of grid_variants()) whose 
+                           values are used as nominal values
+    Returns list of dicts - key: parameter name -> value: parameter value
+    """
+    if distribution not in ('uniform', 'normal'):
+        raise ValueError('unknown distribution: ' + str(distribution))
+    rng = np.random.default_rng(seed)
+    components = circuit.comp_list.names
+    variants = []
+    for base in (base_variants or [{}]):
+        deviations = {}
+        for name, tolerance in tolerances.items():
+            if distribution == 'uniform':
+                deviations[name] = rng.uniform(-1, 1, samples)
+            else:
+                deviations[name] = rng.normal(0, 1 / 3, samples)
+            deviations[name] *= tolerance / 100
+        for k in range(samples):
+            variant = dict(base)
+            for name, deviation in deviations.items():
+                nominal = variant.get(name, get_parameter(components, name))
+                variant[name] = nominal * (1 + deviation[k])
+            variants.append(variant)
+    return variants
+
+
+def get_parameter(components, name):
+    component_name, attribute = name.rsplit('.', 1)
+    return getattr(components[component_name], attribute)
+
+
+def set_parameter(components, name, value):
+    component_name, attribute = name.rsplit('.', 1)
+    setattr(components[component_name], attribute, value)
+
+
+# the base circuit and simulation arguments of a worker process
+_worker = {}
+
+
+def _init_worker(circuit_pickle, simulation_time, kwargs):
+    """Unpickles the base circuit once per worker process"""
+    circuit = pickle.loads(circuit_pickle)
+    components = circuit.comp_list.names
+    _worker.update(circuit=circuit, components=components, 
+                   simulation_time=simulation_time, kwargs=kwargs)
+
+
+def _run_variant(variant):
+    """Simulates one variant, only the parameter deltas are sent per job"""
+    components = _worker['components']
+    nominal = {name: get_parameter(components, name) for name in variant}
+    try:
+        for name, value in variant.items():
+            set_parameter(components, name, value)
+        result = _worker['circuit'].simulate(_worker['simulation_time'], 
+                                             **_worker['kwargs'])
+    finally:
+        for name, value in nominal.items():
+            set_parameter(components, name, value)
+    return result
+
+
+class SweepResult:
+    """
+    Results of the variants of a parameter sweep
+    parameters : dict - key: parameter name -> value: numpy array of the 
+                        parameter value of every variant
+    results : list - SimulationResult of every variant, None for batch runs
+    time : numpy array - stacked time vectors, shape (variants, steps)
+    measurements, times : dict - key: instrument name -> value: stacked 
+                                 numpy array, shape (variants, samples)
+    shared_time : bool - the variants share one time axis, then time is 
+                         the TimeGrid of the steps and the arrays of times 
+                         have shape (samples,), see get_time(), get_times()
+    Arrays of different lengths (e.g. with adaptive time steps) are not 
+    stacked, they are kept as lists.
+    """
+    
+    def __init__(self, variants, time, measurement_types, measurements, 
+                 times, results=None, shared_time=False):
+        self.variants = variants
+        self.results = results
+        self.shared_time = shared_time
+        names = list(variants[0]) if variants else []
+        self.parameters = {name: np.array([v[name] for v in variants])
+                           for name in names}
+        self.time = time
+        self.measurement_types = measurement_types
+        self.measurements = measurements
+        self.times = times
+        
+    @classmethod
+    def from_results(cls, variants, results):
+        """Stacks the SimulationResults of the variants"""
+        measurement_types = results[0].measurement_types if results else {}
+        return cls(variants, 
+                   cls.stack([r.time for r in results]),
+                   measurement_types,
+                   {name: cls.stack([r[name] for r in results])
+                    for name in measurement_types},
+                   {name: cls.stack([r.times[name] for r in results])
+                    for name in measurement_types},
+                   results)
+        
+    @staticmethod
+    def stack(arrays):
+        if len({len(a) for a in arrays}) == 1:
+            return np.stack(arrays)
+        return arrays
+    
+    def __getitem__(self, name):
+        return self.measurements[name]
+    
+    def get_time(self):
+        """
+        Returns numpy array - time vectors of the variants, shape (variants, 
+        steps), a shared time axis is broadcast without copying it
+        """
+        if self.shared_time:
+            return self.broadcast(self.time)
+        return self.time
+    
+    def get_times(self, name):
+        """
+        Returns numpy array - sample times of the instrument in every 
+        variant, shape (variants, samples), shared sample times are 
+        broadcast without copying them
+        name : str - name of the measuring instrument
+        """
+        if self.shared_time:
+            return self.broadcast(self.times[name])
+        return self.times[name]
+    
+    def broadcast(self, times):
+        """Returns read-only view of times repeated for every variant"""
+        times = np.asarray(times)
+        return np.broadcast_to(times, (len(self.variants),) + times.shape)
+        
+
+def run_sweep(circuit, variants, simulation_time, workers=None, **kwargs):
+    """
+    Simulates the variants of a circuit in a process pool
+    The circuit is pickled once per worker, jobs only contain the parameter
+    values of the variant.
+    circuit : Circuit - base circuit
+    variants : list - dicts of parameter values, see grid_variants() and 
+                      monte_carlo_variants()
+    simulation_time : float - simulation time length in usec
+    workers : int - number of worker processes, default is the number of 
+                    CPUs, 0 simulates the variants in this process
+    **kwargs : dict - arguments of Circuit.simulate(), e.g. engine, 
+                      progress reports the finished variants
+    Returns SweepResult
+    """
+    if 'output' in kwargs:
+        raise ValueError('variants of a sweep can not stream to one output')
+    kwargs['plot'] = False
+    # workers would print their progress reports over each other, the 
+    # finished variants are reported by the sweep instead
+    progress = Progress(len(variants), 'Sweep', 
+                        progress_callback(kwargs.pop('progress', True)), 
+                        unit='variants')
+    kwargs['progress'] = False
+    circuit_pickle = pickle.dumps(circuit)
+    results = []
+    if workers == 0:
+        _init_worker(circuit_pickle, simulation_time, kwargs)
+        for variant in variants:
+            results.append(_run_variant(variant))
+            progress(len(results))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, 
+                                 initializer=_init_worker,
+                                 initargs=(circuit_pickle, simulation_time, 
+                                           kwargs)) as executor:
+            for result in executor.map(_run_variant, variants):
+                results.append(result)
+                progress(len(results))
+    progress.finish()
+    return SweepResult.from_results(variants, results)
+
+
+def run_batch(circuit, variants, simulation_time):
+    """
+    Simulates the variants of a circuit together in one vectorized pass
+    The state of the vector engine gets a leading variant axis, so every
+    array operation of a time step advances all variants at once. Only
+    component values may differ between the variants, the topology is shared.
+    circuit : Circuit - base circuit, it is not modified, the variants are
+                        simulated on a copy of it
+    variants : list - dicts of parameter values, see grid_variants() and 
+                      monte_carlo_variants()
+    simulation_time : float - simulation time length in usec
+    Returns SweepResult
+    """
+    components = circuit.comp_list.names
+    for variant in variants:
+        for name in variant:
+            # raises KeyError or AttributeError for unknown parameters
+            get_parameter(components, name)
+    
+    # connecting and binding the instruments would reset the junctions and 
+    # the recorded measurements of the base circuit
+    circuit = pickle.loads(pickle.dumps(circuit))
+    circuit.connect_circuit()
+    time = TimeGrid.of_duration(simulation_time)
+    circuit.init_measuring_instruments()
+    engine = VectorEngine(circuit.comp_list, circuit.junctions, variants, 
+                          circuit.netlist)
+    progress = Progress(len(time), 'Batch simulation')
+    engine.run(time, progress)
+    progress.finish()
+    
+    instruments = circuit.comp_list.measuring_instruments
+    # every variant is sampled at the same time points, they are shared
+    return SweepResult(variants, time,
+                       {mi.name: mi.measurement_type for mi in instruments},
+                       engine.batch_measurements, engine.batch_times, 
+                       shared_time=True)
@@ -0,0 +1,470 @@
+import numpy as np
+from .component_list import check_models
+from .measurement import Voltmeter, VSenseResistor, ISenseResistor
+from .simulation_settings import DELTA_TIME, C_JUNCTION, STEP_CHUNK_SIZE
+from .sources import (DCVoltageSource, SquareWaveSource, ACVoltageSource,
+                      DCCurrentSource, GND)
+
+
+def sequential_batches(reads, writes):
+    """
+    Splits a sequence of operations into consecutive batches which can be
+    executed as one vectorized operation and still give the same result as
+    executing the operations one after the other
+    reads : list - set of state keys read by each operation
+    writes : list - set of state keys written by each operation
+    Returns list of index arrays, one array per batch
+    """
+    batches = []
+    batch = []
+    written = set()
+    for k, (r, w) in enumerate(zip(reads, writes)):
+        if batch and (written & set(r) or written & set(w)):
+            batches.append(np.array(batch, dtype=int))
+            batch = []
+            written = set()
+        batch.append(k)
+        written |= set(w)
+    if batch:
+        batches.append(np.array(batch, dtype=int))
+    return batches
+
+
+def interleave(pos, neg):
+    """Returns [pos[0], neg[0], pos[1], neg[1], ...] along the last axis"""
+    pos, neg = np.asarray(pos), np.asarray(neg)
+    return np.stack((pos, neg), axis=-1).reshape(pos.shape[:-1] + (-1,))
+
+
+class VectorEngine:
+    """
+    Vectorized model of a connected circuit
+    The netlist is compiled once into NumPy arrays (junction voltages and
+    currents, component parameters and pin incidence indices), then every
+    simulation step is executed as a handful of array operations.
+    The steps follow the exact order of Circuit.simulation_step, therefore
+    the results are the same as the results of the object model.
+    Every array has a leading variant axis: topologically identical variants
+    of the circuit, which differ only in component values, are advanced
+    together by the same array operations.
+    """
+
+    # compiled arrays which depend only on the topology of the circuit
+    TOPOLOGY = ('zero', 'index', 'vs_pos', 'vs_neg', 'vs_batches', 
+                'vs_dc_index', 'sq_index', 'ac_index', 'wf_index', 'vs_reset', 
+                'is_nodes', 'amp_non_inv', 'amp_inv', 'amp_out', 
+                'amp_batches', 'r_pos', 'r_neg', 'r_nodes', 'l_pos', 'l_neg', 
+                'l_nodes', 'c_pos', 'c_neg', 'c_batches', 'c_pos_reset', 
+                'c_neg_reset', 'vm_index', 'vm_pos', 'vm_neg', 'ir_index', 
+                'ir', 'il_index', 'il')
+
+    # phases of a simulation step, see profile()
+    PHASES = ('sources', 'amplifiers', 'resistors', 'inductors', 
+              'capacitors', 'measurements', 'junctions')
+
+    def __init__(self, comp_list, junctions, variants=None, netlist=None):
+        """
+        comp_list : ComponentList - components of the circuit
+        junctions : dict - key: junction name -> value: Junction class
+        variants : list - optional, parameter values of the variants in dicts,
+                          key: 'component.attribute' (e.g. 'R1.r') -> value
+        netlist : CompiledNetlist - optional, the topology arrays are taken 
+                                    from it, or stored in it once compiled
+        """
+        check_models(comp_list, type(self).__name__)
+        self.comp_list = comp_list
+        self.batched = variants is not None
+        self.variants = [{}] if variants is None else variants
+        self.batch = len(self.variants)
+        self.junction_list = list(junctions.values())
+        self.v_sources = [s for s in comp_list.sources
+                          if not isinstance(s, DCCurrentSource)]
+        self.i_sources = [s for s in comp_list.sources
+                          if isinstance(s, DCCurrentSource)]
+
+        topology = None if netlist is None else netlist.engines.get('numpy')
+        # netlists saved by former versions may miss arrays
+        if topology is None or not set(self.TOPOLOGY) <= set(topology):
+            self.compile()
+            if netlist is not None:
+                netlist.add_engine('numpy', {name: getattr(self, name) 
+                                             for name in self.TOPOLOGY})
+        else:
+            self.__dict__.update(topology)
+        self.load_parameters()
+
+    def compile(self):
+        """Builds the incidence and batch arrays of the netlist"""
+        # the last node is a virtual zero potential node (reference of GND)
+        self.zero = len(self.junction_list)
+        self.index = {j.name: k for k, j in enumerate(self.junction_list)}
+        self.compile_sources()
+        self.compile_amplifiers()
+        self.compile_resistors()
+        self.compile_inductors()
+        self.compile_capacitors()
+        self.compile_measuring_instruments()
+
+    def nodes(self, components, pin):
+        """Returns junction indices of the given pin of the components"""
+        return np.array([self.index[c.junction_names[pin]]
+                         for c in components], dtype=int)
+
+    def parameter(self, components, attribute):
+        """
+        Returns the values of a component attribute in every variant
+        Returns numpy array - shape (variants, components)
+        """
+        values = [[variant.get(c.name + '.' + attribute, getattr(c, attribute))
+                   for c in components] for variant in self.variants]
+        return np.array(values, dtype=float).reshape(self.batch,
+                                                     len(components))
+
+    def compile_sources(self):
+        """
+        Voltage sources and GND set the voltage of their positive (gnd)
+        junction: v[pos] = v[neg] + emf
+        Current sources add currents to their junctions
+        """
+        pos, neg = [], []
+        for s in self.v_sources:
+            if isinstance(s, GND):
+                pos.append(self.index[s.junction_names['gnd']])
+                neg.append(self.zero)
+            else:
+                pos.append(self.index[s.junction_names['pos']])
+                neg.append(self.index[s.junction_names['neg']])
+        self.vs_pos = np.array(pos, dtype=int)
+        self.vs_neg = np.array(neg, dtype=int)
+        self.vs_batches = sequential_batches([{n} for n in neg],
+                                             [{p} for p in pos])
+        # constant part of emf, time dependent sources are computed per step
+        self.vs_dc_index = np.array(
+            [k for k, s in enumerate(self.v_sources)
+             if isinstance(s, DCVoltageSource)], dtype=int)
+        self.sq_index = np.array(
+            [k for k, s in enumerate(self.v_sources)
+             if isinstance(s, SquareWaveSource)], dtype=int)
+        self.ac_index = np.array(
+            [k for k, s in enumerate(self.v_sources)
+             if isinstance(s, ACVoltageSource)], dtype=int)
+        # every other source computes its output voltages itself, constant 
+        # ones included, GND outputs zero
+        self.wf_index = np.array(
+            [k for k, s in enumerate(self.v_sources) if not isinstance(
+                s, (DCVoltageSource, SquareWaveSource, ACVoltageSource, GND))],
+            dtype=int)
+
+        # junctions whose current is supplied by voltage sources
+        reset = []
+        for s in self.v_sources:
+            reset.extend(self.index[name] for name in s.get_junction_names())
+        self.vs_reset = np.array(reset, dtype=int)
+
+        self.is_nodes = interleave(self.nodes(self.i_sources, 'pos'),
+                                   self.nodes(self.i_sources, 'neg'))
+
+    def compile_amplifiers(self):
+        amplifiers = self.comp_list.amplifiers
+        self.amp_non_inv = self.nodes(amplifiers, 'non_inv')
+        self.amp_inv = self.nodes(amplifiers, 'inv')
+        self.amp_out = self.nodes(amplifiers, 'out')
+        self.amp_batches = sequential_batches(
+            [{a, b} for a, b in zip(self.amp_non_inv, self.amp_inv)],
+            [{o} for o in self.amp_out])
+
+    def compile_resistors(self):
+        resistors = self.comp_list.resistors
+        self.r_pos = self.nodes(resistors, 'pos')
+        self.r_neg = self.nodes(resistors, 'neg')
+        self.r_nodes = interleave(self.r_pos, self.r_neg)
+
+    def compile_inductors(self):
+        inductors = self.comp_list.inductors
+        self.l_pos = self.nodes(inductors, 'pos')
+        self.l_neg = self.nodes(inductors, 'neg')
+        self.l_nodes = interleave(self.l_pos, self.l_neg)
+
+    def compile_capacitors(self):
+        capacitors = self.comp_list.capacitors
+        self.c_pos = self.nodes(capacitors, 'pos')
+        self.c_neg = self.nodes(capacitors, 'neg')
+        self.c_batches = sequential_batches([{m} for m in self.c_neg],
+                                            [{p} for p in self.c_pos])
+        # every capacitor resets the currents of its junctions, so capacitors
+        # sharing a junction with a former capacitor read zero current there
+        reset = set()
+        self.c_pos_reset, self.c_neg_reset = [], []
+        for k, (p, m) in enumerate(zip(self.c_pos, self.c_neg)):
+            if p in reset:
+                self.c_pos_reset.append(k)
+            if m in reset:
+                self.c_neg_reset.append(k)
+            reset |= {p, m}
+
+    def compile_measuring_instruments(self):
+        """
+        Voltage measurements are computed as v[pos] - v[neg],
+        current measurements are read from the component current arrays
+        """
+        resistors = {id(r): k for k, r in enumerate(self.comp_list.resistors)}
+        inductors = {id(i): k for k, i in enumerate(self.comp_list.inductors)}
+
+        self.vm_index, vm_pos, vm_neg = [], [], []
+        self.ir_index, ir = [], []
+        self.il_index, il = [], []
+        for k, mi in enumerate(self.comp_list.measuring_instruments):
+            if isinstance(mi, Voltmeter):
+                self.vm_index.append(k)
+                vm_pos.append(self.index[mi.junction_names['pos']])
+                vm_neg.append(self.index[mi.junction_names['neg']])
+            elif isinstance(mi, VSenseResistor):
+                self.vm_index.append(k)
+                vm_pos.append(self.index[mi.resistor.junction_names['pos']])
+                vm_neg.append(self.index[mi.resistor.junction_names['neg']])
+            elif isinstance(mi, ISenseResistor) and id(mi.resistor) in resistors:
+                self.ir_index.append(k)
+                ir.append(resistors[id(mi.resistor)])
+            elif isinstance(mi, ISenseResistor) and id(mi.resistor) in inductors:
+                self.il_index.append(k)
+                il.append(inductors[id(mi.resistor)])
+            else:
+                raise ValueError('measuring instrument ' + mi.name +
+                                 ' is not supported by the vector engine')
+        self.vm_index = np.array(self.vm_index, dtype=int)
+        self.ir_index = np.array(self.ir_index, dtype=int)
+        self.il_index = np.array(self.il_index, dtype=int)
+        self.vm_pos = np.array(vm_pos, dtype=int)
+        self.vm_neg = np.array(vm_neg, dtype=int)
+        self.ir = np.array(ir, dtype=int)
+        self.il = np.array(il, dtype=int)
+
+    def load_parameters(self):
+        """Loads the component values and the initial state of every variant"""
+        self.v = np.zeros((self.batch, self.zero + 1))
+        self.i = np.zeros((self.batch, self.zero + 1))
+        for k, j in enumerate(self.junction_list):
+            self.v[:, k] = j.v
+            self.i[:, k] = j.i
+
+        v_sources = self.v_sources
+        self.vs_emf = np.zeros((self.batch, len(v_sources)))
+        self.vs_emf[:, self.vs_dc_index] = self.parameter(
+            [v_sources[k] for k in self.vs_dc_index], 'v')
+        sq = [v_sources[k] for k in self.sq_index]
+        self.sq_v_hi = self.parameter(sq, 'v_hi')
+        self.sq_v_lo = self.parameter(sq, 'v_lo')
+        self.sq_period = self.parameter(sq, 't_period')
+        self.sq_duty = self.parameter(sq, 'duty_cycle')
+        ac = [v_sources[k] for k in self.ac_index]
+        self.ac_v_rms = self.parameter(ac, 'v_rms')
+        self.ac_period = self.parameter(ac, 't_period')
+        self.ac_dc = self.parameter(ac, 'dc')
+        is_i = self.parameter(self.i_sources, 'i')
+        self.is_currents = interleave(-is_i, is_i)
+
+        amplifiers = self.comp_list.amplifiers
+        self.amp_amp = self.parameter(amplifiers, 'amp')
+        self.amp_v_max = self.parameter(amplifiers, 'v_max')
+        self.amp_v_min = self.parameter(amplifiers, 'v_min')
+        self.amp_max_delta_v = (self.parameter(amplifiers, 'slew_rate') * 
+                                1e6 * DELTA_TIME)
+        self.amp_v_out = self.parameter(amplifiers, 'v_out')
+
+        resistors = self.comp_list.resistors
+        self.r_r = self.parameter(resistors, 'r')
+        self.r_i = np.zeros((self.batch, len(resistors)))
+        self.r_i[:] = [getattr(r, 'i', 0) for r in resistors]
+
+        self.l_l = self.parameter(self.comp_list.inductors, 'l')
+        self.l_i = self.parameter(self.comp_list.inductors, 'i')
+        self.c_c = self.parameter(self.comp_list.capacitors, 'c')
+        self.c_v = self.parameter(self.comp_list.capacitors, 'v')
+
+    def run(self, time, progress=None, checkpoint=None, 
+            checkpoint_steps=None):
+        """
+        Simulates all time steps, records measurements into the measuring
+        instruments and writes the final state back into the components
+        With variants the components are left untouched, the measurements and
+        their time points are stored in batch_measurements and batch_times.
+        time : TimeGrid - time points of the simulation steps
+        progress : Progress - optional, updated with the number of simulated
+                              steps after every chunk of STEP_CHUNK_SIZE steps
+        checkpoint : function - optional, called with the number of simulated 
+                                steps after every checkpoint_steps steps, 
+                                when the components are up to date
+        checkpoint_steps : int - number of steps between checkpoints
+        """
+        instruments = self.comp_list.measuring_instruments
+        # measurements of a chunk are collected and then recorded at once
+        records = np.empty((STEP_CHUNK_SIZE, self.batch, len(instruments)))
+        batch_records = [[] for _ in instruments]
+        batch_times = [[] for _ in instruments]
+        for first, stop, times in time.chunks(
+                STEP_CHUNK_SIZE, checkpoint_steps if checkpoint else None):
+            self.step_chunk(times, records)
+            for j, mi in enumerate(instruments):
+                if not self.batched:
+                    mi.record(times, records[:stop - first, 0, j])
+                else:
+                    mask = mi.select_samples(times)
+                    batch_times[j].append(times[mask])
+                    batch_records[j].append(records[:stop - first, :, j][mask])
+            if progress is not None:
+                progress(stop)
+            if checkpoint is not None and stop % checkpoint_steps == 0:
+                self.update_components()
+                checkpoint(stop)
+                
+        if not self.batched:
+            self.update_components()
+            return
+        # key: instrument name -> value: array of shape (variants, samples)
+        self.batch_measurements = {
+            mi.name: np.concatenate(r + [np.zeros((0, self.batch))]).T
+            for mi, r in zip(instruments, batch_records)}
+        # key: instrument name -> value: array of shape (samples,)
+        self.batch_times = {mi.name: np.concatenate(t + [np.zeros(0)])
+                            for mi, t in zip(instruments, batch_times)}
+
+    def profile(self, profiler):
+        """Adds the wall time of the phases of every step to the profiler"""
+        for phase in self.PHASES:
+            method = 'step_' + phase
+            setattr(self, method, profiler.timed(getattr(self, method), 
+                                                 phase))
+
+    def source_voltages(self, times):
+        """
+        Computes the output voltages of the voltage sources for a chunk of 
+        steps at once
+        times : numpy array - time points of the steps in sec
+        Returns numpy array - shape (steps, variants, voltage sources)
+        """
+        emf = np.repeat(self.vs_emf[np.newaxis], len(times), axis=0)
+        t = times[:, np.newaxis, np.newaxis]
+        if len(self.sq_index):
+            high = t % self.sq_period <= self.sq_period * self.sq_duty
+            emf[:, :, self.sq_index] = np.where(high, self.sq_v_hi, 
+                                                self.sq_v_lo)
+        if len(self.ac_index):
+            phase = (t % self.ac_period) * 2 * np.pi / self.ac_period
+            emf[:, :, self.ac_index] = (np.sin(phase) * self.ac_v_rms + 
+                                        self.ac_dc)
+        for k in self.wf_index:
+            emf[:, :, k] = self.v_sources[k].get_voltages(times)[:, np.newaxis]
+        return emf
+
+    def step_chunk(self, times, records):
+        """
+        Simulates the steps of a chunk
+        times : numpy array - time points of the steps in sec
+        records : numpy array - measurement values are written into it, 
+                                shape (steps, variants, instruments)
+        """
+        emf = self.source_voltages(times)
+        for k in range(len(times)):
+            self.simulation_step(emf[k], records[k])
+
+    def simulation_step(self, emf, record):
+        """
+        Single step of simulation, same order as Circuit.simulation_step
+        emf : numpy array - output voltages of the voltage sources in the 
+                            step, shape (variants, voltage sources)
+        record : numpy array - measurement values are written into it, 
+                               shape (variants, instruments)
+        """
+        # reset junction currents to zero
+        self.i[:] = 0
+        self.step_sources(emf)
+        self.step_amplifiers()
+        self.step_resistors()
+        self.step_inductors()
+        self.step_capacitors()
+        self.step_measurements(record)
+        self.step_junctions()
+
+    def step_sources(self, emf):
+        """Voltage sources set voltages, current sources set currents"""
+        v, i = self.v, self.i
+        for b in self.vs_batches:
+            v[:, self.vs_pos[b]] = v[:, self.vs_neg[b]] + emf[:, b]
+        if len(self.is_nodes):
+            np.add.at(i, (slice(None), self.is_nodes), self.is_currents)
+
+    def step_amplifiers(self):
+        """Amplifier sources set voltages"""
+        v = self.v
+        for b in self.amp_batches:
+            v_out = self.amp_v_out[:, b]
+            v_out_next = self.amp_amp[:, b] * (v[:, self.amp_non_inv[b]] -
+                                               v[:, self.amp_inv[b]])
+            # limit output voltage change speed, then between v_max and v_min
+            max_delta_v = self.amp_max_delta_v[:, b]
+            v_out = np.minimum(np.maximum(v_out_next, v_out - max_delta_v), 
+                               v_out + max_delta_v)
+            v_out = np.minimum(np.maximum(v_out, self.amp_v_min[:, b]), 
+                               self.amp_v_max[:, b])
+            self.amp_v_out[:, b] = v_out
+            v[:, self.amp_out[b]] = v_out
+
+    def step_resistors(self):
+        """Resistors set junction currents"""
+        v, i = self.v, self.i
+        self.r_i = (v[:, self.r_pos] - v[:, self.r_neg]) / self.r_r
+        np.add.at(i, (slice(None), self.r_nodes), 
+                  interleave(self.r_i, -self.r_i))
+
+    def step_inductors(self):
+        """Set inductor currents according to junction voltages"""
+        if len(self.l_nodes):
+            v, i = self.v, self.i
+            self.l_i += ((v[:, self.l_pos] - v[:, self.l_neg]) * DELTA_TIME / 
+                         self.l_l)
+            np.add.at(i, (slice(None), self.l_nodes), 
+                      interleave(self.l_i, -self.l_i))
+
+    def step_capacitors(self):
+        """Set capacitor voltages according to junction currents"""
+        if len(self.c_pos):
+            v, i = self.v, self.i
+            i_pos, i_neg = i[:, self.c_pos], i[:, self.c_neg]
+            i_pos[:, self.c_pos_reset] = 0
+            i_neg[:, self.c_neg_reset] = 0
+            self.c_v += -(i_pos - i_neg) * DELTA_TIME / self.c_c
+            for b in self.c_batches:
+                v[:, self.c_pos[b]] = v[:, self.c_neg[b]] + self.c_v[:, b]
+            i[:, self.c_pos] = 0
+            i[:, self.c_neg] = 0
+
+    def step_measurements(self, record):
+        """Measurements recorded"""
+        v = self.v
+        record[:, self.vm_index] = v[:, self.vm_pos] - v[:, self.vm_neg]
+        record[:, self.ir_index] = self.r_i[:, self.ir]
+        record[:, self.il_index] = self.l_i[:, self.il]
+
+    def step_junctions(self):
+        """
+        Voltage sources and amplifiers provide the current difference of
+        junctions, then junction voltages are set according to current
+        """
+        i = self.i
+        i[:, self.vs_reset] = 0
+        i[:, self.amp_out] = 0
+        self.v -= i * DELTA_TIME / C_JUNCTION
+
+    def update_components(self):
+        """Writes the state of the arrays back into the component objects"""
+        for k, j in enumerate(self.junction_list):
+            j.v = float(self.v[0, k])
+            j.i = float(self.i[0, k])
+        for a, v_out in zip(self.comp_list.amplifiers, self.amp_v_out[0]):
+            a.v_out = float(v_out)
+        for r, i in zip(self.comp_list.resistors, self.r_i[0]):
+            r.i = float(i)
+        for l, i in zip(self.comp_list.inductors, self.l_i[0]):
+            l.i = float(i)
+        for c, v in zip(self.comp_list.capacitors, self.c_v[0]):
+            c.v = float(v)
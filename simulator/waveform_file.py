@@ -0,0 +1,156 @@
+import json
+import os
+import numpy as np
+
+
+# little endian float64 samples
+DTYPE = '<f8'
+HEADER_FILE = 'header.json'
+UNITS = {'V': 'V', 'I': 'A'}
+
+
+class ChannelWriter:
+    """Appends the time and value samples of one channel to binary files"""
+    
+    def __init__(self, directory, index, length=0):
+        """
+        directory : str - output directory
+        index : int - channel number, used in the file names
+        length : int - number of samples kept from existing files, samples 
+                       are appended after them (e.g. on restart)
+        """
+        self.directory = directory
+        self.time_file = 'channel_%d_time.bin' % index
+        self.value_file = 'channel_%d_values.bin' % index
+        self.times = self.open(self.time_file, length)
+        self.values = self.open(self.value_file, length)
+        self.length = length
+        
+    def open(self, file_name, length):
+        path = os.path.join(self.directory, file_name)
+        if not length:
+            return open(path, 'wb')
+        f = open(path, 'r+b')
+        f.truncate(length * np.dtype(DTYPE).itemsize)
+        f.seek(0, os.SEEK_END)
+        return f
+        
+    def write(self, times, values):
+        np.asarray(times, dtype=DTYPE).tofile(self.times)
+        np.asarray(values, dtype=DTYPE).tofile(self.values)
+        self.length += len(times)
+        
+    def flush(self):
+        """Flushes the written samples to the files"""
+        self.times.flush()
+        self.values.flush()
+        
+    def memmap(self, f, file_name):
+        if not f.closed:
+            f.flush()
+        if self.length == 0:
+            return np.zeros(0, dtype=DTYPE)
+        return np.memmap(os.path.join(self.directory, file_name), dtype=DTYPE, 
+                         mode='r', shape=(self.length,))
+        
+    def get_times(self):
+        """Returns the memory-mapped samples written so far"""
+        return self.memmap(self.times, self.time_file)
+    
+    def get_values(self):
+        """Returns the memory-mapped samples written so far"""
+        return self.memmap(self.values, self.value_file)
+        
+    def close(self):
+        self.times.close()
+        self.values.close()
+        
+
+class WaveformWriter:
+    """
+    Streams the measurements of measuring instruments to a directory of raw
+    float64 column files, described by a JSON header
+    """
+    
+    def __init__(self, directory, instruments, lengths=None):
+        """
+        directory : str - output directory, created if it does not exist
+        instruments : list - measuring instruments of the circuit
+        lengths : list - optional, number of samples kept from the existing 
+                         files of every channel
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.instruments = instruments
+        lengths = lengths or [0] * len(instruments)
+        self.channels = [ChannelWriter(directory, k, length) 
+                         for k, length in enumerate(lengths)]
+        self.write_header()
+        
+    def write_header(self):
+        channels = [{'name': mi.name, 
+                     'type': mi.measurement_type, 
+                     'unit': UNITS[mi.measurement_type],
+                     'time_file': ch.time_file,
+                     'value_file': ch.value_file,
+                     'length': ch.length}
+                    for mi, ch in zip(self.instruments, self.channels)]
+        with open(os.path.join(self.directory, HEADER_FILE), 'w') as f:
+            json.dump({'dtype': DTYPE, 'time_unit': 's', 
+                       'channels': channels}, f, indent=2)
+            
+    def close(self):
+        """Writes the final header and closes the files"""
+        for ch in self.channels:
+            ch.close()
+        self.write_header()
+        
+
+class WaveformFile:
+    """
+    Reader of waveforms written by WaveformWriter
+    Samples are memory-mapped, so slicing does not load the whole file
+    """
+    
+    def __init__(self, directory):
+        """
+        directory : str - directory written by WaveformWriter
+        """
+        self.directory = directory
+        with open(os.path.join(directory, HEADER_FILE)) as f:
+            self.header = json.load(f)
+        self.channels = {ch['name']: ch for ch in self.header['channels']}
+        
+    @property
+    def names(self):
+        return list(self.channels)
+    
+    def measurement_type(self, name):
+        return self.channels[name]['type']
+    
+    def unit(self, name):
+        return self.channels[name]['unit']
+        
+    def memmap(self, file_name):
+        path = os.path.join(self.directory, file_name)
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=self.header['dtype'])
+        # the length is taken from the file size, so interrupted runs can be 
+        # read as well
+        return np.memmap(path, dtype=self.header['dtype'], mode='r')
+        
+    def get_times(self, name):
+        """Returns the memory-mapped sample times of a channel in sec"""
+        return self.memmap(self.channels[name]['time_file'])
+    
+    def get_measurements(self, name):
+        """Returns the memory-mapped sample values of a channel"""
+        return self.memmap(self.channels[name]['value_file'])
+    
+    def __getitem__(self, name):
+        return self.get_measurements(name)
+    
+    
+def load_waveforms(directory):
+    """Opens the waveforms written by Circuit.run(..., output=directory)"""
+    return WaveformFile(directory)
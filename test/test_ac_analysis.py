@@ -0,0 +1,64 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import (Resistor, Capacitor, Inductor, 
+                                  OperationalAmplifier)
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import ACVoltageSource, DCVoltageSource
+
+
+# RC low-pass filter
+c = Circuit()  
+
+c.add(ACVoltageSource(name='V1', v_rms=1, t_period=1, dc=2, pos='1', 
+                      neg='GND'))
+c.add(Resistor(name='R1', r=1000, pos='1', neg='2')) 
+c.add(Capacitor(name='C1', c=1e-9, pos='2', neg='GND'))
+c.add(Voltmeter(name='V_C', pos='2', neg='GND'))
+c.add(ISenseResistor(name='I_R', resistor_name='R1'))
+
+result = c.ac(1e3, 1e8, 51)
+h = 1 / (1 + 2j * np.pi * result.frequencies * 1000 * 1e-9)
+assert np.allclose(result['V_C'], h)
+assert np.allclose(result['I_R'], (1 - h) / 1000)
+# cut-off frequency: -3 dB and -45 degrees
+f_c = 1 / (2 * np.pi * 1000 * 1e-9)
+result = c.ac(f_c, f_c, 1)
+print('cut-off:', result.magnitude_db('V_C'), result.phase['V_C'])
+assert np.isclose(result.magnitude_db('V_C')[0], -3.0103, atol=1e-3)
+assert np.isclose(result.phase['V_C'][0], -45)
+# sweeps longer than a block of frequencies give the same results
+result = c.ac(1e3, 1e8, 200, scale='linear')
+h = 1 / (1 + 2j * np.pi * result.frequencies * 1000 * 1e-9)
+assert np.allclose(result['V_C'], h)
+# 0 Hz and reversed ranges are rejected instead of solved into NaN
+for f_start, f_stop, scale in ((0, 1e6, 'linear'), (0, 1e6, 'log'), 
+                               (1e6, 1e3, 'log')):
+    try:
+        c.ac(f_start, f_stop, 5, scale=scale)
+        assert False
+    except ValueError:
+        pass
+
+
+# series RLC band-pass after an inverting amplifier with gain -10
+c = Circuit()  
+
+c.add(DCVoltageSource(name='V_BIAS', v=0.1, pos='3', neg='GND'))
+c.add(ACVoltageSource(name='V1', v_rms=0.5, t_period=1, dc=0, pos='1', 
+                      neg='3'))
+c.add(Resistor(name='R1', r=1000, pos='1', neg='2')) 
+c.add(Resistor(name='R2', r=10000, pos='2', neg='4'))
+c.add(OperationalAmplifier(name='OP_AMP', amp=1e6, v_max=15, v_min=-15, 
+                           non_inv='GND', inv='2', out='4'))
+c.add(Inductor(name='L1', l=1e-3, pos='4', neg='5'))
+c.add(Capacitor(name='C1', c=1e-9, pos='5', neg='6'))
+c.add(Resistor(name='R3', r=50, pos='6', neg='GND'))
+c.add(Voltmeter(name='V_OUT', pos='6', neg='GND'))
+c.add(ISenseResistor(name='I_L', resistor_name='L1'))
+
+f_0 = 1 / (2 * np.pi * np.sqrt(1e-3 * 1e-9))
+result = c.ac(f_0, f_0, 1)
+print('resonance:', result.magnitude['V_OUT'], result.phase['V_OUT'])
+assert np.isclose(result.magnitude['V_OUT'][0], 5, rtol=1e-4)
+assert np.isclose(abs(result.phase['V_OUT'][0]), 180, atol=0.01)
+assert np.isclose(result.magnitude['I_L'][0], 0.1, rtol=1e-4)
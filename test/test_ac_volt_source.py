@@ -14,4 +14,4 @@ c.add(Voltmeter(name='VM1', pos='1', neg='GND'))
 c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
 c.add(ISenseResistor(name='I1', resistor_name='R1'))
 
-c.simulate(simulation_time=100)
+c.simulate(simulation_time=100, plot=True)
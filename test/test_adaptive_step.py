@@ -0,0 +1,33 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor
+from simulator.measurement import Voltmeter
+from simulator.sources import SquareWaveSource
+
+
+def rc_circuit():
+    c = Circuit() 
+    
+    c.add(SquareWaveSource(name='V1', v_hi=10, v_lo=0, t_period=500, 
+                           duty_cycle=50, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+    c.add(Capacitor(name='C1', c=1e-7, pos='2', neg='GND'))
+    c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
+    return c
+
+
+fixed = rc_circuit()
+time_fixed = fixed.run(simulation_time=1000, engine='mna', time_step=0.01)
+
+adaptive = rc_circuit()
+time_adaptive = adaptive.run(simulation_time=1000, engine='mna', 
+                             time_step=0.01, adaptive=True, reltol=1e-3)
+
+v_fixed = fixed.comp_list.measuring_instruments[0].measurements
+v_adaptive = adaptive.comp_list.measuring_instruments[0].measurements
+error = np.max(np.abs(np.interp(time_fixed, time_adaptive, v_adaptive) - 
+                      v_fixed))
+print('steps:', len(time_fixed), '->', len(time_adaptive), 
+      'max deviation:', error)
+assert len(time_adaptive) * 100 < len(time_fixed)
+assert error < 0.1
@@ -0,0 +1,51 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, Inductor
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import SquareWaveSource
+from simulator.sweep import grid_variants, run_batch, set_parameter
+
+
+def rlc_circuit():
+    c = Circuit()  
+    
+    c.add(SquareWaveSource(name='V1', v_hi=1, v_lo=0, t_period=2, 
+                           duty_cycle=0.5, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=10, pos='1', neg='2')) 
+    c.add(Inductor(name='L1', l=1e-6, pos='2', neg='3'))
+    c.add(Capacitor(name='C1', c=1e-7, pos='3', neg='GND'))
+    c.add(Voltmeter(name='V_C', pos='3', neg='GND', decimation=10))
+    c.add(ISenseResistor(name='I_L', resistor_name='L1'))
+    return c
+
+
+variants = grid_variants({'R1.r': [5, 10, 20], 'C1.c': [1e-7, 2e-7]})
+batch = run_batch(rlc_circuit(), variants, simulation_time=4)
+assert batch['V_C'].shape == (6, 4000)
+assert batch['I_L'].shape == (6, 40000)
+# the variants share the time axis, it is broadcast without copying
+assert batch.times['V_C'].shape == (4000,)
+assert batch.get_times('V_C').shape == (6, 4000)
+assert batch.get_time().shape == (6, 40000)
+assert np.shares_memory(batch.get_times('V_C'), batch.times['V_C'])
+
+# the base circuit is not modified, its recorded measurements are kept
+base = rlc_circuit()
+base.simulate(simulation_time=1, progress=False)
+voltages = {name: j.v for name, j in base.junctions.items()}
+run_batch(base, variants[:2], simulation_time=1)
+assert len(base.comp_list.measuring_instruments[0].get_measurements()) == 1000
+assert voltages == {name: j.v for name, j in base.junctions.items()}
+
+# every variant of the batch equals its individual simulation
+for k, variant in enumerate(variants):
+    c = rlc_circuit()
+    components = {comp.name: comp for comp in c.comp_list.components}
+    for name, value in variant.items():
+        set_parameter(components, name, value)
+    result = c.simulate(simulation_time=4, engine='numpy')
+    for name in ('V_C', 'I_L'):
+        deviation = np.max(np.abs(batch[name][k] - result[name]))
+        print(variant, name, 'max deviation:', deviation)
+        assert deviation == 0
+        assert np.array_equal(batch.get_times(name)[k], result.times[name])
@@ -0,0 +1,24 @@
+import json
+from simulator.benchmark import run_benchmarks, compare, load_script
+
+
+# the circuits of the scripts are loaded without simulating them
+circuit, simulation_time = load_script('test/test_opamp.py')
+assert simulation_time == 60 and len(circuit.comp_list.amplifiers) == 1
+
+cases = [('script', 'test/test_opamp.py'), ('rc_ladder', 10), 
+         ('rlc_mesh', 10), ('opamp_chain', 10)]
+benchmark = run_benchmarks(cases, duration=0.1, processes=False, 
+                           report=None)
+results = {(r['case'], r['engine']): r for r in benchmark['results']}
+assert len(results) == 16
+for r in results.values():
+    assert r['steps'] > 0 and r['steps_per_sec'] > 0 and r['error'] >= 0
+    print(r['case'], r['engine'], r['steps'], 'steps, error:', r['error'])
+    
+# the numpy and jit engines give the same waveforms as the object engine
+for case in ('test_opamp', 'rc_ladder_10', 'rlc_mesh_10', 'opamp_chain_10'):
+    assert results[case, 'numpy']['error'] == results[case, 'object']['error']
+    assert results[case, 'jit']['error'] == results[case, 'object']['error']
+    
+assert len(compare(benchmark, json.loads(json.dumps(benchmark)))) == 16
@@ -0,0 +1,29 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor
+from simulator.measurement import Voltmeter
+from simulator.sources import SquareWaveSource
+
+
+c = Circuit() 
+
+c.add(SquareWaveSource(name='V1', v_hi=10, v_lo=0, t_period=3.3, 
+                       duty_cycle=30, pos='1', neg='GND'))
+c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+c.add(Capacitor(name='C1', c=1e-9, pos='2', neg='GND'))
+c.add(Voltmeter(name='VM1', pos='1', neg='GND'))
+
+time = c.run(simulation_time=10, engine='mna', time_step=1)
+edges = c.breakpoints.times
+print('edges [usec]:', edges * 1e6)
+print('time [usec]:', time * 1e6)
+
+# every edge and every grid point of the fixed time step is a time point
+assert np.all(np.isin(edges, time))
+assert np.all(np.isin(np.arange(1, 11) * 1e-6, time))
+
+# the step landing on an edge sees the voltage before the edge
+v = np.array(c.comp_list.measuring_instruments[0].measurements)
+k = np.searchsorted(time, edges)
+k = k[k + 1 < len(v)]
+assert np.all(v[k] != v[k + 1])
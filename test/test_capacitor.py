@@ -9,12 +9,12 @@ c = Circuit()
 c.add(DCVoltageSource(name='V1', v=10, pos='1', neg='GND'))
 c.add(Resistor(name='R1', r=50, pos='1', neg='2')) 
 c.add(Capacitor(name='c', c=1e-7, pos='2', neg='3'))
-c.add(Resistor(name='R1', r=50, pos='3', neg='GND')) 
+c.add(Resistor(name='R2', r=50, pos='3', neg='GND')) 
 c.add(Voltmeter(name='VM1', pos='1', neg='GND'))
 c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
 c.add(Voltmeter(name='VM3', pos='3', neg='GND'))
-c.add(ISenseResistor(name='I1', resistor_name='R1'))
+c.add(ISenseResistor(name='I1', resistor_name='R2'))
 
-c.simulate(simulation_time=100)
+c.simulate(simulation_time=100, plot=True)
     
     
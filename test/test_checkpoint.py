@@ -0,0 +1,45 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, Inductor
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import SquareWaveSource
+
+
+def rlc_circuit():
+    c = Circuit()  
+    
+    c.add(SquareWaveSource(name='V1', v_hi=1, v_lo=0, t_period=2, 
+                           duty_cycle=0.5, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=10, pos='1', neg='2')) 
+    c.add(Inductor(name='L1', l=1e-6, pos='2', neg='3'))
+    c.add(Capacitor(name='C1', c=1e-7, pos='3', neg='GND'))
+    c.add(Voltmeter(name='V_C', pos='3', neg='GND', decimation=7))
+    c.add(ISenseResistor(name='I_L', resistor_name='L1'))
+    return c
+
+
+for engine in ('object', 'numpy'):
+    c = rlc_circuit()
+    reference = c.simulate(simulation_time=4, engine=engine, 
+                           checkpoint_interval=0.5)
+    assert len(c.checkpoints) == 8
+    
+    # unchanged values continue bit-identically
+    result = c.resimulate(from_time=2.2)
+    assert c.checkpoints[-1].time <= 4e-6 and len(c.checkpoints) == 8
+    for name in ('V_C', 'I_L'):
+        assert np.array_equal(result[name], reference[name])
+        assert np.array_equal(result.times[name], reference.times[name])
+    
+    # a changed value takes effect at the latest checkpoint before 2.2 usec
+    c.comp_list.resistors[0].r = 20
+    result = c.resimulate(from_time=2.2)
+    start = reference.times['V_C'] < 2e-6
+    assert np.array_equal(result['V_C'][start], reference['V_C'][start])
+    assert not np.array_equal(result['V_C'][~start], reference['V_C'][~start])
+    assert len(result['V_C']) == len(reference['V_C'])
+    print(engine, 'V_C at 4 usec:', reference['V_C'][-1], result['V_C'][-1])
+    if engine == 'object':
+        object_result = result
+    else:
+        assert np.array_equal(result['V_C'], object_result['V_C'])
@@ -0,0 +1,53 @@
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor
+from simulator.measurement import Voltmeter, VSenseResistor, ISenseResistor
+from simulator.sources import DCVoltageSource, DCCurrentSource
+
+
+c = Circuit()
+c.add(DCVoltageSource(name='V1', v=10, pos='1', neg='GND'))
+c.add(Resistor(name='R1', r=50, pos='1', neg='2'))
+c.add(Capacitor(name='C1', c=1e-7, pos='2', neg='GND'))
+c.add(Resistor(name='R2', r=50, pos='2', neg='GND'))
+c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
+c.add(VSenseResistor(name='V_R2', resistor_name='R2'))
+# instruments have their own name space
+c.add(ISenseResistor(name='I1', resistor_name='R1'))
+c.add(DCCurrentSource(name='I1', i=1e-3, pos='2', neg='GND'))
+
+comp_list = c.comp_list
+assert comp_list.get('R2') is comp_list.resistors[1]
+assert comp_list.instrument_names['I1'] is comp_list.measuring_instruments[2]
+assert [x.name for x in comp_list.attached('2')] == ['R1', 'C1', 'R2', 'VM2',
+                                                    'I1']
+assert [x.name for x in comp_list.between('2', 'GND')] == ['C1', 'R2', 'VM2',
+                                                          'I1']
+assert comp_list.attached('3') == []
+# junctions are created in the order of the index
+c.connect_circuit()
+assert list(c.junctions) == ['1', 'GND', '2']
+
+# measured resistors are looked up by name
+c.init_measuring_instruments()
+assert comp_list.measuring_instruments[1].resistor is comp_list.get('R2')
+
+# duplicate names raise
+for duplicate in (Resistor(name='R1', r=10, pos='1', neg='GND'),
+                  Voltmeter(name='V1', pos='1', neg='GND'),
+                  ISenseResistor(name='V_R2', resistor_name='R1')):
+    try:
+        c.add(duplicate)
+        assert False
+    except ValueError:
+        pass
+
+# unknown measured resistors raise when the simulation starts
+c = Circuit()
+c.add(DCVoltageSource(name='V1', v=10, pos='1', neg='GND'))
+c.add(Resistor(name='R1', r=50, pos='1', neg='GND'))
+c.add(ISenseResistor(name='I1', resistor_name='R9'))
+try:
+    c.simulate(simulation_time=0.1, progress=False)
+    assert False
+except ValueError:
+    pass
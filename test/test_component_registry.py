@@ -0,0 +1,178 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Component, Resistor, Capacitor
+from simulator.measurement import Voltmeter
+from simulator.sources import DCVoltageSource, Source
+
+
+class TrimmedResistor(Resistor):
+    """Resistor subclass, stepped and compiled as a resistor"""
+    __slots__ = ()
+
+    def __init__(self, name, r, trim, pos, neg):
+        super().__init__(name=name, r=r * trim, pos=pos, neg=neg)
+
+
+class Leakage(Component):
+    """Device of the resistor phase which is not a Resistor model"""
+    __slots__ = ('g', 'pos', 'neg')
+    PHASE = 'resistors'
+
+    def __init__(self, name, g, pos, neg):
+        super().__init__(name, pos=pos, neg=neg)
+        self.g = g
+
+    def simulation_step(self):
+        i = (self.pos.v - self.neg.v) * self.g
+        self.pos.i += i
+        self.neg.i -= i
+
+
+def rc_circuit(resistor):
+    c = Circuit()
+    c.add(DCVoltageSource(name='V1', v=5, pos='1', neg='GND'))
+    c.add(resistor)
+    c.add(Capacitor(name='C1', c=1e-9, pos='2', neg='GND'))
+    c.add(Voltmeter(name='V_C', pos='2', neg='GND'))
+    return c
+
+
+# subclasses inherit the phase of their model
+c = rc_circuit(TrimmedResistor(name='R1', r=50, trim=2, pos='1', neg='2'))
+assert c.comp_list.resistors[0].name == 'R1'
+reference = rc_circuit(Resistor(name='R1', r=100, pos='1', neg='2')).simulate(
+    simulation_time=1, progress=False)
+for engine in ('object', 'numpy', 'jit'):
+    result = rc_circuit(TrimmedResistor(name='R1', r=50, trim=2, pos='1',
+                                        neg='2')).simulate(
+        simulation_time=1, engine=engine, progress=False)
+    assert np.array_equal(result['V_C'], reference['V_C'])
+
+
+# classes without a stepping phase are rejected when added
+class Diode(Component):
+    __slots__ = ('pos', 'neg')
+
+
+try:
+    Circuit().add(Diode('D1', pos='1', neg='2'))
+    assert False
+except ValueError:
+    pass
+
+# devices which are not models of their phase run on the object engine only
+leaky = rc_circuit(Leakage(name='G1', g=1e-2, pos='1', neg='2'))
+result = leaky.simulate(simulation_time=1, progress=False)
+assert np.allclose(result['V_C'], reference['V_C'])
+for engine in ('numpy', 'mna'):
+    try:
+        rc_circuit(Leakage(name='G1', g=1e-2, pos='1', neg='2')).simulate(
+            simulation_time=1, engine=engine, progress=False)
+        assert False
+    except ValueError:
+        pass
+
+
+# sources without a vectorized model compute their output voltages
+# themselves on every engine, constant ones as well
+class HalfSupply(Component, Source):
+    __slots__ = ('v', 'pos', 'neg')
+
+    def __init__(self, name, v, pos, neg):
+        Component.__init__(self, name, pos=pos, neg=neg)
+        self.v = v
+
+    def get_voltage(self, *args):
+        return self.v / 2
+
+    def simulation_step(self, *args):
+        self.pos.set_voltage(self.neg.v + self.v / 2)
+
+
+def supply_circuit():
+    c = Circuit()
+    c.add(HalfSupply(name='V1', v=10, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2'))
+    c.add(Capacitor(name='C1', c=1e-9, pos='2', neg='GND'))
+    c.add(Voltmeter(name='V_C', pos='2', neg='GND'))
+    return c
+
+
+reference = supply_circuit().simulate(simulation_time=1, progress=False)
+assert np.allclose(reference['V_C'][-1], 5 * (1 - np.exp(-10)), atol=1e-2)
+for engine in ('numpy', 'jit'):
+    result = supply_circuit().simulate(simulation_time=1, engine=engine,
+                                       progress=False)
+    assert np.array_equal(result['V_C'], reference['V_C'])
+
+
+# new device types are built from models, which every engine simulates
+class Potentiometer(Component):
+    __slots__ = ('upper', 'lower', 'pos', 'wiper', 'neg')
+
+    def __init__(self, name, r, position, pos, wiper, neg):
+        super().__init__(name, pos=pos, wiper=wiper, neg=neg)
+        self.upper = Resistor(name=name + '.upper', r=r * (1 - position),
+                              pos=pos, neg=wiper)
+        self.lower = Resistor(name=name + '.lower', r=r * position,
+                              pos=wiper, neg=neg)
+
+    def models(self):
+        return [self.upper, self.lower]
+
+
+class SeriesRC(Component):
+    """Resistor and capacitor in series, with an internal junction"""
+    __slots__ = ('resistor', 'capacitor', 'pos', 'neg')
+
+    def __init__(self, name, r, c, pos, neg):
+        super().__init__(name, pos=pos, neg=neg)
+        self.resistor = Resistor(name=name + '.r', r=r, pos=pos,
+                                 neg=name + '.mid')
+        self.capacitor = Capacitor(name=name + '.c', c=c, pos=name + '.mid',
+                                   neg=neg)
+
+    def models(self):
+        return [self.resistor, self.capacitor]
+
+
+def divider_circuit(built):
+    c = Circuit()
+    c.add(DCVoltageSource(name='V1', v=5, pos='1', neg='GND'))
+    if built:
+        c.add(Potentiometer(name='P1', r=1000, position=0.25, pos='1',
+                            wiper='2', neg='GND'))
+        c.add(SeriesRC(name='RC1', r=100, c=1e-9, pos='2', neg='GND'))
+    else:
+        c.add(Resistor(name='P1.upper', r=750, pos='1', neg='2'))
+        c.add(Resistor(name='P1.lower', r=250, pos='2', neg='GND'))
+        c.add(Resistor(name='RC1.r', r=100, pos='2', neg='RC1.mid'))
+        c.add(Capacitor(name='RC1.c', c=1e-9, pos='RC1.mid', neg='GND'))
+    c.add(Voltmeter(name='V_W', pos='2', neg='GND'))
+    return c
+
+
+c = divider_circuit(True)
+assert c.comp_list.get('P1').models()[0] in c.comp_list.resistors
+assert [x.name for x in c.comp_list.attached('RC1.mid')] == ['RC1']
+reference = divider_circuit(False).simulate(simulation_time=1,
+                                            progress=False)
+for engine in ('object', 'numpy', 'jit'):
+    result = divider_circuit(True).simulate(simulation_time=1, engine=engine,
+                                            progress=False)
+    assert np.array_equal(result['V_W'], reference['V_W'])
+reference = divider_circuit(False).simulate(simulation_time=1, engine='mna',
+                                            time_step=0.01, progress=False)
+result = divider_circuit(True).simulate(simulation_time=1, engine='mna',
+                                        time_step=0.01, progress=False)
+assert np.allclose(result['V_W'], reference['V_W'])
+
+# the state of the models is written back and restored from checkpoints
+c = divider_circuit(True)
+c.simulate(simulation_time=1, engine='numpy', checkpoint_interval=0.5,
+           progress=False)
+capacitor = c.comp_list.get('RC1').capacitor
+v_end = capacitor.v
+assert v_end != 0
+c.checkpoints[0].restore(c)
+assert capacitor.v != v_end
@@ -0,0 +1,58 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, Inductor, OperationalAmplifier
+from simulator.jit_engine import jit_available
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import (SquareWaveSource, ACVoltageSource,
+                               DCCurrentSource, GND)
+
+
+def mixed_circuit():
+    c = Circuit()
+
+    c.add(GND(name='GND', gnd='0'))
+    c.add(SquareWaveSource(name='V1', v_hi=10, v_lo=2, t_period=2,
+                           duty_cycle=50, pos='1', neg='0'))
+    c.add(ACVoltageSource(name='V2', v_rms=2, t_period=0.3, dc=0.5,
+                          pos='5', neg='0'))
+    c.add(DCCurrentSource(name='I_S', i=1e-3, pos='4', neg='0'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2'))
+    c.add(Resistor(name='R2', r=50, pos='2', neg='3'))
+    c.add(Resistor(name='R3', r=10, pos='3', neg='4'))
+    c.add(Resistor(name='R4', r=300, pos='5', neg='4'))
+    c.add(Capacitor(name='C1', c=1e-7, pos='4', neg='0'))
+    c.add(Capacitor(name='C2', c=2e-9, pos='5', neg='4'))
+    c.add(Inductor(name='L1', l=10e-6, pos='4', neg='0'))
+    c.add(OperationalAmplifier(name='OP_AMP', amp=1000, v_max=50, v_min=-50,
+                               non_inv='0', inv='2', out='3'))
+    c.add(Voltmeter(name='VM2', pos='2', neg='0'))
+    c.add(Voltmeter(name='VM4', pos='4', neg='0'))
+    c.add(ISenseResistor(name='I1', resistor_name='R1'))
+    c.add(ISenseResistor(name='I_L', resistor_name='L1'))
+    return c
+
+
+print('numba available:', jit_available())
+reference = mixed_circuit().simulate(simulation_time=3, progress=False)
+
+# the compiled kernel gives the same waveforms as the object engine, without
+# numba the numpy engine is used
+circuit = mixed_circuit()
+result = circuit.simulate(simulation_time=3, engine='jit', progress=False)
+for name in reference.measurements:
+    assert np.array_equal(result[name], reference[name])
+    assert np.array_equal(result.times[name], reference.times[name])
+
+# the state is written back into the components at checkpoints and at the end
+assert circuit.comp_list.capacitors[0].v == result['VM4'][-1]
+circuit = mixed_circuit()
+circuit.simulate(simulation_time=3, engine='jit', checkpoint_interval=0.5,
+                 progress=False)
+assert len(circuit.checkpoints) == 6
+circuit.comp_list.resistors[0].r = 200
+result = circuit.resimulate(from_time=1)
+for name in reference.measurements:
+    # the steps before the checkpoint at 1 usec are kept
+    before = result.times[name] < 0.99e-6
+    assert np.array_equal(result[name][before], reference[name][before])
+    assert not np.array_equal(result[name], reference[name])
@@ -0,0 +1,65 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor
+from simulator.measurement import SampleBuffer, Voltmeter, ISenseResistor
+from simulator.sources import ACVoltageSource
+
+
+def rc_circuit():
+    c = Circuit()        
+    
+    c.add(ACVoltageSource(name='V1', v_rms=3, t_period=1, dc=5, pos='1', 
+                          neg='GND'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+    c.add(Capacitor(name='C1', c=1e-9, pos='2', neg='GND'))
+    c.add(Voltmeter(name='VM1', pos='1', neg='GND'))
+    c.add(Voltmeter(name='VM2', pos='2', neg='GND', decimation=7))
+    c.add(ISenseResistor(name='I1', resistor_name='R1', sample_interval=0.3))
+    return c
+
+
+# per step (object) and chunked (numpy) recording give the same samples
+reference = rc_circuit()
+time = reference.run(simulation_time=2, engine='object')
+vectorized = rc_circuit()
+vectorized.run(simulation_time=2, engine='numpy')
+
+vm1, vm2, i1 = reference.comp_list.measuring_instruments
+assert len(vm1.get_measurements()) == len(time)
+assert np.array_equal(vm2.get_times(), time[::7])
+assert np.allclose(i1.get_times(), [0, 0.3e-6, 0.6e-6, 0.9e-6, 1.2e-6, 
+                                    1.5e-6, 1.8e-6], atol=2 * 1e-10)
+for mi_ref, mi_vec in zip(reference.comp_list.measuring_instruments,
+                          vectorized.comp_list.measuring_instruments):
+    assert np.array_equal(mi_ref.get_times(), mi_vec.get_times())
+    assert np.allclose(mi_ref.get_measurements(), mi_vec.get_measurements())
+
+
+# samples are stored across multiple chunks
+buffer = SampleBuffer(size=10)
+values = np.random.rand(200000)
+buffer.extend(np.arange(100000), values[:100000])
+for k in range(100000, 200000):
+    buffer.append(k, values[k])
+assert len(buffer) == 200000
+assert np.array_equal(buffer.get_times(), np.arange(200000))
+assert np.array_equal(buffer.get_values(), values)
+
+# explicit engines store only the values of samples taken at uniform steps, 
+# the irregular samples of sample_interval keep their times
+assert vm1.buffer.times is None and vm2.buffer.times is None
+assert i1.buffer.times is not None
+assert np.array_equal(vm1.get_times(), np.asarray(time))
+
+# uniform samples across multiple chunks, starting at step 5
+buffer = SampleBuffer(size=10, time_step=1e-10, stride=3)
+steps = 5 + 3 * np.arange(200000)
+buffer.extend(steps[:100000] * 1e-10, values[:100000])
+for k in range(100000, 200000):
+    buffer.append(steps[k] * 1e-10, values[k])
+assert np.array_equal(buffer.get_times(), steps * 1e-10)
+assert np.array_equal(buffer.get_values(), values)
+times, samples = buffer.get_samples(150000)
+assert np.array_equal(times, steps[150000:] * 1e-10)
+buffer.truncate(1000)
+assert np.array_equal(buffer.get_times(), steps[:1000] * 1e-10)
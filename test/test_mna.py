@@ -0,0 +1,47 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, Inductor, OperationalAmplifier
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import DCVoltageSource
+
+
+def rc_circuit():
+    c = Circuit() 
+    
+    c.add(DCVoltageSource(name='V1', v=10, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=1000, pos='1', neg='2')) 
+    c.add(Capacitor(name='C1', c=1e-6, pos='2', neg='GND'))
+    c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
+    return c
+
+
+# RC charging with time steps far above the explicit engines' stability limit
+for method in ('trapezoidal', 'backward_euler'):
+    c = rc_circuit()
+    time = c.run(simulation_time=5000, engine='mna', time_step=10, 
+                 method=method)
+    exact = 10 * (1 - np.exp(-time / 1e-3))
+    error = np.max(np.abs(c.comp_list.measuring_instruments[0].measurements 
+                          - exact))
+    print(method, 'max error:', error)
+    assert error < 0.1
+
+
+# RL circuit and an inverting amplifier driven into v_min
+c = Circuit() 
+
+c.add(DCVoltageSource(name='V1', v=10, pos='1', neg='GND'))
+c.add(Resistor(name='R1', r=10, pos='1', neg='2')) 
+c.add(Inductor(name='L1', l=1e-6, pos='2', neg='GND'))
+c.add(Resistor(name='R2', r=100, pos='1', neg='3'))
+c.add(Resistor(name='R3', r=1000, pos='3', neg='4'))
+c.add(OperationalAmplifier(name='OP_AMP', amp=1000, v_max=50, v_min=-50, 
+                           non_inv='GND', inv='3', out='4'))
+c.add(ISenseResistor(name='I1', resistor_name='R1'))
+c.add(Voltmeter(name='VM4', pos='4', neg='GND'))
+
+time = c.run(simulation_time=2, engine='mna', time_step=0.01)
+i_l, v_out = [mi.measurements for mi in c.comp_list.measuring_instruments]
+assert np.allclose(i_l, 1 - np.exp(-time / 1e-7), atol=1e-2)
+# the output slews towards v_min with the default 10 V/usec
+assert np.allclose(v_out, np.maximum(-1e7 * time, -50))
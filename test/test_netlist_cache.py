@@ -0,0 +1,61 @@
+import tempfile
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, OperationalAmplifier
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.netlist_cache import NetlistCache, netlist_cache
+from simulator.sources import DCVoltageSource
+
+
+def amplifier(r_2):
+    c = Circuit()  
+    
+    c.add(DCVoltageSource(name='V1', v=1, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+    c.add(Resistor(name='R2', r=r_2, pos='2', neg='3'))
+    c.add(Resistor(name='R3', r=10, pos='3', neg='4'))
+    c.add(Capacitor(name='C1', c=1e-6, pos='4', neg='GND'))
+    c.add(OperationalAmplifier(name='OP_AMP', amp=1000, v_max=50, 
+                               v_min=-50, non_inv='GND', inv='2', out='3'))
+    c.add(Voltmeter(name='V_OUT', pos='3', neg='GND'))
+    c.add(ISenseResistor(name='I2', resistor_name='R2')) 
+    return c
+
+
+netlist_cache.clear()
+reference = amplifier(200).simulate(simulation_time=20, engine='numpy')
+hits = netlist_cache.hits
+
+# the same topology with other values reuses the compiled netlist
+c = amplifier(400)
+result = c.simulate(simulation_time=20, engine='numpy')
+assert netlist_cache.hits == hits + 1
+netlist_cache.clear()
+expected = amplifier(400).simulate(simulation_time=20, engine='numpy')
+assert np.array_equal(result['V_OUT'], expected['V_OUT'])
+assert not np.array_equal(result['V_OUT'], reference['V_OUT'])
+
+# re-simulating reuses the connection and the MNA factorizations
+junctions = c.junctions
+c.simulate(simulation_time=20, engine='mna', time_step=0.1)
+key, factorizations = c.netlist.factorizations
+assert factorizations
+second = c.simulate(simulation_time=20, engine='mna', time_step=0.1)
+assert c.junctions is junctions
+assert c.netlist.factorizations[1] is factorizations
+assert np.isclose(second['V_OUT'][-1], -4, rtol=1e-2)
+
+# least recently used netlists are evicted, and reloaded from the disk
+with tempfile.TemporaryDirectory() as directory:
+    cache = NetlistCache(size=1, directory=directory)
+    cache.put(c.netlist)
+    other = amplifier(200)
+    other.add(Resistor(name='R4', r=10, pos='4', neg='GND'))
+    other.connect_circuit()
+    cache.put(other.netlist)
+    assert list(cache.netlists) == [other.netlist.key]
+    
+    netlist = NetlistCache(directory=directory).get(c.netlist.key)
+    assert netlist.junction_names == c.netlist.junction_names
+    assert np.array_equal(netlist.engines['numpy']['r_nodes'], 
+                          c.netlist.engines['numpy']['r_nodes'])
@@ -0,0 +1,51 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, Inductor, OperationalAmplifier
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import SquareWaveSource
+
+
+def rlc_opamp_circuit():
+    c = Circuit() 
+    
+    c.add(SquareWaveSource(name='V1', v_hi=10, v_lo=2, t_period=2, 
+                           duty_cycle=50, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+    c.add(Resistor(name='R2', r=50, pos='2', neg='3'))
+    c.add(Resistor(name='R3', r=10, pos='3', neg='4'))
+    c.add(Capacitor(name='C1', c=1e-7, pos='4', neg='GND'))
+    c.add(Inductor(name='L1', l=10e-6, pos='4', neg='GND'))
+    c.add(OperationalAmplifier(name='OP_AMP', amp=1000, v_max=50, v_min=-50, 
+                               non_inv='GND', inv='2', out='3'))
+    c.add(Voltmeter(name='VM1', pos='1', neg='GND'))
+    c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
+    c.add(Voltmeter(name='VM4', pos='4', neg='GND'))
+    c.add(ISenseResistor(name='I1', resistor_name='R1'))
+    return c
+
+
+reference = rlc_opamp_circuit()
+reference.run(simulation_time=5, engine='object')
+
+vectorized = rlc_opamp_circuit()
+vectorized.run(simulation_time=5, engine='numpy')
+
+for mi_ref, mi_vec in zip(reference.comp_list.measuring_instruments,
+                          vectorized.comp_list.measuring_instruments):
+    assert np.allclose(mi_ref.get_measurements(), mi_vec.get_measurements())
+    print(mi_ref.name, 'max deviation:', 
+          np.max(np.abs(np.subtract(mi_ref.get_measurements(), 
+                                    mi_vec.get_measurements()))))
+
+# 'auto' selects the numpy engine only for large circuits
+c = rlc_opamp_circuit()
+c.run(simulation_time=0.1, engine='auto', progress=False)
+assert c.last_run['engine'] == 'object'
+grid = Circuit()
+grid.add(SquareWaveSource(name='V1', v_hi=1, v_lo=0, t_period=2, 
+                          duty_cycle=50, pos='0', neg='GND'))
+for k in range(1000):
+    grid.add(Resistor(name='R' + str(k), r=10, pos=str(k), neg=str(k + 1)))
+    grid.add(Capacitor(name='C' + str(k), c=1e-9, pos=str(k + 1), neg='GND'))
+grid.run(simulation_time=0.001, engine='auto', progress=False)
+assert grid.last_run['engine'] == 'numpy'
@@ -0,0 +1,53 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import (Resistor, Capacitor, Inductor, 
+                                  OperationalAmplifier)
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import DCVoltageSource, GND
+
+
+def bias_circuit():
+    c = Circuit()  
+    
+    c.add(DCVoltageSource(name='V1', v=10, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=1000, pos='1', neg='2')) 
+    c.add(Resistor(name='R2', r=3000, pos='2', neg='GND'))
+    # the capacitor has its own ground junction, see Hints in README
+    c.add(Capacitor(name='C1', c=1e-6, pos='2', neg='G2'))
+    c.add(Resistor(name='R3', r=100, pos='1', neg='3'))
+    c.add(Inductor(name='L1', l=1e-3, pos='3', neg='4'))
+    c.add(Resistor(name='R4', r=400, pos='4', neg='GND'))
+    # non-inverting amplifier with gain 3, saturates at 20 V
+    c.add(Resistor(name='R5', r=1000, pos='5', neg='GND'))
+    c.add(Resistor(name='R6', r=2000, pos='6', neg='5'))
+    c.add(OperationalAmplifier(name='OP_AMP', amp=1e5, v_max=20, 
+                               v_min=-20, non_inv='2', inv='5', out='6'))
+    c.add(GND(name='GND', gnd='GND'))
+    c.add(GND(name='GND2', gnd='G2'))
+    c.add(Voltmeter(name='V_C', pos='2', neg='GND'))
+    c.add(Voltmeter(name='V_OUT', pos='6', neg='GND'))
+    c.add(ISenseResistor(name='I_L', resistor_name='L1'))
+    return c
+
+
+c = bias_circuit()
+v = c.op()
+print('operating point:', v)
+assert np.isclose(v['2'], 7.5)
+assert np.isclose(v['3'], v['4']) and np.isclose(v['4'], 8)
+assert np.isclose(v['6'], 20)
+assert np.isclose(c.comp_list.capacitors[0].v, 7.5)
+assert np.isclose(c.comp_list.inductors[0].i, 0.02)
+assert c.comp_list.amplifiers[0].v_out == 20
+# the state is written back as Python floats
+assert type(c.comp_list.capacitors[0].v) is float
+assert type(c.junctions['2'].v) is float
+
+# transients started from the operating point need no settling time
+for engine in ('numpy', 'mna'):
+    result = bias_circuit().simulate(simulation_time=1, engine=engine, 
+                                     operating_point=True)
+    for name, value in (('V_C', 7.5), ('V_OUT', 20), ('I_L', 0.02)):
+        deviation = np.max(np.abs(result[name] - value))
+        print(engine, name, 'max deviation:', deviation)
+        assert deviation < 1e-3 * value
@@ -0,0 +1,46 @@
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, Inductor, OperationalAmplifier
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import SquareWaveSource
+
+
+c = Circuit() 
+
+c.add(SquareWaveSource(name='V1', v_hi=10, v_lo=2, t_period=2, 
+                       duty_cycle=50, pos='1', neg='GND'))
+c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+c.add(Resistor(name='R2', r=50, pos='2', neg='3'))
+c.add(Resistor(name='R3', r=100, pos='3', neg='4'))
+c.add(Inductor(name='L1', l=10e-6, pos='4', neg='5'))
+c.add(Capacitor(name='C1', c=1e-8, pos='5', neg='G2'))
+c.add(OperationalAmplifier(name='OP_AMP', amp=1000, v_max=50, v_min=-50, 
+                           non_inv='GND', inv='2', out='3'))
+c.add(Voltmeter(name='VM3', pos='3', neg='GND'))
+c.add(ISenseResistor(name='I1', resistor_name='R1'))
+
+phases = {'sources', 'amplifiers', 'resistors', 'inductors', 'capacitors', 
+          'measurements', 'junctions'}
+
+result = c.simulate(simulation_time=0.5, profile=True)
+profile = result.profile
+assert set(profile['phases']) == phases
+assert profile['phases']['junctions']['calls'] == 2 * 5000
+assert profile['classes']['Resistor']['calls'] == 3 * 5000
+assert profile['solver']['steps'] == 5000
+assert sum(p['time'] for p in profile['phases'].values()) < profile['wall_time']
+
+result = c.simulate(simulation_time=0.5, engine='numpy', profile=True)
+assert set(result.profile['phases']) == phases
+assert result.profile['phases']['sources']['calls'] == 5000
+
+result = c.simulate(simulation_time=20, engine='mna', time_step=0.01, 
+                    adaptive=True, profile=True)
+solver = result.profile['solver']
+assert solver['steps'] == len(result.time)
+assert solver['rejected_steps'] > 0 and solver['factorizations'] > 0
+assert solver['clamp_iterations'] >= solver['steps'] + solver['rejected_steps']
+assert result.profile['phases']['solve']['calls'] == (
+    solver['steps'] + solver['rejected_steps'])
+
+# profiling is off by default
+assert c.simulate(simulation_time=0.1).profile is None
@@ -0,0 +1,48 @@
+import contextlib
+import io
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor
+from simulator.measurement import Voltmeter
+from simulator.misc import LoadingBar, Progress
+from simulator.sources import DCVoltageSource
+
+
+# the loading bar prints every percent, also if the size is not divisible 
+# by 100
+output = io.StringIO()
+with contextlib.redirect_stdout(output):
+    lb = LoadingBar(150, 'Test')
+    for i in range(150):
+        lb()
+assert output.getvalue().count('%') == 100
+assert '100% Test' in output.getvalue()
+
+# reports are throttled by wall time
+reports = []
+progress = Progress(1000, 'Test', reports.append, interval=3600)
+for k in range(1000):
+    progress(k + 1)
+progress.finish()
+assert len(reports) == 1 and reports[0]['finished']
+assert reports[0]['fraction'] == 1 and reports[0]['eta'] == 0
+
+
+c = Circuit()
+c.add(DCVoltageSource(name='V1', v=10, pos='1', neg='GND'))
+c.add(Resistor(name='R1', r=50, pos='1', neg='2'))
+c.add(Capacitor(name='C1', c=1e-7, pos='2', neg='G2'))
+c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
+
+for engine in ('object', 'numpy', 'mna'):
+    reports = []
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        c.simulate(simulation_time=1, engine=engine, progress=reports.append)
+        c.simulate(simulation_time=1, engine=engine, progress=False)
+    # nothing is written to stdout
+    assert output.getvalue() == ''
+    assert reports[-1]['finished'] and reports[-1]['done'] == (
+        reports[-1]['total'])
+    assert all(0 <= r['fraction'] <= 1 for r in reports)
+    print(engine, len(reports), 'reports, %.0f %s/sec' % (
+        reports[-1]['rate'], reports[-1]['unit']))
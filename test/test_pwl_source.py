@@ -0,0 +1,72 @@
+import os
+import pickle
+import tempfile
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor
+from simulator.measurement import Voltmeter
+from simulator.sources import (PWLVoltageSource, FileVoltageSource,
+                               SquareWaveSource, ACVoltageSource)
+
+
+# vectorized outputs are the same as the outputs of single time points
+times = np.arange(20000) * 1e-10
+for source in (SquareWaveSource(name='V1', v_hi=5, v_lo=-1, t_period=0.3,
+                                duty_cycle=30, pos='1', neg='GND'),
+               ACVoltageSource(name='V2', v_rms=2, t_period=0.7, dc=1,
+                               pos='1', neg='GND')):
+    assert np.array_equal(source.get_voltages(times),
+                          [source.get_voltage(t) for t in times.tolist()])
+
+# linear between the points, constant outside, steps take the later point
+pwl = PWLVoltageSource(name='V3', points=[(0.5, 0), (1, 2), (1, 4), (2, 0)],
+                       pos='1', neg='GND')
+assert np.allclose(pwl.get_voltages(np.array([0, 0.5, 0.75, 1, 1.5, 3]) * 1e-6),
+                   [0, 0, 1, 4, 2, 0])
+assert np.allclose(pwl.get_breakpoints(0, 1.5e-6), [0.5e-6, 1e-6])
+
+
+def rc_circuit(source):
+    c = Circuit()
+    c.add(source)
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2'))
+    c.add(Capacitor(name='C1', c=1e-9, pos='2', neg='GND'))
+    c.add(Voltmeter(name='V_IN', pos='1', neg='GND'))
+    c.add(Voltmeter(name='V_C', pos='2', neg='GND'))
+    return c
+
+
+directory = tempfile.mkdtemp()
+# 1 V/usec ramp sampled at every 0.01 usec, and the same stimulus as rows
+samples = np.linspace(0, 2, 201)
+np.save(os.path.join(directory, 'ramp.npy'), samples)
+np.savetxt(os.path.join(directory, 'ramp.csv'),
+           np.column_stack((np.linspace(0, 2, 201), samples)), delimiter=',')
+sources = {
+    'pwl': lambda: PWLVoltageSource(name='V1', points=[(0, 0), (2, 2)],
+                                    pos='1', neg='GND'),
+    'npy': lambda: FileVoltageSource(name='V1', pos='1', neg='GND',
+                                     path=os.path.join(directory, 'ramp.npy'),
+                                     sample_time=0.01),
+    'csv': lambda: FileVoltageSource(name='V1', pos='1', neg='GND',
+                                     path=os.path.join(directory, 'ramp.csv'))}
+assert isinstance(sources['npy']().samples, np.memmap)
+
+for name, source in sources.items():
+    results = {engine: rc_circuit(source()).simulate(
+                   simulation_time=3, engine=engine, progress=False)
+               for engine in ('object', 'numpy', 'jit')}
+    t = results['object'].times['V_IN']
+    assert np.allclose(results['object']['V_IN'], np.minimum(t * 1e6, 2))
+    for engine in ('numpy', 'jit'):
+        assert np.array_equal(results[engine]['V_C'], results['object']['V_C'])
+    mna = rc_circuit(source()).simulate(simulation_time=3, engine='mna',
+                                        time_step=0.01, progress=False)
+    assert np.allclose(np.interp(t, mna.times['V_C'], mna['V_C']),
+                       results['object']['V_C'], atol=1e-2)
+    print(name, 'v_c:', results['object']['V_C'][-1])
+
+# the memory-mapped stimulus is opened again instead of pickled
+source = pickle.loads(pickle.dumps(sources['npy']()))
+assert isinstance(source.samples, np.memmap)
+assert np.isclose(source.get_voltage(1.005e-6), 1.005)
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import DCVoltageSource
+
+
+c = Circuit()        
+
+c.add(DCVoltageSource(name='V1', v=10, pos='1', neg='GND'))
+c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+c.add(Resistor(name='R2', r=100, pos='2', neg='GND'))
+c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
+c.add(ISenseResistor(name='I1', resistor_name='R1', decimation=10))
+
+result = c.simulate(simulation_time=1, engine='numpy')
+
+# simulation without plotting doesn't import matplotlib, checked in a fresh 
+# interpreter, other tests of the same process may have imported it
+subprocess.run([sys.executable, '-c', '''
+import sys
+from simulator.circuit import Circuit
+from simulator.components import Resistor
+from simulator.sources import DCVoltageSource
+c = Circuit()
+c.add(DCVoltageSource(name='V1', v=1, pos='1', neg='GND'))
+c.add(Resistor(name='R1', r=100, pos='1', neg='GND'))
+c.simulate(simulation_time=0.01, progress=False)
+assert 'matplotlib' not in sys.modules
+'''], check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+assert len(result.time) == 10000
+assert list(result.voltages) == ['VM2'] and list(result.currents) == ['I1']
+assert np.array_equal(result.times['VM2'], result.time)
+assert np.array_equal(result.times['I1'], result.time[::10])
+assert np.isclose(result['VM2'][-1], 5, atol=0.1)
+assert np.isclose(result.currents['I1'][-1], 0.05, atol=1e-3)
@@ -0,0 +1,51 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, OperationalAmplifier
+from simulator.measurement import Voltmeter
+from simulator.sources import SquareWaveSource
+
+
+def inverting_amplifier():
+    # gain -2, the output slews with 1 V/usec and saturates at -3 V
+    c = Circuit() 
+    
+    c.add(SquareWaveSource(name='V1', v_hi=2, v_lo=0, t_period=40, 
+                           duty_cycle=50, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+    c.add(Resistor(name='R2', r=200, pos='2', neg='3'))
+    c.add(Resistor(name='R3', r=100, pos='3', neg='GND'))
+    c.add(OperationalAmplifier(name='OP_AMP', amp=1e5, v_max=3, v_min=-3, 
+                               non_inv='GND', inv='2', out='3', 
+                               slew_rate=1))
+    c.add(Voltmeter(name='V_OUT', pos='3', neg='GND'))
+    return c
+
+
+def expected(t):
+    """Output voltage, t in usec"""
+    return np.where(t <= 20, -np.minimum(t, 3), 
+                    np.minimum(-3 + (t - 20), 0))
+
+
+check = np.arange(1, 31, dtype=float)
+for time_step in (0.01, 0.1, 0.5):
+    result = inverting_amplifier().simulate(simulation_time=30, engine='mna',
+                                            time_step=time_step)
+    v = np.interp(check, result.times['V_OUT'] * 1e6, result['V_OUT'])
+    error = np.max(np.abs(v - expected(check)))
+    print('mna time step', time_step, 'usec, max error:', error)
+    assert error < 1e-3
+    
+result = inverting_amplifier().simulate(simulation_time=30, engine='mna',
+                                        time_step=0.01, adaptive=True)
+v = np.interp(check, result.times['V_OUT'] * 1e6, result['V_OUT'])
+print('adaptive steps:', len(result.time), 'max error:', 
+      np.max(np.abs(v - expected(check))))
+assert len(result.time) < 300
+assert np.max(np.abs(v - expected(check))) < 1e-2
+
+# the explicit engine limits the change of every DELTA_TIME step
+result = inverting_amplifier().simulate(simulation_time=30, engine='numpy')
+v = np.interp(check, result.times['V_OUT'] * 1e6, result['V_OUT'])
+print('numpy engine max error:', np.max(np.abs(v - expected(check))))
+assert np.max(np.abs(v - expected(check))) < 0.05
@@ -0,0 +1,59 @@
+import pickle
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, Inductor, OperationalAmplifier
+from simulator.junction import Junction
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import (SquareWaveSource, DCVoltageSource,
+                               DCCurrentSource, GND)
+
+
+def circuit():
+    c = Circuit()
+    c.add(GND(name='GND', gnd='0'))
+    c.add(SquareWaveSource(name='V1', v_hi=10, v_lo=2, t_period=2,
+                           duty_cycle=50, pos='1', neg='0'))
+    c.add(DCVoltageSource(name='V2', v=1, pos='5', neg='0'))
+    c.add(DCCurrentSource(name='I_S', i=1e-3, pos='4', neg='0'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2'))
+    c.add(Resistor(name='R2', r=50, pos='2', neg='3'))
+    c.add(Resistor(name='R3', r=10, pos='3', neg='4'))
+    c.add(Resistor(name='R4', r=1000, pos='5', neg='2'))
+    c.add(Capacitor(name='C1', c=1e-7, pos='4', neg='0'))
+    c.add(Inductor(name='L1', l=10e-6, pos='4', neg='0'))
+    c.add(OperationalAmplifier(name='OP_AMP', amp=1000, v_max=50, v_min=-50,
+                               non_inv='0', inv='2', out='3'))
+    c.add(Voltmeter(name='VM2', pos='2', neg='0'))
+    c.add(Voltmeter(name='VM4', pos='4', neg='0'))
+    c.add(ISenseResistor(name='I1', resistor_name='R1'))
+    return c
+
+
+# components and junctions have no __dict__, the pins are attributes
+for obj in (Junction('1'), Resistor(name='R', r=1, pos='1', neg='2'),
+            Capacitor(name='C', c=1, pos='1', neg='2'),
+            OperationalAmplifier(name='A', amp=1, v_max=1, v_min=-1,
+                                 non_inv='1', inv='2', out='3')):
+    assert not hasattr(obj, '__dict__')
+c = circuit()
+c.connect_circuit()
+assert c.comp_list.resistors[0].pos is c.junctions['1']
+
+# the prebuilt step functions give the same results as the simulation_step
+# methods of the components, which the profiled steps call
+reference = circuit().simulate(simulation_time=3, profile=True,
+                               progress=False)
+result = c.simulate(simulation_time=3, progress=False)
+for name in reference.measurements:
+    assert np.array_equal(result[name], reference[name])
+
+# connected circuits are pickled with their slots, the step functions are
+# built again
+c = pickle.loads(pickle.dumps(c))
+assert c.comp_list.measuring_instruments[0].junction_names['pos'] == '2'
+c.comp_list.capacitors[0].v = 0
+c.comp_list.inductors[0].i = 0
+c.comp_list.amplifiers[0].v_out = 0
+result = c.simulate(simulation_time=3, progress=False)
+for name in reference.measurements:
+    assert np.array_equal(result[name], reference[name])
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import numpy as np
+from simulator.checkpoint import Snapshot
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, Inductor
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import SquareWaveSource
+from simulator.waveform_file import load_waveforms
+
+
+def rlc_circuit():
+    c = Circuit()  
+    
+    c.add(SquareWaveSource(name='V1', v_hi=1, v_lo=0, t_period=2, 
+                           duty_cycle=0.5, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=10, pos='1', neg='2')) 
+    c.add(Inductor(name='L1', l=1e-6, pos='2', neg='3'))
+    c.add(Capacitor(name='C1', c=1e-7, pos='3', neg='GND'))
+    c.add(Voltmeter(name='V_C', pos='3', neg='GND', decimation=7))
+    c.add(ISenseResistor(name='I_L', resistor_name='L1'))
+    return c
+
+
+class Interrupt(Exception):
+    pass
+
+
+def interrupt_after(snapshots):
+    """Makes the run fail after a number of snapshots, like a killed job"""
+    save = Snapshot.save
+    
+    def failing_save(self, checkpoint, circuit):
+        save(self, checkpoint, circuit)
+        failing_save.count += 1
+        if failing_save.count == snapshots:
+            raise Interrupt()
+        
+    failing_save.count = 0
+    Snapshot.save = failing_save
+    return save
+
+
+for engine in ('object', 'numpy'):
+    reference = rlc_circuit().simulate(simulation_time=4, engine=engine)
+    
+    for streamed in (False, True):
+        directory = tempfile.mkdtemp()
+        output = os.path.join(directory, 'waveforms') if streamed else None
+        save = interrupt_after(3)
+        try:
+            rlc_circuit().run(4, engine=engine, output=output,
+                              snapshot=directory, snapshot_interval=0)
+            assert False, 'the run was not interrupted'
+        except Interrupt:
+            pass
+        finally:
+            Snapshot.save = save
+        
+        # a new process would build the circuit again
+        c = rlc_circuit()
+        result = c.restart(directory)
+        if streamed:
+            result = load_waveforms(output)
+        for name in ('V_C', 'I_L'):
+            assert np.array_equal(result[name], reference[name])
+        if not streamed:
+            assert np.array_equal(result.times['V_C'], reference.times['V_C'])
+        print(engine, 'streamed' if streamed else 'in memory', 
+              'restarted, V_C at 4 usec:', result['V_C'][-1])
+    
+# a different circuit can not continue the snapshot
+c = rlc_circuit()
+c.add(Resistor(name='R2', r=10, pos='3', neg='GND'))
+try:
+    c.restart(directory)
+    assert False
+except ValueError:
+    pass
@@ -0,0 +1,64 @@
+import time
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, OperationalAmplifier
+from simulator.matrix_backend import DenseFactorization
+from simulator.measurement import Voltmeter
+from simulator.sources import SquareWaveSource, GND
+
+
+def rc_ladder(stages):
+    """RC ladder driven by a buffer amplifier"""
+    c = Circuit()  
+    
+    c.add(SquareWaveSource(name='V1', v_hi=1, v_lo=-1, t_period=20, 
+                           duty_cycle=50, pos='IN', neg='GND'))
+    c.add(OperationalAmplifier(name='OP_AMP', amp=1e5, v_max=0.5, 
+                               v_min=-0.5, non_inv='IN', inv='0', out='0'))
+    c.add(GND(name='GND', gnd='GND'))
+    for k in range(stages):
+        c.add(Resistor(name='R' + str(k), r=10, pos=str(k), neg=str(k + 1)))
+        c.add(Capacitor(name='C' + str(k), c=1e-9, pos=str(k + 1), 
+                        neg='GND'))
+    c.add(Voltmeter(name='V_1', pos='1', neg='GND'))
+    c.add(Voltmeter(name='V_END', pos=str(stages), neg='GND'))
+    return c
+
+
+# the sparse and the dense backend give the same waveforms
+results = {}
+for backend in ('dense', 'sparse'):
+    results[backend] = rc_ladder(300).simulate(
+        simulation_time=20, engine='mna', time_step=0.05, backend=backend)
+for name in ('V_1', 'V_END'):
+    deviation = np.max(np.abs(results['dense'][name] - 
+                              results['sparse'][name]))
+    print(name, 'max deviation:', deviation)
+    assert deviation < 1e-9
+    
+# operating point of the sparse backend
+c = rc_ladder(300)
+voltages = c.op()
+assert np.isclose(voltages['300'], 0.5)
+
+if __name__ == '__main__':
+    # per step cost grows linearly with the number of junctions
+    for stages in (1000, 2000, 4000, 8000):
+        c = rc_ladder(stages)
+        start = time.perf_counter()
+        c.simulate(simulation_time=10, engine='mna', time_step=0.05, 
+                   backend='sparse')
+        print(stages, 'stages:', time.perf_counter() - start, 'sec')
+
+
+# the dense factorization solves badly conditioned systems by LU, with a 
+# residual at the rounding error level
+m = 1 / (np.arange(10)[:, np.newaxis] + np.arange(10) + 1.)
+b = np.ones(10)
+x = DenseFactorization(m).solve(b)
+assert np.allclose(m @ x, b, atol=1e-8)
+try:
+    DenseFactorization(np.zeros((2, 2)))
+    assert False
+except np.linalg.LinAlgError:
+    pass
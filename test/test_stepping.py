@@ -0,0 +1,49 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor
+from simulator.measurement import Voltmeter
+from simulator.sources import SquareWaveSource
+from simulator.stepping import TimeGrid, step_chunks
+
+
+# the time points are the same as the ones of np.arange, without storing them
+for simulation_time in (0.7, 1, 3.3, 100):
+    time = np.arange(simulation_time * 1e-6, step=1e-10)
+    grid = TimeGrid.of_duration(simulation_time)
+    assert len(grid) == len(time)
+    assert np.array_equal(np.asarray(grid), time)
+    assert grid[-1] == time[-1] and np.array_equal(grid[5:105:7], time[5:105:7])
+    assert np.array_equal(grid.steps(100)[:], time[100:])
+    # arithmetic and ufuncs work on the time points as on the array
+    assert np.array_equal(grid * 1e6, time * 1e6)
+    assert np.array_equal(1e6 * grid, time * 1e6)
+    assert np.array_equal(np.sin(grid), np.sin(time))
+    assert grid.shape == time.shape
+
+# chunks end at the chunk size and at every boundary
+assert list(step_chunks(10, 4)) == [(0, 4), (4, 8), (8, 10)]
+assert list(step_chunks(10, 4, 3)) == [(0, 3), (3, 6), (6, 9), (9, 10)]
+assert list(step_chunks(0, 4)) == []
+
+# both explicit engines step the same time points in chunks
+results = {}
+for engine in ('object', 'numpy'):
+    c = Circuit()
+    c.add(SquareWaveSource(name='V1', v_hi=5, v_lo=0, t_period=0.4,
+                           duty_cycle=50, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2'))
+    c.add(Capacitor(name='C1', c=1e-9, pos='2', neg='GND'))
+    c.add(Voltmeter(name='V_C', pos='2', neg='GND'))
+    results[engine] = c.simulate(simulation_time=1.5, engine=engine,
+                                 progress=False)
+    assert isinstance(results[engine].time, TimeGrid)
+    assert np.array_equal(results[engine].times['V_C'],
+                          np.asarray(results[engine].time))
+assert np.array_equal(results['object']['V_C'], results['numpy']['V_C'])
+# the time of the results is a time vector in usec as well for the explicit 
+# and the mna engines
+results['mna'] = c.simulate(simulation_time=1.5, engine='mna', time_step=0.01,
+                            progress=False)
+for engine, result in results.items():
+    t = result.time * 1e6
+    assert isinstance(t, np.ndarray) and np.isclose(t[-1], 1.5, atol=0.02)
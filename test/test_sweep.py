@@ -0,0 +1,50 @@
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor, OperationalAmplifier
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import DCVoltageSource
+from simulator.sweep import grid_variants, monte_carlo_variants, run_sweep
+
+
+c = Circuit()  
+
+c.add(DCVoltageSource(name='V1', v=1, pos='1', neg='GND'))
+c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+c.add(Resistor(name='R2', r=200, pos='2', neg='3'))
+c.add(Resistor(name='R3', r=10, pos='3', neg='4'))
+c.add(Capacitor(name='C1', c=1e-6, pos='4', neg='GND'))
+c.add(OperationalAmplifier(name='OP_AMP', amp=1000, v_max=50, 
+                           v_min=-50, non_inv='GND', inv='2', out='3'))
+c.add(Voltmeter(name='V_OUT', pos='3', neg='GND'))
+c.add(ISenseResistor(name='I2', resistor_name='R2')) 
+
+
+if __name__ == '__main__':
+    # inverting amplifier gain: -R2 / R1
+    variants = grid_variants({'R2.r': [100, 200, 400], 'V1.v': [1, 2]})
+    sweep = run_sweep(c, variants, simulation_time=20, engine='mna', 
+                      time_step=0.1, workers=2)
+    gain = sweep['V_OUT'][:, -1] / sweep.parameters['V1.v']
+    print('gain:', gain)
+    assert sweep['V_OUT'].shape == (6, 200)
+    assert np.allclose(gain, -sweep.parameters['R2.r'] / 100, rtol=1e-2)
+    
+    # the base circuit keeps its nominal values
+    assert c.comp_list.resistors[1].r == 200
+    
+    variants = monte_carlo_variants(c, {'R1.r': 5, 'R2.r': 5}, samples=20, 
+                                    seed=1)
+    sweep = run_sweep(c, variants, simulation_time=20, engine='mna', 
+                      time_step=0.1)
+    gain = sweep['V_OUT'][:, -1]
+    print('gain spread:', gain.min(), gain.max())
+    assert np.all(np.abs(sweep.parameters['R1.r'] - 100) <= 5)
+    assert np.allclose(gain, -sweep.parameters['R2.r'] / 
+                       sweep.parameters['R1.r'], rtol=1e-2)
+    
+    # the sweep reports the finished variants, the workers report nothing
+    reports = []
+    run_sweep(c, variants[:4], simulation_time=1, engine='mna', 
+              time_step=0.1, workers=2, progress=reports.append)
+    assert reports[-1]['finished'] and reports[-1]['done'] == 4
+    assert {r['unit'] for r in reports} == {'variants'}
@@ -16,4 +16,4 @@ c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
 c.add(VSenseResistor(name='VR2', resistor_name='R2'))
 c.add(ISenseResistor(name='I1', resistor_name='R1'))
 
-c.simulate(simulation_time=100)
\ No newline at end of file
+c.simulate(simulation_time=100, plot=True)
\ No newline at end of file
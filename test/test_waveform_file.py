@@ -0,0 +1,42 @@
+import os
+import tempfile
+import numpy as np
+from simulator.circuit import Circuit
+from simulator.components import Resistor, Capacitor
+from simulator.measurement import Voltmeter, ISenseResistor
+from simulator.sources import SquareWaveSource
+from simulator.waveform_file import load_waveforms
+
+
+def rc_circuit():
+    c = Circuit() 
+    
+    c.add(SquareWaveSource(name='V1', v_hi=10, v_lo=0, t_period=20, 
+                           duty_cycle=50, pos='1', neg='GND'))
+    c.add(Resistor(name='R1', r=100, pos='1', neg='2')) 
+    c.add(Capacitor(name='C1', c=1e-8, pos='2', neg='GND'))
+    c.add(Voltmeter(name='VM2', pos='2', neg='GND'))
+    c.add(ISenseResistor(name='I1', resistor_name='R1', decimation=3))
+    return c
+
+
+in_memory = rc_circuit()
+in_memory.run(simulation_time=2000, engine='mna', time_step=0.01)
+
+directory = os.path.join(tempfile.mkdtemp(), 'rc_run')
+streamed = rc_circuit()
+streamed.run(simulation_time=2000, engine='mna', time_step=0.01, 
+             output=directory)
+
+waveforms = load_waveforms(directory)
+print(waveforms.names, [len(waveforms[name]) for name in waveforms.names])
+assert waveforms.names == ['VM2', 'I1']
+assert waveforms.unit('I1') == 'A'
+for mi in in_memory.comp_list.measuring_instruments:
+    assert isinstance(waveforms[mi.name], np.memmap)
+    assert np.array_equal(waveforms[mi.name], mi.get_measurements())
+    assert np.array_equal(waveforms.get_times(mi.name), mi.get_times())
+    
+# instruments of the streamed run read their samples back from the files
+for mi in streamed.comp_list.measuring_instruments:
+    assert np.array_equal(waveforms[mi.name], mi.get_measurements())